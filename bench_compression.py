@@ -0,0 +1,77 @@
+from lstore import Bufferpool, DiskInterface, SegmentDiskInterface
+from lstore.compression import CODECS, encode_page, decode_page
+from lstore.table import Table
+from lstore.query import Query
+from time import perf_counter
+from random import randrange, seed
+import shutil
+import tempfile
+
+# Compares the page codecs on the pages of a grades table: how much each one shrinks a page, how fast it
+# encodes and decodes, and what that costs when pages are written to and read from each storage backend
+NUMBER_OF_RECORDS = 16000
+NUMBER_OF_UPDATES = 16000
+DISK_INTERFACES = [DiskInterface, SegmentDiskInterface]
+
+
+def build_grades_pages() -> dict:
+    seed(3562901)
+    path = tempfile.mkdtemp()
+    try:
+        bufferpool = Bufferpool(1_000_000, path)
+        grades_table = Table("Grades", 5, 0, bufferpool)
+        query = Query(grades_table)
+        keys = [906659671 + i for i in range(NUMBER_OF_RECORDS)]
+        for key in keys:
+            query.insert(key, randrange(0, 20), randrange(0, 20), randrange(0, 20), randrange(0, 20))
+        for _ in range(NUMBER_OF_UPDATES):
+            query.update(keys[randrange(0, NUMBER_OF_RECORDS)], None, randrange(0, 20), None, None, None)
+        return dict(bufferpool.physical_pages)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def bench_codec(codec_name: str, pages: dict) -> None:
+    datas = [bytes(page.get_data()) for page in pages.values()]
+    total_size = sum(len(data) for data in datas)
+    time_0 = perf_counter()
+    encoded_datas = [encode_page(data, codec_name) for data in datas]
+    time_1 = perf_counter()
+    for encoded_data in encoded_datas:
+        decode_page(encoded_data)
+    time_2 = perf_counter()
+    ratio = total_size / sum(len(encoded_data) for encoded_data in encoded_datas)
+    megabytes = total_size / (1024 * 1024)
+    print(
+        f"{codec_name:<8} ratio: {ratio:6.2f}\t"
+        f"encode: {megabytes / (time_1 - time_0):8.1f} MB/s\tdecode: {megabytes / (time_2 - time_1):8.1f} MB/s"
+    )
+    for disk_interface_class in DISK_INTERFACES:
+        bench_disk(disk_interface_class, codec_name, pages)
+
+
+def bench_disk(disk_interface_class, codec_name: str, pages: dict) -> None:
+    path = tempfile.mkdtemp()
+    try:
+        disk = disk_interface_class(path)
+        disk.set_codec("Grades", codec_name)
+        time_0 = perf_counter()
+        for page_id, page in pages.items():
+            disk.write_page(page_id, page)
+        disk.sync()
+        time_1 = perf_counter()
+        for page_id in pages:
+            disk.get_page(page_id)
+        time_2 = perf_counter()
+        if hasattr(disk, "close"):
+            disk.close()
+        print(f"  {disk_interface_class.__name__:<22} write: {time_1 - time_0:8.3f}s\tread: {time_2 - time_1:8.3f}s")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    grades_pages = build_grades_pages()
+    print(f"{len(grades_pages)} pages")
+    for codec in CODECS:
+        bench_codec(codec.name, grades_pages)
@@ -0,0 +1,75 @@
+from lstore import Bufferpool, LRUPolicy, ClockPolicy, TwoQueuePolicy, ARCPolicy
+from lstore.table import Table
+from lstore.query import Query
+from time import perf_counter, sleep
+from random import choice, randrange, seed
+import shutil
+import tempfile
+
+# Replays the update / select / sum workloads of bench_single.py under every bufferpool eviction policy,
+# with a bufferpool small enough that the working set does not fit in memory
+NUMBER_OF_RECORDS = 64000
+NUMBER_OF_UPDATES = 64000
+NUMBER_OF_SELECTS = 100000
+BUFFERPOOL_SIZE = 500
+POLICIES = [LRUPolicy, ClockPolicy, TwoQueuePolicy, ARCPolicy]
+
+
+def run_phase(bufferpool: Bufferpool, name: str, phase) -> None:
+    bufferpool.num_hits = 0
+    bufferpool.num_misses = 0
+    time_0 = perf_counter()
+    phase()
+    time_1 = perf_counter()
+    print(f"  {name:<10} wall time: {time_1 - time_0:8.3f}s\thit ratio: {bufferpool.get_hit_ratio():.4f}")
+
+
+def run_workload(policy_class) -> None:
+    seed(3562901)
+    path = tempfile.mkdtemp()
+    try:
+        bufferpool = Bufferpool(BUFFERPOOL_SIZE, path, policy_class())
+        grades_table = Table("Grades", 5, 0, bufferpool)
+        query = Query(grades_table)
+        keys = [906659671 + i for i in range(NUMBER_OF_RECORDS)]
+
+        def insert():
+            for key in keys:
+                query.insert(key, randrange(0, 100), randrange(0, 100), randrange(0, 100), randrange(0, 100))
+
+        update_cols = [
+            [None, None, None, None, None],
+            [None, randrange(0, 100), None, None, None],
+            [None, None, randrange(0, 100), None, None],
+            [None, None, None, randrange(0, 100), None],
+            [None, None, None, None, randrange(0, 100)],
+        ]
+
+        def update():
+            for _ in range(NUMBER_OF_UPDATES):
+                query.update(choice(keys), *(choice(update_cols)))
+
+        def select():
+            for _ in range(NUMBER_OF_SELECTS):
+                query.select(choice(keys), 0, [1, 1, 1, 1, 1])
+
+        def aggregate():
+            for i in range(0, NUMBER_OF_RECORDS, 100):
+                start_value = 906659671 + i
+                query.sum(start_value, start_value + 99, randrange(0, 5))
+
+        print(f"{policy_class.__name__} ({BUFFERPOOL_SIZE} pages)")
+        run_phase(bufferpool, "insert", insert)
+        run_phase(bufferpool, "update", update)
+        run_phase(bufferpool, "select", select)
+        run_phase(bufferpool, "sum", aggregate)
+        # let queued merges finish so they do not overlap with the next policy's run
+        while not grades_table.merge_queue.empty() and grades_table.merge_thread.is_alive():
+            sleep(0.01)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    for policy_class in POLICIES:
+        run_workload(policy_class)
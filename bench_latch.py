@@ -0,0 +1,42 @@
+from lstore.db import Database
+from lstore.query import Query
+from contextlib import nullcontext
+from time import perf_counter
+from unittest import mock
+import tempfile
+
+# Times single row inserts, the write path that takes the latch of a base page for every record, once with
+# the page latches and once with latches that do nothing, to bound what latching costs an insert
+NUMBER_OF_RECORDS = 60000
+NUMBER_OF_RUNS = 3
+
+
+class NoLatch:
+    def __init__(self) -> None:
+        self.shared = nullcontext()
+        self.exclusive = nullcontext()
+
+
+def insert_records() -> float:
+    with tempfile.TemporaryDirectory() as path:
+        db = Database()
+        db.open(path)
+        grades_table = db.create_table("Grades", 5, 0)
+        # secondary indices would be saved to the working directory when the database is closed
+        grades_table.secondary_indices = [None] * 5
+        query = Query(grades_table)
+        time_0 = perf_counter()
+        for key in range(NUMBER_OF_RECORDS):
+            query.insert(906659671 + key, 1, 2, 3, 4)
+        time_1 = perf_counter()
+        db.close()
+    return time_1 - time_0
+
+
+if __name__ == "__main__":
+    latched = min(insert_records() for _ in range(NUMBER_OF_RUNS))
+    with mock.patch("lstore.page.ReadWriteLatch", NoLatch):
+        unlatched = min(insert_records() for _ in range(NUMBER_OF_RUNS))
+    print(f"Inserting {NUMBER_OF_RECORDS} records with page latches took:   \t{latched:.3f}s")
+    print(f"Inserting {NUMBER_OF_RECORDS} records without page latches took:\t{unlatched:.3f}s")
+    print(f"Latching overhead: \t\t\t\t\t{(latched / unlatched - 1) * 100:.1f}%")
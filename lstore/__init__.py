@@ -11,7 +11,7 @@ from .config import (
     START_TAIL_RID,
     NUM_METADATA_COLS,
 )
-from .disk import DiskInterface
+from .disk import DiskInterface, SegmentDiskInterface, MmapDiskInterface
 from .page import LogicalPage, BasePage, TailPage, get_copy_of_base_page
 from .phys_page import PhysicalPage
 from .rid import RID_Generator
@@ -21,8 +21,9 @@ from .table import Table
 from .index import Index
 from .query import Query
 from .bufferpool import Bufferpool
+from .eviction import EvictionPolicy, LRUPolicy, ClockPolicy, TwoQueuePolicy, ARCPolicy
 from .secondary import SecondaryIndex, DSAStructure
 from .seeding import SeedSet
 from .planner import Planner
 from .mp_secondary import AsyncSecondaryIndex, Operation
-from .enums import DSAStructure, Operation
\ No newline at end of file
+from .enums import DSAStructure, Operation, StorageBackend
\ No newline at end of file
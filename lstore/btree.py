@@ -0,0 +1,180 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator, Tuple
+
+from .config import BTREE_ORDER
+
+_MISSING = object()
+
+
+class _Leaf:
+    __slots__ = ("keys", "values", "next")
+
+    def __init__(self, keys: list, values: list, next: "_Leaf | None" = None) -> None:
+        self.keys = keys
+        self.values = values
+        self.next = next
+
+
+class _Internal:
+    __slots__ = ("keys", "children")
+
+    def __init__(self, keys: list, children: list) -> None:
+        # children[i] holds the keys below keys[i], children[i + 1] the keys from keys[i] on
+        self.keys = keys
+        self.children = children
+
+
+class BPlusTree:
+    """
+    #: An in-memory B+ tree mapping keys to values, with the values kept in linked leaves so that ordered
+    range scans walk the leaves without going back up the tree
+    #: Supports the subset of the dict interface the secondary indices use (get, setdefault, in, [], items),
+    so it can stand in for their dictionary
+    """
+
+    def __init__(self, order: int = BTREE_ORDER) -> None:
+        """
+        `order`: the most keys a node holds before it is split
+        """
+        assert order >= 3
+        self.order = order
+        self.root: _Leaf | _Internal = _Leaf([], [])
+        self.length = 0
+
+    def __getstate__(self):
+        # the leaves are pickled as a flat list of items, following the leaf links would recurse once per leaf
+        return {"order": self.order, "items": list(self.items())}
+
+    def __setstate__(self, state):
+        self.order = state["order"]
+        self.__bulk_load(state["items"])
+
+    def __bulk_load(self, items: list[Tuple[Any, Any]]) -> None:
+        """
+        `items`: (key, value) pairs in ascending key order
+        #: builds the tree bottom up, filling each node
+        """
+        self.length = len(items)
+        leaves: list[_Leaf] = [
+            _Leaf([key for key, _ in items[i : i + self.order]], [value for _, value in items[i : i + self.order]])
+            for i in range(0, len(items), self.order)
+        ] or [_Leaf([], [])]
+        for leaf, next_leaf in zip(leaves, leaves[1:]):
+            leaf.next = next_leaf
+        # (smallest key below the node, node) for every node of the level being built on
+        level: list[Tuple[Any, _Leaf | _Internal]] = [(leaf.keys[0] if leaf.keys else None, leaf) for leaf in leaves]
+        while len(level) > 1:
+            level = [
+                (group[0][0], _Internal([min_key for min_key, _ in group[1:]], [node for _, node in group]))
+                for group in (level[i : i + self.order + 1] for i in range(0, len(level), self.order + 1))
+            ]
+        self.root = level[0][1]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        split = self.__insert(self.root, key, value)
+        if split != None:
+            split_key, sibling = split
+            self.root = _Internal([split_key], [self.root, sibling])
+
+    def __iter__(self) -> Iterator:
+        return (key for key, _ in self.items())
+
+    def __find_leaf(self, key) -> _Leaf:
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[bisect_right(node.keys, key)]
+        return node
+
+    def __first_leaf(self) -> _Leaf:
+        node = self.root
+        while isinstance(node, _Internal):
+            node = node.children[0]
+        return node
+
+    def __insert(self, node: _Leaf | _Internal, key, value) -> Tuple[Any, _Leaf | _Internal] | None:
+        """
+        #: inserts or replaces `key` below `node`
+        #: returns the separator key and new right sibling when `node` had to be split, None otherwise
+        """
+        if isinstance(node, _Leaf):
+            i = bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                node.values[i] = value
+                return None
+            node.keys.insert(i, key)
+            node.values.insert(i, value)
+            self.length += 1
+            if len(node.keys) <= self.order:
+                return None
+            half = len(node.keys) // 2
+            sibling = _Leaf(node.keys[half:], node.values[half:], node.next)
+            del node.keys[half:]
+            del node.values[half:]
+            node.next = sibling
+            return sibling.keys[0], sibling
+        i = bisect_right(node.keys, key)
+        split = self.__insert(node.children[i], key, value)
+        if split == None:
+            return None
+        node.keys.insert(i, split[0])
+        node.children.insert(i + 1, split[1])
+        if len(node.keys) <= self.order:
+            return None
+        half = len(node.keys) // 2
+        # the middle key moves up, it separates the two halves
+        split_key = node.keys[half]
+        sibling = _Internal(node.keys[half + 1 :], node.children[half + 1 :])
+        del node.keys[half:]
+        del node.children[half + 1 :]
+        return split_key, sibling
+
+    def get(self, key, default=None):
+        leaf = self.__find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            return leaf.values[i]
+        return default
+
+    def setdefault(self, key, default=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self[key] = default
+            return default
+        return value
+
+    def items(self, begin=None, end=None) -> Iterator[Tuple[Any, Any]]:
+        """
+        `begin`, `end`: inclusive bounds of the keys to return, unbounded when None
+        #: yields the (key, value) pairs in ascending key order
+        """
+        if begin == None:
+            leaf, i = self.__first_leaf(), 0
+        else:
+            leaf = self.__find_leaf(begin)
+            i = bisect_left(leaf.keys, begin)
+        while leaf != None:
+            keys, values = leaf.keys, leaf.values
+            while i < len(keys):
+                if end != None and keys[i] > end:
+                    return
+                yield keys[i], values[i]
+                i += 1
+            leaf, i = leaf.next, 0
+
+    def keys(self) -> Iterator:
+        return (key for key, _ in self.items())
+
+    def values(self) -> Iterator:
+        return (value for _, value in self.items())
@@ -1,36 +1,130 @@
 from .phys_page import PhysicalPage
-from .disk import DiskInterface
+from .disk import DiskInterface, SegmentDiskInterface, make_disk_interface
+from .enums import StorageBackend
+from .eviction import EvictionPolicy, LRUPolicy
+from .config import WRITE_BACK_BATCH_SIZE
+from collections import OrderedDict
 from copy import deepcopy
+from threading import Condition, RLock, Thread
 import os
 
 
 class Bufferpool:
-    def __init__(self, max_buffer_pool_size: int, path: str) -> None:
+    # number of times a page was written to, which tells whether the pages changed since it was last read
+    num_writes: int = 0
+
+    def __init__(
+        self,
+        max_buffer_pool_size: int,
+        path: str,
+        eviction_policy: EvictionPolicy | None = None,
+        storage_backend: StorageBackend = StorageBackend.FILE_PER_PAGE,
+        num_clean_frames: int = 0,
+    ) -> None:
+        """
+        `num_clean_frames`: number of frames a background thread keeps free or clean by writing dirty pages
+        back ahead of eviction, so evictions rarely have to write a page themselves
+        #: 0 disables the write-back thread and dirty pages are only written when they are evicted
+        """
         self.max_buffer_pool_size: int = max_buffer_pool_size
         self.physical_pages: dict[str, PhysicalPage] = dict()
-        self.disk: DiskInterface = DiskInterface(path)
+        self.lock = RLock()
+        self.set_eviction_policy(eviction_policy)
+        self.num_hits: int = 0
+        self.num_misses: int = 0
+        self.disk: DiskInterface | SegmentDiskInterface = make_disk_interface(path, storage_backend)
         if path != "":
             os.makedirs(path, exist_ok=True)
+        self.num_clean_frames: int = num_clean_frames
+        # ids of resident pages that may be dirty, in the order they were first dirtied
+        self.dirty_page_ids: OrderedDict[str, None] = OrderedDict()
+        self.__init_write_back()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ("lock", "write_back_needed", "pages_written", "pages_being_written", "write_back_thread"):
+            del state[attribute]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = RLock()
+        self.__init_write_back()
+
+    def __init_write_back(self) -> None:
+        self.write_back_needed = Condition(self.lock)
+        self.pages_written = Condition(self.lock)
+        self.pages_being_written: set[str] = set()
+        self.write_back_thread: Thread | None = None
+        self.stop_write_back_thread: bool = False
 
     def insert_page(self, page_id: str, slot_num: int, value: int) -> bool:
+        with self.lock:
+            physical_page: PhysicalPage = self.__get_page_for_write(page_id)
+            physical_page.pin_page()
+            success: bool = physical_page.insert_value(value, slot_num)
+            physical_page.set_dirty()
+            physical_page.unpin_page()
+            self.__page_dirtied(page_id)
+            return success
+
+    def insert_row(self, page_ids: list[str], slot_num: int, values: list[int | None]) -> bool:
+        """
+        #: writes each of `values` into `slot_num` of the page of the same position in `page_ids` with a single
+        acquisition of the lock, None values are skipped
+        """
+        with self.lock:
+            success: bool = True
+            for page_id, value in zip(page_ids, values):
+                if value == None:
+                    continue
+                # nothing evicts the page while the lock is held, so it is not pinned
+                physical_page: PhysicalPage = self.__get_page_for_write(page_id)
+                success = physical_page.insert_value(value, slot_num) and success
+                physical_page.set_dirty()
+                self.__page_dirtied(page_id)
+            return success
+
+    def insert_values(self, page_id: str, start_slot_num: int, values: list[int]) -> bool:
+        """
+        #: writes `values` into consecutive slots of the page beginning at `start_slot_num` with a single lookup
+        """
+        with self.lock:
+            physical_page: PhysicalPage = self.__get_page_for_write(page_id)
+            physical_page.pin_page()
+            try:
+                success: bool = physical_page.set_column_values(values, start_slot_num)
+            finally:
+                physical_page.unpin_page()
+            physical_page.set_dirty()
+            self.__page_dirtied(page_id)
+            return success
+
+    def __get_page_for_write(self, page_id: str) -> PhysicalPage:
+        """
+        #: returns the resident page, loading it from disk or creating an empty page if needed
+        """
         if page_id in self.physical_pages:
             physical_page = self.physical_pages[page_id]
-        elif self.disk.page_exists(page_id):
+            self.num_hits += 1
+            self.eviction_policy.page_accessed(page_id)
+            return physical_page
+        if self.disk.page_exists(page_id):
             self.__evict_page_if_bufferpool_full()
             physical_page = self.disk.get_page(page_id)
+            self.num_misses += 1
         else:
             self.__evict_page_if_bufferpool_full()
             physical_page: PhysicalPage = PhysicalPage()
-
-        physical_page.pin_page()
-        physical_page.insert_value(value, slot_num)
-        physical_page.set_dirty()
-
+        self.eviction_policy.page_added(page_id)
         self.physical_pages[page_id] = physical_page
-        physical_page.unpin_page()
-        return True
+        return physical_page
 
     def copy_page(self, source_page_id: str, dest_page_id: str) -> bool:
+        with self.lock:
+            return self.__copy_page(source_page_id, dest_page_id)
+
+    def __copy_page(self, source_page_id: str, dest_page_id: str) -> bool:
         if dest_page_id in self.physical_pages or self.disk.page_exists(dest_page_id):
             return False
         self.__evict_page_if_bufferpool_full()
@@ -39,10 +133,30 @@ class Bufferpool:
         self.__evict_page_if_bufferpool_full()
         source_page_copy.set_dirty()
         self.physical_pages[dest_page_id] = source_page_copy
+        self.eviction_policy.page_added(dest_page_id)
+        self.__page_dirtied(dest_page_id)
         return True
 
     def get_page(self, page_id: str) -> PhysicalPage:
+        with self.lock:
+            return self.__get_page(page_id)
+
+    def delete_page(self, page_id: str) -> None:
+        """
+        #: drops the page from memory and from disk, for pages nothing refers to anymore
+        #: the eviction policy forgets the page the next time it picks it
+        """
+        with self.lock:
+            while page_id in self.pages_being_written:
+                self.pages_written.wait()
+            self.physical_pages.pop(page_id, None)
+            self.dirty_page_ids.pop(page_id, None)
+            self.disk.delete_page(page_id)
+
+    def __get_page(self, page_id: str) -> PhysicalPage:
         if page_id in self.physical_pages:
+            self.num_hits += 1
+            self.eviction_policy.page_accessed(page_id)
             return self.physical_pages[page_id]
 
         if not self.disk.page_exists(page_id):
@@ -52,45 +166,158 @@ class Bufferpool:
 
         physical_page: PhysicalPage = self.disk.get_page(page_id)
         self.physical_pages[page_id] = physical_page
+        self.num_misses += 1
+        self.eviction_policy.page_added(page_id)
         return physical_page
 
-    def evict_all_pages(self) -> None:
-        for _ in range(len(self.physical_pages)):
-            self._evict_page()
+    def set_eviction_policy(self, eviction_policy: EvictionPolicy | None) -> None:
+        with self.lock:
+            self.eviction_policy: EvictionPolicy = LRUPolicy() if eviction_policy is None else eviction_policy
+            self.eviction_policy.set_capacity(self.max_buffer_pool_size)
+            for page_id in self.physical_pages:
+                self.eviction_policy.page_added(page_id)
+
+    def get_hit_ratio(self) -> float:
+        num_accesses: int = self.num_hits + self.num_misses
+        return self.num_hits / num_accesses if num_accesses > 0 else 0.0
+
+    def flush_all_pages(self, num_workers: int | None = None) -> None:
+        """
+        `num_workers`: number of threads compressing pages
+        #: writes every dirty unpinned page in one batch, compressed in parallel and written in page id order,
+        and syncs the disk once at the end, the pages stay resident
+        """
+        with self.lock:
+            while self.pages_being_written:
+                self.pages_written.wait()
+            pages_to_write: list[tuple[str, PhysicalPage]] = [
+                (page_id, physical_page)
+                for page_id, physical_page in self.physical_pages.items()
+                if physical_page.is_dirty() and physical_page.can_evict()
+            ]
+            self.disk.write_pages(pages_to_write, num_workers)
+            for page_id, physical_page in pages_to_write:
+                physical_page.dirty = False
+                self.dirty_page_ids.pop(page_id, None)
+            self.disk.sync()
+
+    def evict_all_pages(self, num_workers: int | None = None) -> None:
+        with self.lock:
+            self.flush_all_pages(num_workers)
+            # every unpinned page is clean now, evicting them writes nothing
+            for _ in range(len(self.physical_pages)):
+                self._evict_page()
+
+    def stop_write_back(self) -> None:
+        """
+        #: stops the write-back thread once its in flight writes are done, it is restarted by the next
+        page that gets dirtied
+        """
+        with self.lock:
+            write_back_thread: Thread | None = self.write_back_thread
+            self.stop_write_back_thread = True
+            self.write_back_needed.notify_all()
+        if write_back_thread is not None:
+            write_back_thread.join()
+        with self.lock:
+            self.write_back_thread = None
+            self.stop_write_back_thread = False
 
     def __evict_page_if_bufferpool_full(self) -> None:
         num_free_pages: int = self.max_buffer_pool_size - len(self.physical_pages)
-        if num_free_pages == 0:
+        if num_free_pages <= 0:
             self._evict_page()
 
     def _evict_page(self) -> None:
-        if len(self.physical_pages) == 0:
-            return
+        with self.lock:
+            while True:
+                page_id: str | None = self.eviction_policy.evict(self.physical_pages)
+                if page_id is None:
+                    # every resident page is pinned
+                    return
+                physical_page: PhysicalPage | None = self.physical_pages.get(page_id)
+                if physical_page is not None:
+                    break
 
-        physical_pages_and_page_ids: list[tuple[PhysicalPage, str]] = sorted([(phys_page, page_id) for page_id, phys_page in list(self.physical_pages.items())], key=lambda x: x[0].get_timestamp())
-
-        bufferpool_page_index: int = 0
-        loop_iteration: int = 0
-        while True:
+            # a write-back of an older version of the page must not land after the page is dropped
+            while page_id in self.pages_being_written:
+                self.pages_written.wait()
 
-            # If stuck in infinite loop, prematurely exit
-            loop_iteration += 1
-            if loop_iteration > 2 * self.max_buffer_pool_size:
-                break
+            if physical_page.is_dirty():
+                self.disk.write_page(page_id, physical_page)
 
-            # Evict first valid page from bufferpool
-            try:
-                physical_page, page_id = physical_pages_and_page_ids[bufferpool_page_index]
-                bufferpool_page_index = (bufferpool_page_index + 1) % len(physical_pages_and_page_ids)
+            del self.physical_pages[page_id]
+            self.dirty_page_ids.pop(page_id, None)
 
-                if not physical_page.can_evict():
-                    continue
+    def __page_dirtied(self, page_id: str) -> None:
+        self.num_writes += 1
+        if page_id not in self.dirty_page_ids:
+            self.dirty_page_ids[page_id] = None
+        if self.num_clean_frames > 0 and self.__needs_write_back():
+            if self.write_back_thread is None:
+                self.write_back_thread = Thread(target=self.__write_back, daemon=True)
+                self.write_back_thread.start()
+            self.write_back_needed.notify()
 
-                if physical_page.is_dirty():
-                    self.disk.write_page(page_id, physical_page)
+    def __needs_write_back(self) -> bool:
+        return len(self.dirty_page_ids) > self.max_buffer_pool_size - self.num_clean_frames
 
-                del self.physical_pages[page_id]
-            except:
-                pass
+    def __write_back(self) -> None:
+        while True:
+            with self.lock:
+                while not self.stop_write_back_thread and not self.__needs_write_back():
+                    self.write_back_needed.wait()
+                if self.stop_write_back_thread:
+                    return
+                pages_to_write: list[tuple[str, PhysicalPage]] = self.__take_pages_to_write()
+                if len(pages_to_write) == 0:
+                    # every dirty page is pinned or already being written, wait for the next change
+                    self.write_back_needed.wait()
+                    continue
+            # pages are compressed and written without holding the lock, foreground work carries on meanwhile
+            num_pages_written: int = 0
+            try:
+                for page_id, page_to_write in pages_to_write:
+                    self.disk.write_page(page_id, page_to_write)
+                    num_pages_written += 1
             finally:
-                break
\ No newline at end of file
+                with self.lock:
+                    for page_id, _ in pages_to_write[num_pages_written:]:
+                        # the write failed, the page has to be written when it is evicted
+                        if page_id in self.physical_pages:
+                            self.physical_pages[page_id].set_dirty()
+                            self.dirty_page_ids[page_id] = None
+                    for page_id, _ in pages_to_write:
+                        self.pages_being_written.discard(page_id)
+                    self.pages_written.notify_all()
+
+    def __take_pages_to_write(self) -> list[tuple[str, PhysicalPage]]:
+        """
+        #: marks up to WRITE_BACK_BATCH_SIZE of the longest dirty pages clean, no more than are needed to
+        free up `num_clean_frames`, and returns snapshots of them
+        #: a page dirtied again while its snapshot is being written is simply dirty again
+        """
+        num_pages_to_write: int = len(self.dirty_page_ids) - (self.max_buffer_pool_size - self.num_clean_frames)
+        num_pages_to_write = min(num_pages_to_write, WRITE_BACK_BATCH_SIZE)
+        pages_to_write: list[tuple[str, PhysicalPage]] = []
+        clean_page_ids: list[str] = []
+        for page_id in self.dirty_page_ids:
+            if len(pages_to_write) + len(clean_page_ids) >= num_pages_to_write:
+                break
+            physical_page: PhysicalPage | None = self.physical_pages.get(page_id)
+            if physical_page is None or not physical_page.is_dirty():
+                clean_page_ids.append(page_id)
+                continue
+            if not physical_page.can_evict() or page_id in self.pages_being_written:
+                continue
+            data: bytearray | memoryview = physical_page.get_data()
+            # pages wrapping a memory mapped slot are written in place, copying them would write stale data back
+            snapshot: PhysicalPage = PhysicalPage(bytearray(data)) if isinstance(data, bytearray) else physical_page
+            physical_page.dirty = False
+            pages_to_write.append((page_id, snapshot))
+        for page_id in clean_page_ids:
+            del self.dirty_page_ids[page_id]
+        for page_id, _ in pages_to_write:
+            del self.dirty_page_ids[page_id]
+            self.pages_being_written.add(page_id)
+        return pages_to_write
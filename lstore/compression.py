@@ -0,0 +1,58 @@
+"""
+Codecs used to compress physical pages on disk. Every encoded page starts with a one byte tag naming the codec it
+was written with, so a table can switch codecs without its existing pages being rewritten.
+"""
+from typing import Callable
+import bz2
+import lzma
+import zlib
+
+
+class Codec:
+    def __init__(self, tag: int, name: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]) -> None:
+        self.tag: int = tag
+        self.name: str = name
+        self.compress: Callable[[bytes], bytes] = compress
+        self.decompress: Callable[[bytes], bytes] = decompress
+
+
+def _make_zlib_codec(level: int) -> Codec:
+    return Codec(level, f"zlib-{level}", lambda data: zlib.compress(data, level), zlib.decompress)
+
+
+NO_COMPRESSION: Codec = Codec(0, "none", bytes, bytes)
+CODECS: list[Codec] = [
+    NO_COMPRESSION,
+    *[_make_zlib_codec(level) for level in range(1, 10)],
+    Codec(10, "lzma", lzma.compress, lzma.decompress),
+    Codec(11, "bz2", bz2.compress, bz2.decompress),
+]
+CODECS_BY_TAG: dict[int, Codec] = {codec.tag: codec for codec in CODECS}
+CODECS_BY_NAME: dict[str, Codec] = {codec.name: codec for codec in CODECS}
+CODECS_BY_NAME["zlib"] = CODECS_BY_NAME["zlib-6"]
+DEFAULT_CODEC: str = "zlib"
+
+
+def get_codec(name: str) -> Codec:
+    if name not in CODECS_BY_NAME:
+        raise ValueError(f"Unknown page codec {name}, expected one of {', '.join(CODECS_BY_NAME)}")
+    return CODECS_BY_NAME[name]
+
+
+def encode_page(data: bytes | bytearray | memoryview, codec_name: str = DEFAULT_CODEC) -> bytes:
+    """
+    `data`: the uncompressed contents of a physical page
+    `codec_name`: the codec the page should be compressed with
+    #: pages that the codec does not shrink are stored uncompressed, so an encoded page is never more than one
+    byte larger than the page itself
+    """
+    codec: Codec = get_codec(codec_name)
+    compressed_data: bytes = codec.compress(data)
+    if len(compressed_data) >= len(data):
+        codec, compressed_data = NO_COMPRESSION, bytes(data)
+    return bytes((codec.tag,)) + compressed_data
+
+
+def decode_page(encoded_data: bytes) -> bytearray:
+    codec: Codec = CODECS_BY_TAG[encoded_data[0]]
+    return bytearray(codec.decompress(memoryview(encoded_data)[1:]))
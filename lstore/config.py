@@ -14,3 +14,20 @@ START_BASE_RID = 1
 START_TAIL_RID = -1
 NUM_METADATA_COLS = 2
 MAX_BUFFERPOOL_SIZE = 10000
+SEGMENT_SLOT_SIZE = PHYSICAL_PAGE_SIZE + 64  # room for an encoded page, which is at most one codec tag byte larger than the page
+SEGMENT_GROWTH_SLOTS = 256  # slots preallocated each time a segment file fills up
+WRITE_BACK_CLEAN_FRAMES = 512  # frames the bufferpool write-back thread keeps free or clean
+WRITE_BACK_BATCH_SIZE = 32  # dirty pages the write-back thread cleans each time it takes the bufferpool lock
+BTREE_ORDER = 64  # most keys a node of a B-tree secondary index holds before it splits
+LOAD_BATCH_SIZE = 8192  # rows Database.load_table reads and writes at a time, a full page range
+USE_NUMPY = True  # evaluate scans and sums over whole column pages with numpy when it is installed
+VECTORIZED_SUM_MIN_RECORDS = 512  # records a key range needs before sum scans pages instead of reading each record
+PARALLEL_SCAN_WORKERS = 1  # processes scans and sums fan out to across page ranges, 1 to scan in place, 0 for one per CPU
+PARALLEL_SCAN_MIN_PAGE_RANGES = 4  # page ranges a table needs before its scans and sums fan out
+SECONDARY_WORKER_POLL_INTERVAL = 0.5  # seconds an idle secondary index worker sleeps on its queue between checks of its stop event
+SECONDARY_REQUEST_BATCH_SIZE = 256  # index requests a table buffers for a worker before sending them as one batch
+SECONDARY_REQUEST_BATCH_AGE = 0.05  # seconds the oldest buffered index request may wait before the next request sends the batch
+SHARED_SECONDARY_INDEX = True  # secondary index workers publish their index to shared memory, which searches read directly
+SECONDARY_INDEX_SHARDS = 1  # worker processes the index of each column is hash partitioned across with mp
+SHARED_INDEX_PUBLISH_INTERVAL = 0.01  # seconds a worker waits for the table to take its last snapshot before publishing the next
+SHARED_INDEX_LOG_SIZE = 1024  # least updates a shared snapshot logs before its worker publishes the whole index again
@@ -1,8 +1,14 @@
 from lstore.table import Table
 from lstore.bufferpool import Bufferpool
-from lstore.config import MAX_BUFFERPOOL_SIZE
+from lstore.eviction import EvictionPolicy
+from lstore.config import MAX_BUFFERPOOL_SIZE, WRITE_BACK_CLEAN_FRAMES, LOAD_BATCH_SIZE
 from lstore import DSAStructure
+from lstore.enums import StorageBackend
+from lstore.compression import DEFAULT_CODEC
+from typing import Iterable, Iterator
+from itertools import islice
 import _pickle as pickle
+import csv
 import os
 
 
@@ -15,35 +21,97 @@ class Database:
         self.bufferpool = None
         pass
 
-    def open(self, path):
+    def open(self, path, eviction_policy: EvictionPolicy | None = None, storage_backend: StorageBackend = StorageBackend.SEGMENT):
+        """
+        # Opens the database stored at path
+        :param path: string                         #Directory holding the database files
+        :param eviction_policy: EvictionPolicy      #Bufferpool replacement policy, LRU when not given
+        :param storage_backend: StorageBackend      #Page file layout used for a new database, an existing database keeps its own
+        """
         self.path = path
-        self.bufferpool = Bufferpool(MAX_BUFFERPOOL_SIZE, path)
+        self.bufferpool = Bufferpool(MAX_BUFFERPOOL_SIZE, path, eviction_policy, storage_backend, WRITE_BACK_CLEAN_FRAMES)
         if self.__file_exists(Database.database_file_name):
             self.table_name_to_table = self.__load_data_from_disk(
                 Database.database_file_name
             )
             for name in self.table_name_to_table:
                 self.table_name_to_table[name].prepare_unpickle()
+                # tables are unpickled sharing their own bufferpool, which is the one that has to be flushed on close
+                self.bufferpool = self.table_name_to_table[name].bufferpool
+            self.bufferpool.set_eviction_policy(eviction_policy)
 
     def close(self):
-        self.bufferpool.evict_all_pages()
+        # tables merge their outstanding updates first, the pages the merges write are flushed with the rest
         for name in self.table_name_to_table:
             self.table_name_to_table[name].prepare_to_be_pickled()
+        self.bufferpool.stop_write_back()
+        self.bufferpool.evict_all_pages()
         self.__save_data_to_disk(Database.database_file_name, self.table_name_to_table)
+        self.bufferpool.disk.close()
 
-    def create_table(self, name, num_columns, key_index, mp=False):
+    def create_table(self, name, num_columns, key_index, mp=False, codec=DEFAULT_CODEC):
         """
         # Creates a new table
         :param name: string         #Table name
         :param num_columns: int     #Number of Columns: all columns are integer
         :param key: int             #Index of table key in columns
+        :param codec: string        #Codec pages are compressed with on disk: none, zlib-1 .. zlib-9, lzma or bz2
         """
         if self.bufferpool is None:
             self.bufferpool = Bufferpool(MAX_BUFFERPOOL_SIZE, "")
-        table = Table(name, num_columns, key_index, self.bufferpool, mp=mp)
+        table = Table(name, num_columns, key_index, self.bufferpool, mp=mp, codec=codec)
         self.table_name_to_table[name] = table
         return table
 
+    def load_table(self, name, rows: Iterable[Iterable[int]] | str, num_columns=None, key_index=0, header=False, mp=False, codec=DEFAULT_CODEC):
+        """
+        # Bulk loads rows into a table, creating it when it does not exist yet
+        :param name: string                 #Table name
+        :param rows: iterable or string     #Rows of integer columns, or the path of a CSV file of them
+        :param num_columns: int             #Number of Columns of a new table, the length of the first row when not given
+        :param key_index: int               #Index of table key in columns of a new table
+        :param header: bool                 #Whether the CSV file starts with a header line to skip
+        # Rows are streamed into base pages LOAD_BATCH_SIZE at a time and the indices are built once at the end,
+        # which is where duplicate keys are found
+        # Raises ValueError on a duplicate key or a short row, the batches loaded before it are kept and indexed
+        """
+        if isinstance(rows, str):
+            with open(rows, newline="") as csv_file:
+                reader = csv.reader(csv_file)
+                if header:
+                    next(reader, None)
+                return self.__load_rows(name, ([int(value) for value in row] for row in reader if row), num_columns, key_index, mp, codec)
+        return self.__load_rows(name, iter(rows), num_columns, key_index, mp, codec)
+
+    def __load_rows(self, name, rows: Iterator[Iterable[int]], num_columns, key_index, mp, codec) -> Table:
+        batch: list[list[int]] = [list(row) for row in islice(rows, LOAD_BATCH_SIZE)]
+        if name in self.table_name_to_table:
+            table = self.table_name_to_table[name]
+        else:
+            if num_columns is None:
+                assert batch, "num_columns is needed to create a table from no rows"
+                num_columns = len(batch[0])
+            table = self.create_table(name, num_columns, key_index, mp=mp, codec=codec)
+        # runs of consecutive rids of each batch, the keys only reach the primary index once the whole input is
+        # written, and a batch with a duplicate key is rolled back along with the ones after it
+        batch_rid_runs: list[list[tuple[int, int]]] = []
+        try:
+            while batch:
+                for row in batch:
+                    if len(row) != table.num_columns:
+                        raise ValueError(f"row {row} does not have {table.num_columns} columns")
+                rid_runs: list[tuple[int, int]] = []
+                for rid in table.load_records(batch):
+                    if rid_runs and rid_runs[-1][0] + rid_runs[-1][1] == rid:
+                        rid_runs[-1] = (rid_runs[-1][0], rid_runs[-1][1] + 1)
+                    else:
+                        rid_runs.append((rid, 1))
+                batch_rid_runs.append(rid_runs)
+                batch = [list(row) for row in islice(rows, LOAD_BATCH_SIZE)]
+        finally:
+            table.index_loaded_records(batch_rid_runs)
+        return table
+
     def drop_table(self, name):
         """
         # Deletes the specified table
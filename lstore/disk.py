@@ -1,5 +1,10 @@
+from .config import PHYSICAL_PAGE_SIZE, SEGMENT_SLOT_SIZE, SEGMENT_GROWTH_SLOTS
+from .enums import StorageBackend
+from .compression import DEFAULT_CODEC, get_codec, encode_page, decode_page
 from .phys_page import PhysicalPage
-import zlib
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import mmap
 import os
 
 
@@ -9,6 +14,28 @@ class DiskInterface:
             self.path: str = path[:-1]
         else:
             self.path: str = path
+        self.table_codecs: dict[str, str] = dict()
+        # files written since the last sync, the write-back thread writes pages while the bufferpool syncs
+        self.unsynced_file_names: set[str] = set()
+        self.lock = Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['unsynced_file_names']
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.unsynced_file_names = set()
+        self.lock = Lock()
+
+    def set_codec(self, table_name: str, codec_name: str) -> None:
+        """
+        #: pages of `table_name` written from now on are compressed with `codec_name`
+        """
+        get_codec(codec_name)
+        self.table_codecs[table_name] = codec_name
 
     def page_exists(self, page_id) -> bool:
         file_name: str = self.__make_file_name(page_id)
@@ -21,15 +48,336 @@ class DiskInterface:
                 compressed_data = file.read()
             if len(compressed_data) != 0:
                 break
-        uncompressed_data: bytearray = zlib.decompress(compressed_data)
-        return PhysicalPage(bytearray(uncompressed_data))
+        return PhysicalPage(decode_page(compressed_data))
 
     def write_page(self, page_id: str, page_to_write: PhysicalPage) -> None:
         file_name: str = self.__make_file_name(page_id)
         data: bytearray = page_to_write.get_data()
-        compressed_data: bytearray = zlib.compress(data)
+        compressed_data: bytes = encode_page(data, self.table_codecs.get(_get_table_name(page_id), DEFAULT_CODEC))
         with open(file_name, "wb") as file:
             file.write(compressed_data)
+        with self.lock:
+            self.unsynced_file_names.add(file_name)
+
+    def write_pages(self, pages_to_write: list[tuple[str, PhysicalPage]], num_workers: int | None = None) -> None:
+        """
+        `pages_to_write`: (page id, page) pairs
+        `num_workers`: number of threads compressing pages, one per CPU when not given
+        #: compresses the pages in parallel and writes them in page id order
+        """
+        pages_to_write = sorted(pages_to_write, key=lambda page: page[0])
+        file_names: list[str] = []
+        for (page_id, _), compressed_data in zip(pages_to_write, _encode_pages(pages_to_write, self.table_codecs, num_workers)):
+            file_names.append(self.__make_file_name(page_id))
+            with open(file_names[-1], "wb") as file:
+                file.write(compressed_data)
+        with self.lock:
+            self.unsynced_file_names.update(file_names)
+
+    def delete_page(self, page_id: str) -> None:
+        file_name: str = self.__make_file_name(page_id)
+        with self.lock:
+            self.unsynced_file_names.discard(file_name)
+        if os.path.isfile(file_name):
+            os.remove(file_name)
+
+    def sync(self) -> None:
+        """
+        #: flushes the files written since the last sync to the device, then the directory, so the files created
+        since are found after a crash as well
+        """
+        with self.lock:
+            file_names, self.unsynced_file_names = self.unsynced_file_names, set()
+        if not file_names:
+            return
+        for file_name in sorted(file_names):
+            try:
+                file_descriptor: int = os.open(file_name, os.O_RDONLY)
+            except FileNotFoundError:
+                # deleted since it was written
+                continue
+            try:
+                os.fsync(file_descriptor)
+            finally:
+                os.close(file_descriptor)
+        directory_descriptor: int = os.open(self.path or ".", os.O_RDONLY)
+        try:
+            os.fsync(directory_descriptor)
+        finally:
+            os.close(directory_descriptor)
+
+    def close(self) -> None:
+        # no file is left open
+        pass
 
     def __make_file_name(self, page_id: str) -> str:
         return f"{self.path}/{page_id}"
+
+
+class SegmentDiskInterface:
+    """
+    #: Stores the pages of each table in a single preallocated segment file, `{path}/{table}.seg`,
+    divided into fixed size slots
+    #: An in memory catalog maps page ids to their slot, so existence checks never touch the file system,
+    and pages are read and written with positioned I/O on a file descriptor that stays open
+    #: Slots of deleted pages are reused before the segment grows
+    #: The catalog is pickled along with the bufferpool when the database is closed
+    """
+
+    segment_file_extension: str = ".seg"
+    slot_size: int = SEGMENT_SLOT_SIZE
+
+    def __init__(self, path: str) -> None:
+        if len(path) > 0 and path[-1] == "/":
+            self.path: str = path[:-1]
+        else:
+            self.path: str = path
+        # page id -> (segment name, slot, length of the compressed page)
+        self.catalog: dict[str, tuple[str, int, int]] = dict()
+        self.free_slots: dict[str, list[int]] = dict()
+        self.num_used_slots: dict[str, int] = dict()
+        self.num_allocated_slots: dict[str, int] = dict()
+        self.file_descriptors: dict[str, int] = dict()
+        self.table_codecs: dict[str, str] = dict()
+        self.lock = Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['file_descriptors']
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.file_descriptors = dict()
+        self.lock = Lock()
+
+    def set_codec(self, table_name: str, codec_name: str) -> None:
+        """
+        #: pages of `table_name` written from now on are compressed with `codec_name`
+        """
+        get_codec(codec_name)
+        self.table_codecs[table_name] = codec_name
+
+    def page_exists(self, page_id: str) -> bool:
+        return page_id in self.catalog
+
+    def get_page(self, page_id: str) -> PhysicalPage:
+        segment_name, slot, length = self.catalog[page_id]
+        file_descriptor: int = self._get_file_descriptor(segment_name)
+        compressed_data: bytes = self.__read(file_descriptor, length, slot * self.slot_size)
+        return PhysicalPage(decode_page(compressed_data))
+
+    def write_page(self, page_id: str, page_to_write: PhysicalPage) -> None:
+        segment_name: str = _get_table_name(page_id)
+        compressed_data: bytes = encode_page(page_to_write.get_data(), self.table_codecs.get(segment_name, DEFAULT_CODEC))
+        assert len(compressed_data) <= self.slot_size
+        segment_name, slot = self._catalog_page(page_id, len(compressed_data))
+        file_descriptor: int = self._get_file_descriptor(segment_name)
+        self.__write(file_descriptor, compressed_data, slot * self.slot_size)
+
+    def write_pages(self, pages_to_write: list[tuple[str, PhysicalPage]], num_workers: int | None = None) -> None:
+        """
+        `pages_to_write`: (page id, page) pairs
+        `num_workers`: number of threads compressing pages, one per CPU when not given
+        #: compresses the pages in parallel, allocates slots for new pages in page id order and writes the pages
+        in file order
+        """
+        pages_to_write = sorted(pages_to_write, key=lambda page: page[0])
+        locations: list[tuple[str, int, bytes]] = []
+        for (page_id, _), compressed_data in zip(pages_to_write, _encode_pages(pages_to_write, self.table_codecs, num_workers)):
+            assert len(compressed_data) <= self.slot_size
+            segment_name, slot = self._catalog_page(page_id, len(compressed_data))
+            locations.append((segment_name, slot, compressed_data))
+        for segment_name, slot, compressed_data in sorted(locations, key=lambda location: location[:2]):
+            self.__write(self._get_file_descriptor(segment_name), compressed_data, slot * self.slot_size)
+
+    def delete_page(self, page_id: str) -> None:
+        with self.lock:
+            if page_id not in self.catalog:
+                return
+            segment_name, slot, _ = self.catalog.pop(page_id)
+            self.free_slots.setdefault(segment_name, []).append(slot)
+
+    def sync(self) -> None:
+        for file_descriptor in list(self.file_descriptors.values()):
+            os.fsync(file_descriptor)
+
+    def close(self) -> None:
+        with self.lock:
+            for file_descriptor in self.file_descriptors.values():
+                os.close(file_descriptor)
+            self.file_descriptors.clear()
+
+    def _catalog_page(self, page_id: str, length: int) -> tuple[str, int]:
+        """
+        #: returns the segment and slot of `page_id`, allocating a slot if the page is new
+        """
+        with self.lock:
+            if page_id in self.catalog:
+                segment_name, slot, _ = self.catalog[page_id]
+            else:
+                segment_name = _get_table_name(page_id)
+                slot = self.__allocate_slot(segment_name)
+            self.catalog[page_id] = (segment_name, slot, length)
+            return segment_name, slot
+
+    def __allocate_slot(self, segment_name: str) -> int:
+        free_slots: list[int] = self.free_slots.setdefault(segment_name, [])
+        if free_slots:
+            return free_slots.pop()
+        slot: int = self.num_used_slots.get(segment_name, 0)
+        self.num_used_slots[segment_name] = slot + 1
+        if slot >= self.num_allocated_slots.get(segment_name, 0):
+            # preallocate a run of slots at once instead of growing the file page by page
+            num_allocated_slots: int = slot + SEGMENT_GROWTH_SLOTS
+            os.ftruncate(self._get_file_descriptor(segment_name), num_allocated_slots * self.slot_size)
+            self.num_allocated_slots[segment_name] = num_allocated_slots
+        return slot
+
+    def _get_file_descriptor(self, segment_name: str) -> int:
+        file_descriptor: int | None = self.file_descriptors.get(segment_name)
+        if file_descriptor is None:
+            file_name: str = f"{self.path}/{segment_name}{self.segment_file_extension}"
+            opened_file_descriptor: int = os.open(file_name, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+            file_descriptor = self.file_descriptors.setdefault(segment_name, opened_file_descriptor)
+            if file_descriptor != opened_file_descriptor:
+                os.close(opened_file_descriptor)
+        return file_descriptor
+
+    def __read(self, file_descriptor: int, length: int, offset: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(file_descriptor, length, offset)
+        with self.lock:
+            os.lseek(file_descriptor, offset, os.SEEK_SET)
+            return os.read(file_descriptor, length)
+
+    def __write(self, file_descriptor: int, data: bytes, offset: int) -> None:
+        if hasattr(os, "pwrite"):
+            os.pwrite(file_descriptor, data, offset)
+            return
+        with self.lock:
+            os.lseek(file_descriptor, offset, os.SEEK_SET)
+            os.write(file_descriptor, data)
+
+
+class MmapDiskInterface(SegmentDiskInterface):
+    """
+    #: Stores uncompressed pages in per table segment files, `{path}/{table}.pages`, that are memory mapped
+    in chunks of SEGMENT_GROWTH_SLOTS pages
+    #: Pages handed out by get_page wrap their slice of the mapping directly, so loading a page after an
+    eviction neither decompresses nor copies, and changes made through the page land in the mapping itself
+    #: Dirty mapped pages are written back by the OS, sync flushes them with msync
+    #: Pages are never compressed, codecs set with set_codec are ignored
+    """
+
+    segment_file_extension: str = ".pages"
+    slot_size: int = PHYSICAL_PAGE_SIZE
+    chunk_size: int = SEGMENT_GROWTH_SLOTS * PHYSICAL_PAGE_SIZE
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.mappings: dict[tuple[str, int], mmap.mmap] = dict()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state['mappings']
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.mappings = dict()
+
+    def get_page(self, page_id: str) -> PhysicalPage:
+        segment_name, slot, _ = self.catalog[page_id]
+        return PhysicalPage(self.__get_slot_view(segment_name, slot))
+
+    def write_page(self, page_id: str, page_to_write: PhysicalPage) -> None:
+        segment_name, slot = self._catalog_page(page_id, self.slot_size)
+        data: bytearray | memoryview = page_to_write.get_data()
+        mapping: mmap.mmap = self.__get_mapping(segment_name, slot * self.slot_size // self.chunk_size)
+        if isinstance(data, memoryview) and data.obj is mapping:
+            # the page was loaded from this slot, its changes are already in the mapping
+            return
+        self.__get_slot_view(segment_name, slot)[:] = data
+
+    def write_pages(self, pages_to_write: list[tuple[str, PhysicalPage]], num_workers: int | None = None) -> None:
+        # pages are copied into the mapping uncompressed, there is nothing to do in parallel
+        for page_id, page_to_write in sorted(pages_to_write, key=lambda page: page[0]):
+            self.write_page(page_id, page_to_write)
+
+    def sync(self) -> None:
+        for mapping in list(self.mappings.values()):
+            mapping.flush()
+
+    def close(self) -> None:
+        self.sync()
+        with self.lock:
+            for mapping in self.mappings.values():
+                try:
+                    mapping.close()
+                except BufferError:
+                    # pages still wrapping the mapping keep it alive until they are garbage collected
+                    pass
+            self.mappings.clear()
+        super().close()
+
+    def __get_slot_view(self, segment_name: str, slot: int) -> memoryview:
+        offset: int = slot * self.slot_size
+        mapping: mmap.mmap = self.__get_mapping(segment_name, offset // self.chunk_size)
+        offset_in_chunk: int = offset % self.chunk_size
+        return memoryview(mapping)[offset_in_chunk : offset_in_chunk + self.slot_size]
+
+    def __get_mapping(self, segment_name: str, chunk_index: int) -> mmap.mmap:
+        mapping: mmap.mmap | None = self.mappings.get((segment_name, chunk_index))
+        if mapping is None:
+            with self.lock:
+                mapping = self.mappings.get((segment_name, chunk_index))
+                if mapping is None:
+                    file_descriptor: int = self._get_file_descriptor(segment_name)
+                    mapping = mmap.mmap(file_descriptor, self.chunk_size, offset=chunk_index * self.chunk_size)
+                    self.mappings[(segment_name, chunk_index)] = mapping
+        return mapping
+
+
+def _get_table_name(page_id: str) -> str:
+    """
+    #: base page ids are `{table}_{starting_rid}_{col}_{merge_iteration}` and tail page ids are
+    `{table}_{starting_rid}_{col}` with a negative starting rid, so the table name is recovered from the right
+    """
+    parts: list[str] = page_id.rsplit("_", 2)
+    if len(parts) < 3:
+        return page_id
+    if parts[1].startswith("-"):
+        return parts[0]
+    return parts[0].rsplit("_", 1)[0]
+
+
+def _encode_pages(
+    pages_to_encode: list[tuple[str, PhysicalPage]], table_codecs: dict[str, str], num_workers: int | None
+) -> list[bytes]:
+    """
+    #: compresses pages with their table's codec on a thread pool, one run of consecutive pages per task,
+    zlib, lzma and bz2 release the GIL while they compress
+    """
+    def encode(pages: list[tuple[str, PhysicalPage]]) -> list[bytes]:
+        return [
+            encode_page(page_to_encode.get_data(), table_codecs.get(_get_table_name(page_id), DEFAULT_CODEC))
+            for page_id, page_to_encode in pages
+        ]
+
+    num_workers = min(num_workers or os.cpu_count() or 1, len(pages_to_encode))
+    if num_workers <= 1:
+        return encode(pages_to_encode)
+    num_pages_per_task: int = -(-len(pages_to_encode) // (4 * num_workers))
+    tasks = [pages_to_encode[start : start + num_pages_per_task] for start in range(0, len(pages_to_encode), num_pages_per_task)]
+    with ThreadPoolExecutor(num_workers) as executor:
+        return [encoded_data for encoded_datas in executor.map(encode, tasks) for encoded_data in encoded_datas]
+
+
+def make_disk_interface(path: str, storage_backend: StorageBackend) -> DiskInterface | SegmentDiskInterface:
+    if storage_backend == StorageBackend.SEGMENT:
+        return SegmentDiskInterface(path)
+    if storage_backend == StorageBackend.MMAP:
+        return MmapDiskInterface(path)
+    return DiskInterface(path)
@@ -16,4 +16,12 @@ class Operation(Enum):
     INSERT_RECORD = 2
     SEARCH_RECORD = 3
     SAVE_INDEX = 4
-    LOAD_INDEX = 5
\ No newline at end of file
+    LOAD_INDEX = 5
+    SEARCH_RANGE = 6
+    SEARCH_RANGE_ITEMS = 7
+
+
+class StorageBackend(Enum):
+    FILE_PER_PAGE = 1
+    SEGMENT = 2
+    MMAP = 3
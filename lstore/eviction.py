@@ -0,0 +1,234 @@
+from .phys_page import PhysicalPage
+from collections import OrderedDict
+from abc import ABC, abstractmethod
+
+
+class EvictionPolicy(ABC):
+    """
+    #: Decides which resident page the Bufferpool evicts next
+    #: The Bufferpool reports every page that becomes resident (`page_added`) and every hit on a resident
+    page (`page_accessed`), and asks for a victim with `evict` once it is full
+    #: Policies only keep page ids and reference bits, they never read the clock
+    """
+
+    def __init__(self) -> None:
+        self.capacity: int = 0
+
+    def set_capacity(self, capacity: int) -> None:
+        """
+        `capacity`: maximum number of resident pages of the owning Bufferpool
+        """
+        self.capacity = capacity
+
+    @abstractmethod
+    def page_added(self, page_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def page_accessed(self, page_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def evict(self, physical_pages: dict[str, PhysicalPage]) -> str | None:
+        """
+        `physical_pages`: the resident pages of the Bufferpool, used to skip pinned pages
+        #: forgets and returns the id of the page to evict, or None if every resident page is pinned
+        """
+        pass
+
+    @staticmethod
+    def _pop_first_evictable(queue: OrderedDict, physical_pages: dict[str, PhysicalPage]) -> str | None:
+        for page_id in queue:
+            physical_page = physical_pages.get(page_id)
+            if physical_page is None or physical_page.can_evict():
+                del queue[page_id]
+                return page_id
+        return None
+
+
+class LRUPolicy(EvictionPolicy):
+    """
+    #: Evicts the least recently used unpinned page
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pages: OrderedDict[str, None] = OrderedDict()
+
+    def page_added(self, page_id: str) -> None:
+        self.pages[page_id] = None
+        self.pages.move_to_end(page_id)
+
+    def page_accessed(self, page_id: str) -> None:
+        if page_id in self.pages:
+            self.pages.move_to_end(page_id)
+
+    def evict(self, physical_pages: dict[str, PhysicalPage]) -> str | None:
+        return self._pop_first_evictable(self.pages, physical_pages)
+
+
+class ClockPolicy(EvictionPolicy):
+    """
+    #: Second-chance CLOCK: a hit only sets the page's reference bit, and the clock hand clears
+    reference bits until it finds an unreferenced, unpinned page
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.ring: list[str | None] = []
+        self.ring_index: dict[str, int] = dict()
+        self.referenced: list[bool] = []
+        self.free_slots: list[int] = []
+        self.hand: int = 0
+
+    def page_added(self, page_id: str) -> None:
+        if page_id in self.ring_index:
+            self.referenced[self.ring_index[page_id]] = True
+            return
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.ring[slot] = page_id
+            self.referenced[slot] = False
+        else:
+            slot = len(self.ring)
+            self.ring.append(page_id)
+            self.referenced.append(False)
+        self.ring_index[page_id] = slot
+
+    def page_accessed(self, page_id: str) -> None:
+        slot = self.ring_index.get(page_id)
+        if slot is not None:
+            self.referenced[slot] = True
+
+    def evict(self, physical_pages: dict[str, PhysicalPage]) -> str | None:
+        if len(self.ring) == 0:
+            return None
+        # two full sweeps clear every reference bit, after that only pinned pages remain
+        for _ in range(2 * len(self.ring)):
+            slot = self.hand
+            self.hand = (self.hand + 1) % len(self.ring)
+            page_id = self.ring[slot]
+            if page_id is None:
+                continue
+            physical_page = physical_pages.get(page_id)
+            if physical_page is not None and not physical_page.can_evict():
+                continue
+            if self.referenced[slot]:
+                self.referenced[slot] = False
+                continue
+            self.ring[slot] = None
+            self.free_slots.append(slot)
+            del self.ring_index[page_id]
+            return page_id
+        return None
+
+
+class TwoQueuePolicy(EvictionPolicy):
+    """
+    #: 2Q: pages seen once live in a FIFO (`a1_in`) and are evicted first, their ids are remembered in a
+    ghost FIFO (`a1_out`), and pages referenced again while remembered are promoted to an LRU (`am`)
+    #: keeps one-off scans from flushing the hot set out of the Bufferpool
+    """
+
+    def __init__(self, in_ratio: float = 0.25, out_ratio: float = 0.5) -> None:
+        """
+        `in_ratio`: fraction of the capacity reserved for pages seen once
+        `out_ratio`: number of remembered evicted ids, as a fraction of the capacity
+        """
+        super().__init__()
+        self.in_ratio: float = in_ratio
+        self.out_ratio: float = out_ratio
+        self.a1_in: OrderedDict[str, None] = OrderedDict()
+        self.a1_out: OrderedDict[str, None] = OrderedDict()
+        self.am: OrderedDict[str, None] = OrderedDict()
+
+    def page_added(self, page_id: str) -> None:
+        if page_id in self.a1_out:
+            del self.a1_out[page_id]
+            self.am[page_id] = None
+        elif page_id not in self.am and page_id not in self.a1_in:
+            self.a1_in[page_id] = None
+
+    def page_accessed(self, page_id: str) -> None:
+        if page_id in self.am:
+            self.am.move_to_end(page_id)
+
+    def evict(self, physical_pages: dict[str, PhysicalPage]) -> str | None:
+        max_in_pages = max(1, int(self.capacity * self.in_ratio))
+        if len(self.a1_in) > max_in_pages or len(self.am) == 0:
+            page_id = self._pop_first_evictable(self.a1_in, physical_pages)
+            if page_id is not None:
+                self.__remember(page_id)
+                return page_id
+            return self._pop_first_evictable(self.am, physical_pages)
+        page_id = self._pop_first_evictable(self.am, physical_pages)
+        if page_id is not None:
+            return page_id
+        page_id = self._pop_first_evictable(self.a1_in, physical_pages)
+        if page_id is not None:
+            self.__remember(page_id)
+        return page_id
+
+    def __remember(self, page_id: str) -> None:
+        self.a1_out[page_id] = None
+        max_out_pages = max(1, int(self.capacity * self.out_ratio))
+        while len(self.a1_out) > max_out_pages:
+            self.a1_out.popitem(last=False)
+
+
+class ARCPolicy(EvictionPolicy):
+    """
+    #: Adaptive Replacement Cache: resident pages seen once (`t1`) and more than once (`t2`) are kept in
+    separate LRUs, and ghost lists of their evicted ids (`b1`, `b2`) steer the target size `p` of `t1`
+    towards whichever list would have produced the hit
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.p: float = 0
+        self.t1: OrderedDict[str, None] = OrderedDict()
+        self.t2: OrderedDict[str, None] = OrderedDict()
+        self.b1: OrderedDict[str, None] = OrderedDict()
+        self.b2: OrderedDict[str, None] = OrderedDict()
+
+    def page_added(self, page_id: str) -> None:
+        if page_id in self.t1 or page_id in self.t2:
+            self.page_accessed(page_id)
+            return
+        if page_id in self.b1:
+            self.p = min(self.capacity, self.p + max(len(self.b2) / len(self.b1), 1))
+            del self.b1[page_id]
+            self.t2[page_id] = None
+        elif page_id in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) / len(self.b2), 1))
+            del self.b2[page_id]
+            self.t2[page_id] = None
+        else:
+            self.t1[page_id] = None
+        self.__trim_ghosts()
+
+    def page_accessed(self, page_id: str) -> None:
+        if page_id in self.t1:
+            del self.t1[page_id]
+            self.t2[page_id] = None
+        elif page_id in self.t2:
+            self.t2.move_to_end(page_id)
+
+    def evict(self, physical_pages: dict[str, PhysicalPage]) -> str | None:
+        if len(self.t1) > 0 and (len(self.t1) > self.p or len(self.t2) == 0):
+            lists = ((self.t1, self.b1), (self.t2, self.b2))
+        else:
+            lists = ((self.t2, self.b2), (self.t1, self.b1))
+        for resident, ghost in lists:
+            page_id = self._pop_first_evictable(resident, physical_pages)
+            if page_id is not None:
+                ghost[page_id] = None
+                self.__trim_ghosts()
+                return page_id
+        return None
+
+    def __trim_ghosts(self) -> None:
+        while self.b1 and len(self.t1) + len(self.b1) > self.capacity:
+            self.b1.popitem(last=False)
+        while self.b2 and len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) > 2 * self.capacity:
+            self.b2.popitem(last=False)
@@ -2,17 +2,57 @@
 A data structure holding indices for various columns of a table. Key column should be indexd by default, other columns can be indexed through this object. Indices are usually B-Trees, but other data structures can be used as well.
 """
 import lstore.table as Table
-from typing import Dict
+from typing import Dict, Iterator
+from bisect import bisect_left, bisect_right
+from threading import Lock
 
 class Index:
     def __init__(self, table: Table):
         # One index for each table. All our empty initially.
         self.indices: list = [None] * table.num_columns
         self.key_to_rid: Dict[int: int] = dict()
+        # primary keys in ascending order for range lookups, keys that arrive out of order wait in
+        # unsorted_keys and are sorted in by the next range lookup
+        self.sorted_keys: list[int] = []
+        self.unsorted_keys: list[int] = []
+        # deleted keys stay in the sorted lists, which range lookups skip, until there are as many of them as
+        # live keys and the lists are compacted
+        self.deleted_keys: set[int] = set()
+        self.sorted_keys_lock = Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['sorted_keys_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.sorted_keys_lock = Lock()
 
     def add_key_rid(self, key: int, rid: int) -> None:
         assert key not in self.key_to_rid
         self.key_to_rid[key] = rid
+        with self.sorted_keys_lock:
+            self.__add_sorted_key(key)
+
+    def add_keys_rids(self, keys: list[int], rids: list[int]) -> None:
+        assert len(keys) == len(rids)
+        assert self.key_to_rid.keys().isdisjoint(keys)
+        self.key_to_rid.update(zip(keys, rids))
+        with self.sorted_keys_lock:
+            for key in keys:
+                self.__add_sorted_key(key)
+
+    def __add_sorted_key(self, key: int) -> None:
+        if key in self.deleted_keys:
+            # the key was never taken out of the sorted lists
+            self.deleted_keys.remove(key)
+            return
+        # keys inserted in increasing order, the common case, are appended in place
+        if not self.unsorted_keys and (not self.sorted_keys or key > self.sorted_keys[-1]):
+            self.sorted_keys.append(key)
+        else:
+            self.unsorted_keys.append(key)
 
     def get_rid(self, key: int) -> int:
         assert key in self.key_to_rid
@@ -24,6 +64,12 @@ class Index:
     def delete_key(self, key: int) -> None:
         assert key in self.key_to_rid
         del self.key_to_rid[key]
+        with self.sorted_keys_lock:
+            self.deleted_keys.add(key)
+            if len(self.deleted_keys) > len(self.key_to_rid):
+                self.sorted_keys = [key for key in self.sorted_keys if key not in self.deleted_keys]
+                self.unsorted_keys = [key for key in self.unsorted_keys if key not in self.deleted_keys]
+                self.deleted_keys.clear()
 
     def locate(self, column, value):
         """
@@ -31,11 +77,23 @@ class Index:
         """
         pass
 
-    def locate_range(self, begin, end, column):
+    def locate_range(self, begin: int, end: int) -> Iterator[int]:
         """
-        # Returns the RIDs of all records with values in column "column" between "begin" and "end"
+        # Returns the RIDs of all records with primary keys between "begin" and "end" inclusive, in key order
         """
-        pass
+        with self.sorted_keys_lock:
+            if self.unsorted_keys:
+                # sorting the concatenation merges the two sorted runs in linear time
+                self.unsorted_keys.sort()
+                self.sorted_keys.extend(self.unsorted_keys)
+                self.sorted_keys.sort()
+                self.unsorted_keys.clear()
+            keys: list[int] = self.sorted_keys[bisect_left(self.sorted_keys, begin) : bisect_right(self.sorted_keys, end)]
+        for key in keys:
+            rid = self.key_to_rid.get(key)
+            # a key deleted after the slice was taken is skipped
+            if rid != None:
+                yield rid
 
     def create_index(self, column_number):
         """
@@ -0,0 +1,69 @@
+from threading import Condition, Lock
+
+
+class ReadWriteLatch:
+    """
+    #: Shared/exclusive latch: any number of readers hold it together, a writer holds it alone
+    #: a waiting writer stops new readers from entering, so a steady stream of readers cannot starve it
+    #: use `with latch.shared:` to read and `with latch.exclusive:` to write, the latch is not reentrant
+    """
+
+    def __init__(self) -> None:
+        self.condition = Condition(Lock())
+        self.num_readers: int = 0
+        self.num_waiting_readers: int = 0
+        self.num_waiting_writers: int = 0
+        self.writer_active: bool = False
+        self.shared = _SharedLatch(self)
+        self.exclusive = _ExclusiveLatch(self)
+
+    def acquire_shared(self) -> None:
+        with self.condition:
+            while self.writer_active or self.num_waiting_writers > 0:
+                self.num_waiting_readers += 1
+                self.condition.wait()
+                self.num_waiting_readers -= 1
+            self.num_readers += 1
+
+    def release_shared(self) -> None:
+        with self.condition:
+            self.num_readers -= 1
+            if self.num_readers == 0 and self.num_waiting_writers > 0:
+                self.condition.notify_all()
+
+    def acquire_exclusive(self) -> None:
+        with self.condition:
+            self.num_waiting_writers += 1
+            while self.writer_active or self.num_readers > 0:
+                self.condition.wait()
+            self.num_waiting_writers -= 1
+            self.writer_active = True
+
+    def release_exclusive(self) -> None:
+        with self.condition:
+            self.writer_active = False
+            # an uncontended latch skips the notification, which costs more than the rest of the release
+            if self.num_waiting_readers > 0 or self.num_waiting_writers > 0:
+                self.condition.notify_all()
+
+
+class _SharedLatch:
+    def __init__(self, latch: ReadWriteLatch) -> None:
+        self.latch = latch
+
+    def __enter__(self) -> None:
+        self.latch.acquire_shared()
+
+    def __exit__(self, *exc_info) -> None:
+        self.latch.release_shared()
+
+
+class _ExclusiveLatch:
+    def __init__(self, latch: ReadWriteLatch) -> None:
+        self.latch = latch
+
+    def __enter__(self) -> None:
+        self.latch.acquire_exclusive()
+
+    def __exit__(self, *exc_info) -> None:
+        self.latch.release_exclusive()
@@ -3,10 +3,19 @@ import pickle
 from typing import Dict, List, Set, Tuple
 from enum import Enum
 import multiprocessing as mp
+import queue
 import time
 from multiprocessing.synchronize import Event
 from .seeding import SeedSet
+from .btree import BPlusTree
 from .enums import DSAStructure, Operation
+from .config import SECONDARY_WORKER_POLL_INTERVAL, SHARED_INDEX_PUBLISH_INTERVAL
+from .shared_index import SharedIndex
+
+# put on the request queue of a worker in place of a batch to stop it once the batches ahead of it are done
+STOP_WORKER = None
+# the operations that change the index, which the table counts to know whether a shared snapshot has its updates
+INDEX_UPDATES = (Operation.INSERT_RECORD, Operation.DELETE_RECORD, Operation.LOAD_INDEX)
 
 class AsyncSecondaryIndex(mp.Process):
     """
@@ -22,6 +31,7 @@ class AsyncSecondaryIndex(mp.Process):
         stop_event: Event,
         structure: DSAStructure = DSAStructure.DICTIONARY_SET,
         seed: bool = False,
+        shared_index_name: str | None = None,
     ) -> None:
         """
         `name`: name of the parent table
@@ -30,6 +40,7 @@ class AsyncSecondaryIndex(mp.Process):
         `request_queue`: queue for receiving requests from the server
         `response_queue`: queue for sending responses to the server
         `stop_event`: event for stopping the worker process
+        `shared_index_name`: name of a SharedIndex the worker publishes the index to after applying updates
         #: the search object (dict or btree) and seeding objects are either loaded from secondary memory
         or initialized using the load_query method.
         """
@@ -38,6 +49,9 @@ class AsyncSecondaryIndex(mp.Process):
         self.task_queue = request_queue
         self.result_queue = response_queue
         self.stop_event: Event = stop_event
+        self.shared_index_name: str | None = shared_index_name
+        # updates applied since the worker started, published with each snapshot of the index
+        self.num_updates: int = 0
         # setting the descriptors of the secondary index structure and name
         self.index_name = f"{name}_attr_{attribute}"
         self.structure: DSAStructure = structure
@@ -51,22 +65,67 @@ class AsyncSecondaryIndex(mp.Process):
 
     def run(self):
         """
-        #: Continously runs the worker process, waiting for requests from the server
-        #: Terminates when the Table object uses this object's respective process' stop_event to terminate
-        #: Reads from the task_queue, which contains arrays of operations, and then performs them
+        #: Runs the worker process, sleeping on the task_queue until requests arrive from the server
+        #: Terminates when it takes STOP_WORKER from the task_queue, or when the Table object uses this object's
+        respective process' stop_event to terminate, which is checked at least every SECONDARY_WORKER_POLL_INTERVAL
+        #: Reads from the task_queue, which contains arrays of operations, every batch queued by the time it
+        wakes up at once, and then performs them
         #: Writes to the result_queue, which contains the results of the operations
+        #: Logs the updates of each batch to its SharedIndex, if it has one, once it has applied them, and
+        publishes the whole index when the log cannot take them, retrying every SHARED_INDEX_PUBLISH_INTERVAL
+        while the table has not taken the previous snapshot
         """
+        shared_index: SharedIndex | None = SharedIndex(self.shared_index_name) if self.shared_index_name != None else None
+        try:
+            self.serve_requests(shared_index)
+        finally:
+            if shared_index != None:
+                shared_index.close()
+
+    def serve_requests(self, shared_index: SharedIndex | None) -> None:
+        # whether the index has changed in a way the snapshot published last does not have logged
+        unpublished: bool = shared_index != None
         while not self.stop_event.is_set():
-            if not self.task_queue.empty():
+            if unpublished:
+                unpublished = not self.publish_index(shared_index)
+            try:
                 # note that requests are batched on the level of the table
-                while not self.task_queue.empty() and not self.stop_event.is_set():
-                    # batches contain the operation to be performed, the key, the rid, and the request ID
-                    batch: List[Tuple[Operation, int, int, int]] = self.task_queue.get()
-                    for request in batch:
-                        if self.stop_event.is_set():
-                            break
-                        response = self.perform_operation(request)
-                        self.result_queue.put(response)
+                batches: List[List[Tuple[Operation, int, int, int]] | None] = [
+                    self.task_queue.get(timeout=SHARED_INDEX_PUBLISH_INTERVAL if unpublished else SECONDARY_WORKER_POLL_INTERVAL)
+                ]
+            except queue.Empty:
+                continue
+            while batches[-1] is not STOP_WORKER:
+                try:
+                    batches.append(self.task_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for batch in batches:
+                if batch is STOP_WORKER:
+                    return
+                updates: List[Tuple[Operation, int, int, int]] = []
+                # batches contain the operation to be performed, the key, the rid, and the request ID
+                for request in batch:
+                    if self.stop_event.is_set():
+                        return
+                    response = self.perform_operation(request)
+                    if request[0] in INDEX_UPDATES:
+                        self.num_updates += 1
+                        updates.append(request)
+                    self.result_queue.put(response)
+                if updates and shared_index != None and not unpublished:
+                    unpublished = not shared_index.append(updates)
+
+    def publish_index(self, shared_index: SharedIndex) -> bool:
+        """
+        #: writes the keys of the index in sorted order, with their rids, to a new snapshot of `shared_index`
+        #: returns False when the table has not taken the previous snapshot yet
+        """
+        if not shared_index.can_publish():
+            return False
+        items = self.dictionary.items() if isinstance(self.dictionary, BPlusTree) else sorted(self.dictionary.items())
+        shared_index.publish(items, self.num_updates)
+        return True
 
     def perform_operation(self, request: Tuple[Operation, int, int, int]) -> Tuple[int, bool | List[int] | Exception]:
         """
@@ -88,6 +147,11 @@ class AsyncSecondaryIndex(mp.Process):
                 return (request_id, True)
             elif operation == Operation.SEARCH_RECORD:
                 return (request_id, self.search_record(key))
+            elif operation == Operation.SEARCH_RANGE:
+                # range requests carry the end of the range in place of the rid
+                return (request_id, self.search_range(key, rid))
+            elif operation == Operation.SEARCH_RANGE_ITEMS:
+                return (request_id, self.search_range_items(key, rid))
             elif operation == Operation.SAVE_INDEX:
                 self.save_index()
                 return (request_id, True)
@@ -98,12 +162,14 @@ class AsyncSecondaryIndex(mp.Process):
             return (request_id, error)
 
     def initialize_structure(self):
+        # the B-tree structures keep the same values as their dictionary counterparts in a BPlusTree, which
+        # shares the dictionary interface, so both are served by the dict_array, dict_set and dict_dict methods below
         if self.structure == DSAStructure.B_TREE_ARRAY:
-            pass
+            self.dictionary: BPlusTree = BPlusTree()
         elif self.structure == DSAStructure.B_TREE_SET:
-            pass
+            self.dictionary: BPlusTree = BPlusTree()
         elif self.structure == DSAStructure.B_TREE_DICT:
-            pass
+            self.dictionary: BPlusTree = BPlusTree()
         elif self.structure == DSAStructure.DICTIONARY_ARRAY:
             self.dictionary: Dict[int, List[int]] = {}
         elif self.structure == DSAStructure.DICTIONARY_SET:
@@ -122,9 +188,8 @@ class AsyncSecondaryIndex(mp.Process):
                 self.dictionary = pickle.load(f)
                 self.seeds = pickle.load(f)
         elif replace or (not self.dictionary and not self.seeds):
-            self.dictionary, self.seeds = {}, False if self.seeds == False else SeedSet(
-                []
-            )
+            self.initialize_structure()
+            self.seeds = False if self.seeds == False else SeedSet([])
         else:
             raise Exception(
                 "Indices already exist but a file for them doesn't, and parameter did not specify overwriting existing member varaibles"
@@ -148,20 +213,43 @@ class AsyncSecondaryIndex(mp.Process):
         `key`: the key to be added to the index
         `rid`: the rid of the record that is being added to the index
         """
-        if self.structure == DSAStructure.DICTIONARY_ARRAY:
+        if self.structure in (DSAStructure.DICTIONARY_ARRAY, DSAStructure.B_TREE_ARRAY):
             self.add_record_dict_array(key, rid)
-        elif self.structure == DSAStructure.DICTIONARY_SET:
+        elif self.structure in (DSAStructure.DICTIONARY_SET, DSAStructure.B_TREE_SET):
             self.add_record_dict_set(key, rid)
+        elif self.structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            self.add_record_dict_dict(key, rid)
 
     def search_record(self, key) -> List[int] | Set[int] | Dict[int, int]:
         """
         `key`: the key to be searched in the index
         #: returns the rid of the record that is being searched for in the index
         """
-        if self.structure == DSAStructure.DICTIONARY_ARRAY:
+        if self.structure in (DSAStructure.DICTIONARY_ARRAY, DSAStructure.B_TREE_ARRAY):
             return self.search_record_dict_array(key)
-        elif self.structure == DSAStructure.DICTIONARY_SET:
+        elif self.structure in (DSAStructure.DICTIONARY_SET, DSAStructure.B_TREE_SET):
             return self.search_record_dict_set(key)
+        elif self.structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            return self.search_record_dict_dict(key)
+
+    def search_range(self, begin: int, end: int) -> List[int]:
+        """
+        `begin`, `end`: inclusive bounds of the keys to be searched in the index
+        #: returns the rids of the records whose key lies in the range, in key order
+        #: the B-tree structures walk their leaves, the dictionary structures have to scan every key
+        """
+        return [rid for _, rids in self.search_range_items(begin, end) for rid in rids]
+
+    def search_range_items(self, begin: int, end: int) -> List[Tuple[int, List[int]]]:
+        """
+        #: same as search_range, with the rids of each key listed along with it, so the table can merge the
+        results of the shards of a column back into key order
+        """
+        if isinstance(self.dictionary, BPlusTree):
+            matches = self.dictionary.items(begin, end)
+        else:
+            matches = sorted((key, rids) for key, rids in self.dictionary.items() if begin <= key <= end)
+        return [(key, list(rids)) for key, rids in matches]
 
     def delete_record(self, key: int, rid: int):
         """
@@ -169,10 +257,12 @@ class AsyncSecondaryIndex(mp.Process):
         `rid`: the rid of the record that is being deleted from the index
         #: note, potential edge case where the same key with the same rid is deleted twice
         """
-        if self.structure == DSAStructure.DICTIONARY_ARRAY:
+        if self.structure in (DSAStructure.DICTIONARY_ARRAY, DSAStructure.B_TREE_ARRAY):
             self.delete_record_dict_array(key, rid)
-        elif self.structure == DSAStructure.DICTIONARY_SET:
+        elif self.structure in (DSAStructure.DICTIONARY_SET, DSAStructure.B_TREE_SET):
             self.delete_record_dict_set(key, rid)
+        elif self.structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            self.delete_record_dict_dict(key, rid)
 
     """ DSAStructure.DICTIONARY_ARRAY
     Basic structure of having a dictionary for each secondary index, with the key being the attribute value
@@ -244,4 +334,42 @@ class AsyncSecondaryIndex(mp.Process):
             if rid in vals:
                 vals.remove(rid)
             if self.seeds:
-                self.seeds.remove(rid)
\ No newline at end of file
+                self.seeds.remove(rid)
+
+    """ DSAStructure.DICTIONARY_DICT
+    Basic structure of having a dictionary for each secondary index, with the key being the attribute value
+    and the element being a dictionary of the RIDs associated with it, each mapped to the number of times it
+    was added, which keeps the RIDs in the order they were first added
+    """
+
+    def add_record_dict_dict(self, key: int, rid: int):
+        """
+        `key`: the key to be added to the index
+        `rid`: the rid of the record that is being added to the index
+        #: a rid added twice has to be deleted twice
+        """
+        vals: Dict[int, int] = self.dictionary.setdefault(key, {})
+        vals[rid] = vals.get(rid, 0) + 1
+        if self.seeds:
+            self.seeds.add(rid)
+
+    def search_record_dict_dict(self, key) -> Dict[int, int]:
+        """
+        `key`: the key to be searched in the index
+        #: returns the rids of the records with `key`, iterating the dictionary yields each of them once
+        """
+        return self.dictionary.get(key, {})
+
+    def delete_record_dict_dict(self, key: int, rid: int):
+        """
+        `key`: the key to be deleted from the index
+        `rid`: the rid of the record that is being deleted from the index
+        """
+        if key in self.dictionary:
+            vals: Dict[int, int] = self.dictionary[key]
+            if rid in vals:
+                vals[rid] -= 1
+                if vals[rid] == 0:
+                    del vals[rid]
+            if self.seeds:
+                self.seeds.remove(rid)
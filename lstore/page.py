@@ -6,16 +6,14 @@ from .config import (
     BASE_RID,
 )
 from copy import copy, deepcopy
-from threading import Lock
 from .rid import RID_Generator
 from abc import ABC
 from .bufferpool import Bufferpool
-from .phys_page import PhysicalPage
+from .latch import ReadWriteLatch
+from .phys_page import PhysicalPage, numpy
 
 class LogicalPage(ABC):
 
-    logical_page_lock = Lock()
-
     def __init__(self, table_name: str, num_cols: int, bufferpool: Bufferpool) -> None:
         self.starting_rid = self.rids[-1]
         self.num_cols = num_cols
@@ -23,34 +21,137 @@ class LogicalPage(ABC):
         self.page_ids = [self.get_page_id_of_col(col) for col in range(num_cols)]
         self.available_chunks = [index for index in range(PhysicalPage.max_number_of_records - 1, -1, -1)]
         self.bufferpool = bufferpool
-
-    def insert_record(self, columns: list):
-        with LogicalPage.logical_page_lock:
+        # readers of the page share the latch, inserts, indirection updates and merges take it exclusively
+        self.latch = ReadWriteLatch()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['latch']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.latch = ReadWriteLatch()
+
+    def insert_record(self, columns: list, indirection_to_self: bool = False):
+        """
+        `indirection_to_self`: whether the indirection column of the record points at its own rid, as it does
+        for base records until they are updated
+        #: writes every column of the record under a single acquisition of the latch and of the bufferpool lock
+        """
+        with self.latch.exclusive:
             if self.is_full():
                 return INVALID_RID, INVALID_SLOT_NUM
             slot_num = self.available_chunks.pop()
-            for ind in range(self.num_cols):
-                if columns[ind] != None:
-                    self.bufferpool.insert_page(self.page_ids[ind], slot_num, columns[ind])
             new_rid = self.rids.pop()
+            if indirection_to_self:
+                columns = columns[:INDIRECTION_COLUMN] + [new_rid]
+            self.bufferpool.insert_row(self.page_ids, slot_num, columns)
+            self._widen_zone_maps([columns])
             return new_rid, slot_num
 
+    def insert_records(self, records: list[list]) -> tuple[list[int], int]:
+        """
+        `records`: rows of column values, None values are stored as 0
+        #: fills as many free slots as the page has with `records`, writing each column of the rows with a
+        single bufferpool call
+        #: returns the rids of the inserted rows and the slot of the first one
+        """
+        with self.latch.exclusive:
+            num_records: int = min(len(records), len(self.available_chunks))
+            if num_records == 0:
+                return [], INVALID_SLOT_NUM
+            # free slots are handed out in increasing order, so the rows land in consecutive slots
+            start_slot_num: int = self.available_chunks[-1]
+            assert self.available_chunks[-num_records] == start_slot_num + num_records - 1
+            del self.available_chunks[-num_records:]
+            for ind in range(self.num_cols):
+                column_values: list[int] = [record[ind] if record[ind] != None else 0 for record in records[:num_records]]
+                self.bufferpool.insert_values(self.page_ids[ind], start_slot_num, column_values)
+            self._widen_zone_maps(records[:num_records])
+            new_rids: list[int] = self.rids[-num_records:][::-1]
+            del self.rids[-num_records:]
+            return new_rids, start_slot_num
+
     def get_column_of_record(self, column_index: int, slot_num: int) -> int:
-        with LogicalPage.logical_page_lock:
+        with self.latch.shared:
             assert self.__is_valid_column_index(column_index)
             page_id = self.page_ids[column_index]
             phys_page = self.bufferpool.get_page(page_id)
             return phys_page.get_column_value(slot_num)
 
+    def get_column_values(self, column_index: int, start_slot_num: int, stop_slot_num: int) -> list[int]:
+        """
+        #: returns the values of column `column_index` in slots [`start_slot_num`, `stop_slot_num`)
+        """
+        with self.latch.shared:
+            assert self.__is_valid_column_index(column_index)
+            phys_page = self.bufferpool.get_page(self.page_ids[column_index])
+            return phys_page.get_column_values(start_slot_num, stop_slot_num)
+
+    def get_columns_values(self, column_indices: list[int], start_slot_num: int, stop_slot_num: int) -> list[list[int]]:
+        """
+        #: returns the values of each column of `column_indices` in slots [`start_slot_num`, `stop_slot_num`),
+        all read under a single acquisition of the page lock
+        """
+        if start_slot_num == stop_slot_num:
+            # the pages of a column no record was written to yet may not exist
+            return [[] for _ in column_indices]
+        with self.latch.shared:
+            assert all(self.__is_valid_column_index(column_index) for column_index in column_indices)
+            return [
+                self.bufferpool.get_page(self.page_ids[column_index]).get_column_values(start_slot_num, stop_slot_num)
+                for column_index in column_indices
+            ]
+
+    def get_columns_arrays(self, column_indices: list[int], start_slot_num: int, stop_slot_num: int) -> list:
+        """
+        #: same as get_columns_values, with each column returned as an int64 numpy array
+        """
+        if start_slot_num == stop_slot_num:
+            return [numpy.zeros(0, dtype=numpy.int64) for _ in column_indices]
+        with self.latch.shared:
+            assert all(self.__is_valid_column_index(column_index) for column_index in column_indices)
+            return [
+                self.bufferpool.get_page(self.page_ids[column_index]).get_column_array(start_slot_num, stop_slot_num)
+                for column_index in column_indices
+            ]
+
+    def get_num_records(self) -> int:
+        return PhysicalPage.max_number_of_records - len(self.available_chunks)
+
+    def get_record(self, slot_num: int, projection_mask: list[int]) -> list[int]:
+        """
+        `projection_mask`: array of 1 or 0 values, one per column starting at column 0
+        #: returns the values of the projected columns of the record in `slot_num`, read under a single
+        acquisition of the page lock
+        """
+        with self.latch.shared:
+            assert len(projection_mask) <= self.num_cols
+            return [
+                self.bufferpool.get_page(self.page_ids[column_index]).get_column_value(slot_num)
+                for column_index, projected in enumerate(projection_mask)
+                if projected
+            ]
+
     def update_indir_of_record(self, new_value: int, slot_num: int) -> bool:
-        with LogicalPage.logical_page_lock:
+        with self.latch.exclusive:
             page_id = self.page_ids[INDIRECTION_COLUMN]
-            phys_page = self.bufferpool.get_page(page_id)
-            return phys_page.insert_value(new_value, slot_num)
+            return self.bufferpool.insert_page(page_id, slot_num, new_value)
+
+    def update_indir_of_records(self, new_values: list[int], start_slot_num: int) -> bool:
+        with self.latch.exclusive:
+            return self.bufferpool.insert_values(self.page_ids[INDIRECTION_COLUMN], start_slot_num, new_values)
 
     def is_full(self) -> bool:
         return len(self.available_chunks) == 0
 
+    def _widen_zone_maps(self, records: list[list]) -> None:
+        """
+        #: called with the rows an insert wrote, only base pages keep zone maps
+        """
+        pass
+
     def __is_valid_column_index(self, column_index: int) -> bool:
         return (0 <= column_index < self.num_cols) or (column_index in (INDIRECTION_COLUMN, BASE_RID, SCHEMA_ENCODING_COLUMN))
 
@@ -64,6 +165,51 @@ class BasePage(LogicalPage):
         self.merge_iteration = 0
         self.tps = 0
         super().__init__(table_name, num_cols, bufferpool)
+        # [min, max] of the values of each data column on the page, None while the page is empty. Inserts widen
+        # them and merges refresh them, so the latest versions of records updated since the last merge can lie
+        # outside of them
+        self.zone_maps: list[list[int] | None] = [None] * (num_cols - 2)
+
+    def _widen_zone_maps(self, records: list[list]) -> None:
+        if len(records) == 1:
+            # single row inserts compare each value with the bounds instead of building a list per column
+            record: list = records[0]
+            zone_maps = self.zone_maps
+            for column_index in range(len(zone_maps)):
+                value = record[column_index]
+                if value == None:
+                    value = 0
+                zone_map = zone_maps[column_index]
+                if zone_map == None:
+                    zone_maps[column_index] = [value, value]
+                elif value < zone_map[0]:
+                    zone_map[0] = value
+                elif value > zone_map[1]:
+                    zone_map[1] = value
+            return
+        for column_index, zone_map in enumerate(self.zone_maps):
+            # columns left out of an insert keep the zero the slot starts with
+            column_values: list[int] = [record[column_index] if record[column_index] != None else 0 for record in records]
+            if not column_values:
+                continue
+            low, high = min(column_values), max(column_values)
+            if zone_map != None:
+                low, high = min(low, zone_map[0]), max(high, zone_map[1])
+            self.zone_maps[column_index] = [low, high]
+
+    def refresh_zone_maps(self) -> None:
+        """
+        #: recomputes the zone maps from the data columns of the page
+        """
+        column_values = self.get_columns_values(list(range(len(self.zone_maps))), 0, self.get_num_records())
+        self.zone_maps = [[min(values), max(values)] if values else None for values in column_values]
+
+    def zone_map_excludes(self, column_index: int, begin: int, end: int) -> bool:
+        """
+        #: returns whether no base record of the page has a value between `begin` and `end` in the column
+        """
+        zone_map = self.zone_maps[column_index]
+        return zone_map == None or zone_map[1] < begin or zone_map[0] > end
 
     def _copy_table_data_cols(self):
         self.merge_iteration += 1
@@ -79,7 +225,7 @@ class BasePage(LogicalPage):
     """ Must only be called by merge """
 
     def update_record(self, columns: list, slot_num: int) -> None:
-        with LogicalPage.logical_page_lock:
+        with self.latch.exclusive:
             for ind in range(self.num_cols - 2):
                 success = self.bufferpool.insert_page(self.page_ids[ind], slot_num, columns[ind])
                 if not success:
@@ -88,10 +234,12 @@ class BasePage(LogicalPage):
             return True
 
 def get_copy_of_base_page(base_page: BasePage) -> BasePage:
-    with LogicalPage.logical_page_lock:
+    with base_page.latch.shared:
+        # copying goes through __getstate__, so the copy gets a latch of its own
         copy_base_page = copy(base_page)
         copy_base_page.available_chunks = deepcopy(base_page.available_chunks)
         copy_base_page.page_ids = deepcopy(base_page.page_ids)
+        copy_base_page.zone_maps = deepcopy(base_page.zone_maps)
         copy_base_page._copy_table_data_cols()
         return copy_base_page
 
@@ -4,6 +4,9 @@ from typing import Tuple
 
 
 class PageDirectory:
+    # number of changes made to the directory, which tells whether a page was put in place of another
+    version: int = 0
+
     def __init__(self) -> None:
         self.page_directory = dict()
 
@@ -12,11 +15,14 @@ class PageDirectory:
 
     def insert_page(self, rid: int, base_page: BasePage) -> None:
         self.page_directory[rid] = base_page
+        self.version += 1
 
     def delete_page(self, rid: int) -> None:
         assert rid in self.page_directory
         del self.page_directory[rid]
+        self.version += 1
 
     def update_page(self, rid_list: dict()) -> None:
         for rid in rid_list:
             self.page_directory[rid] = rid_list[rid]
+        self.version += 1
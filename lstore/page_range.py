@@ -11,7 +11,8 @@ from .bufferpool import Bufferpool
 from .page import LogicalPage, BasePage, TailPage
 from .page_directory import PageDirectory
 from .rid import RID_Generator
-from typing import Tuple, List
+from .phys_page import numpy
+from typing import Iterator, Tuple, List
 from threading import Lock
 
 
@@ -38,6 +39,9 @@ class PageRange:
         self.full_tail_pages: list[TailPage] = []
         self.updated_base_rid = dict()
         self.prev_tid = 0
+        self.num_updates = 0
+        # data columns changed by updates that no merge has folded into the base pages and their zone maps yet
+        self.unmerged_update_columns: set[int] = set()
         self.insert_lock = Lock()
         self.update_lock = Lock()
 
@@ -65,7 +69,8 @@ class PageRange:
         # saving the page and its attributes in active memory. keep in mind attributes of
         # record are always integers
         with self.update_lock:
-            col_vals: list[int] = [None if attribute == False else int(self.get_latest_column_value(base_rid, i)) for i, attribute in enumerate(indexed_attributes)]
+            latest_values = iter(self.get_latest_record(base_rid, [0 if attribute == False else 1 for attribute in indexed_attributes]))
+            col_vals: list[int] = [None if attribute == False else int(next(latest_values)) for attribute in indexed_attributes]
             curr_rid: int = base_rid
             while True:
                 if curr_rid == base_rid:
@@ -92,20 +97,43 @@ class PageRange:
                 self.base_pages.append(new_base_page)
                 latest_base_page = new_base_page
 
+            # the indirection column points at the record itself
             if self.cumulative:
-                rid, slot_num = latest_base_page.insert_record(columns + [0, INVALID_RID])
+                rid, slot_num = latest_base_page.insert_record(columns + [0, INVALID_RID], indirection_to_self=True)
             else:
                 # schema encoding and indirection set to 0
-                rid, slot_num = latest_base_page.insert_record(columns + [0, INVALID_RID, INVALID_RID])
-            latest_base_page.update_indir_of_record(rid, slot_num)
+                rid, slot_num = latest_base_page.insert_record(columns + [0, INVALID_RID, INVALID_RID], indirection_to_self=True)
             self.page_directory.insert_page(latest_base_page.get_starting_rid(), latest_base_page)
             return rid
 
+    def insert_records(self, records: list[list]) -> list[int]:
+        """
+        `records`: rows of attribute values
+        #: inserts rows until the page range is full, a base page at a time
+        #: returns the rids of the inserted rows, the first len(rids) rows were inserted
+        """
+        with self.insert_lock:
+            rids: list[int] = []
+            while len(rids) < len(records) and not self.is_full():
+                latest_base_page: BasePage = self.base_pages[-1]
+                if latest_base_page.is_full():
+                    latest_base_page = BasePage(self.table_name, self.num_total_cols, self.bufferpool, self.rid_generator)
+                    self.base_pages.append(latest_base_page)
+
+                # the indirection column is left at INVALID_RID and pointed at the records below
+                num_metadata_cols: int = self.num_total_cols - self.num_attr_cols
+                rows: list[list] = [
+                    record + [0] * num_metadata_cols
+                    for record in records[len(rids) : len(rids) + len(latest_base_page.available_chunks)]
+                ]
+                new_rids, start_slot_num = latest_base_page.insert_records(rows)
+                latest_base_page.update_indir_of_records(new_rids, start_slot_num)
+                self.page_directory.insert_page(latest_base_page.get_starting_rid(), latest_base_page)
+                rids.extend(new_rids)
+            return rids
+
     def check_first_update(self, base_rid: int):
-        record: list = []
-        for index in range(self.num_attr_cols):
-            record.append(0)
-            record[index] = self.get_latest_column_value(base_rid, index)
+        record: list = self.get_latest_record(base_rid, [1] * self.num_attr_cols)
         self.update_record(base_rid, record, True)
 
     def update_record(self, base_rid: int, columns_to_update: list, ignore_lock: bool = False) -> Tuple[int, list[int]]:
@@ -123,7 +151,7 @@ class PageRange:
                 latest_page_slot_num,
                 latest_record_rid,
             ) = self.__get_latest_record_details(base_rid)
-            latest_record_columns: list[int] = [latest_page.get_column_of_record(ind, latest_page_slot_num) for ind in range(self.num_attr_cols)]
+            latest_record_columns: list[int] = latest_page.get_record(latest_page_slot_num, [1] * self.num_attr_cols)
 
             new_tail_record_columns = []
             if self.cumulative:
@@ -134,6 +162,11 @@ class PageRange:
                     needed_updates.append(None if new_col == old_col or new_col == None else int(old_col))
             else:
                 new_tail_record_columns = columns_to_update.copy()
+            self.num_updates += 1
+            if self.cumulative:
+                self.unmerged_update_columns.update(ind for ind, old_col in enumerate(needed_updates) if old_col != None)
+            else:
+                self.unmerged_update_columns.update(ind for ind, new_col in enumerate(columns_to_update) if new_col != None)
 
             if not self.cumulative:
                 # Construct schema encoding integer for new record
@@ -163,6 +196,7 @@ class PageRange:
 
             if base_page not in self.updated_base_pages:
                 self.updated_base_pages.append(base_page)
+            self.prev_tid = new_tail_page_rid
             return new_tail_page_rid, needed_updates
 
         if ignore_lock:
@@ -172,6 +206,52 @@ class PageRange:
                 return update()
 
 
+    def take_merge_work(self, include_latest_tail_page: bool = False) -> Tuple[list[TailPage], list[BasePage], int, int]:
+        """
+        `include_latest_tail_page`: whether to hand over the tail page still being filled as well, when no more
+        updates are coming
+        #: hands the full tail pages and the base pages they update over to a merge
+        #: returns them with the rid of the latest tail record and the number of updates made so far
+        """
+        with self.update_lock:
+            tail_pages: list[TailPage] = self.full_tail_pages + ([self.tail_pages[-1]] if include_latest_tail_page else [])
+            base_pages: list[BasePage] = self.updated_base_pages
+            self.full_tail_pages = []
+            self.updated_base_pages = []
+            return tail_pages, base_pages, self.prev_tid, self.num_updates
+
+    def finish_merge(self, merged_base_pages: list[BasePage], tail_pages: list[TailPage], num_updates: int) -> None:
+        """
+        `merged_base_pages`: the merged copies of base pages, with refreshed zone maps
+        #: puts the merged copies in place of the pages they were copied from, the caller holds insert_lock
+        #: the data columns of the pages copied from are deleted once no reader is left in them
+        #: the zone maps account for every update once the merge saw all the tail records and no update came since
+        """
+        for merged_base_page in merged_base_pages:
+            superseded_base_page: BasePage = self.page_directory.get_page(merged_base_page.get_starting_rid())
+            self.page_directory.insert_page(merged_base_page.get_starting_rid(), merged_base_page)
+            for i, base_page in enumerate(self.base_pages):
+                if base_page.get_starting_rid() == merged_base_page.get_starting_rid():
+                    self.base_pages[i] = merged_base_page
+            with superseded_base_page.latch.exclusive:
+                for col in range(superseded_base_page.num_cols - 2):
+                    self.bufferpool.delete_page(superseded_base_page.page_ids[col])
+                    # a reader that took the page from the directory before the merge was put in place reads the
+                    # merged copy of the column instead
+                    superseded_base_page.page_ids[col] = merged_base_page.page_ids[col]
+        with self.update_lock:
+            latest_tail_page: TailPage = self.tail_pages[-1]
+            if self.num_updates == num_updates and (latest_tail_page in tail_pages or latest_tail_page.get_num_records() == 0):
+                self.unmerged_update_columns.clear()
+
+    def page_can_be_skipped(self, base_page: BasePage, column_index: int, begin: int | None, end: int | None) -> bool:
+        """
+        #: returns whether no record of `base_page` can have a latest value between `begin` and `end` in the column
+        """
+        if begin == None or column_index not in range(len(base_page.zone_maps)) or column_index in self.unmerged_update_columns:
+            return False
+        return base_page.zone_map_excludes(column_index, begin, end)
+
     def get_latest_column_value(self, base_rid: int, column_index: int) -> int:
         if self.cumulative:
             return self.cumulative_get_latest_column_value(base_rid, column_index)
@@ -195,6 +275,210 @@ class PageRange:
         column_value = page.get_column_of_record(column_index, slot_num)
         return column_value
 
+    def scan_column(self, column_index: int, begin: int | None = None, end: int | None = None) -> Iterator[Tuple[list[int], list[int]]]:
+        """
+        `begin`, `end`: when given, pages whose zone maps rule out any value between them are skipped unread
+        #: walks the base pages of the range in physical order and yields, a page at a time, the rids of its live
+        records and their latest values in column `column_index`
+        #: the column and indirection pages are each read whole, only records whose indirection points away from
+        the base record have their latest version looked up
+        """
+        for rids, (latest_values,) in self.scan_columns([column_index], begin, end):
+            yield rids, latest_values
+
+    def scan_columns(
+        self, column_indices: list[int], begin: int | None = None, end: int | None = None
+    ) -> Iterator[Tuple[list[int], list[list[int]]]]:
+        """
+        `begin`, `end`: when given, pages whose zone maps rule out any value between them in the first column of
+        `column_indices` are skipped unread
+        #: scan_column over several columns, yields for each base page the rids of its live records and a list of
+        their latest values per column of `column_indices`
+        """
+        for base_page in list(self.base_pages):
+            # the directory holds the latest merged copy of the page
+            base_page = self.page_directory.get_page(base_page.get_starting_rid())
+            if self.page_can_be_skipped(base_page, column_indices[0], begin, end):
+                continue
+            starting_rid: int = base_page.get_starting_rid()
+            *columns_values, indirection_values = base_page.get_columns_values(
+                column_indices + [INDIRECTION_COLUMN], 0, base_page.get_num_records()
+            )
+            rids: list[int] = []
+            latest_values: list[list[int]] = [[] for _ in column_indices]
+            for slot_num, indirection_value in enumerate(indirection_values):
+                # deleted records, and records still being inserted, have no valid indirection
+                if indirection_value == LOGICAL_DELETE:
+                    continue
+                rid: int = starting_rid + slot_num
+                if indirection_value != rid and self.cumulative:
+                    # the latest tail record holds every column
+                    tail_page, tail_page_slot_num = self.__get_tail_page_of_record(indirection_value)
+                    for values, column_index in zip(latest_values, column_indices):
+                        values.append(tail_page.get_column_of_record(column_index, tail_page_slot_num))
+                elif indirection_value != rid:
+                    for values, column_index in zip(latest_values, column_indices):
+                        values.append(self.non_cumulative_get_latest_column_value(rid, column_index))
+                else:
+                    for values, column_values in zip(latest_values, columns_values):
+                        values.append(column_values[slot_num])
+                rids.append(rid)
+            yield rids, latest_values
+
+    def scan_columns_arrays(
+        self, column_indices: list[int], begin: int | None = None, end: int | None = None
+    ) -> Iterator[Tuple["numpy.ndarray", list["numpy.ndarray"]]]:
+        """
+        `begin`, `end`: when given, pages whose zone maps rule out any value between them in the first column of
+        `column_indices` are skipped unread
+        #: numpy counterpart of scan_column over several columns, yields for each base page the rids of its live
+        records and an array of their latest values per column of `column_indices`
+        #: the base values are read as arrays and only the records whose indirection points away from the base
+        record are patched with the values of their latest version
+        """
+        for base_page in list(self.base_pages):
+            base_page = self.page_directory.get_page(base_page.get_starting_rid())
+            if self.page_can_be_skipped(base_page, column_indices[0], begin, end):
+                continue
+            num_records: int = base_page.get_num_records()
+            *column_arrays, indirection_array = base_page.get_columns_arrays(
+                column_indices + [INDIRECTION_COLUMN], 0, num_records
+            )
+            rids = numpy.arange(base_page.get_starting_rid(), base_page.get_starting_rid() + num_records, dtype=numpy.int64)
+            live = indirection_array != LOGICAL_DELETE
+            for slot_num in numpy.flatnonzero(live & (indirection_array != rids)).tolist():
+                rid: int = int(rids[slot_num])
+                if self.cumulative:
+                    tail_page, tail_page_slot_num = self.__get_tail_page_of_record(int(indirection_array[slot_num]))
+                    for column_array, column_index in zip(column_arrays, column_indices):
+                        column_array[slot_num] = tail_page.get_column_of_record(column_index, tail_page_slot_num)
+                else:
+                    for column_array, column_index in zip(column_arrays, column_indices):
+                        column_array[slot_num] = self.non_cumulative_get_latest_column_value(rid, column_index)
+            yield rids[live], [column_array[live] for column_array in column_arrays]
+
+    def search_range(self, column_index: int, begin: int, end: int, vectorized: bool) -> list[int]:
+        """
+        `vectorized`: whether to scan the column with numpy
+        #: returns the rids of the live records of the range whose latest value in column `column_index` is between
+        `begin` and `end` inclusive, in physical order
+        """
+        matching_rids: list[int] = []
+        if vectorized:
+            for rids, (column_array,) in self.scan_columns_arrays([column_index], begin, end):
+                matching_rids.extend(rids[(column_array >= begin) & (column_array <= end)].tolist())
+            return matching_rids
+        for rids, column_values in self.scan_column(column_index, begin, end):
+            matching_rids.extend(rid for rid, column_value in zip(rids, column_values) if begin <= column_value <= end)
+        return matching_rids
+
+    def sum_range(self, key_column_index: int, aggregate_column_index: int, begin: int, end: int) -> int:
+        """
+        #: returns the sum of the latest values of `aggregate_column_index` over the live records of the range
+        whose key is between `begin` and `end` inclusive, scanning both columns with numpy
+        """
+        total: int = 0
+        for _, (keys, column_array) in self.scan_columns_arrays([key_column_index, aggregate_column_index], begin, end):
+            total += sum_int64(column_array[(keys >= begin) & (keys <= end)])
+        return total
+
+    def group_by(
+        self, key_column_index: int, group_column_index: int, aggregate_column_index: int, begin: int | None, end: int | None, vectorized: bool
+    ) -> dict[int, list[int]]:
+        """
+        `begin`, `end`: inclusive bounds of the keys of the records to aggregate, every record when None
+        `vectorized`: whether to scan the columns and aggregate each page with numpy
+        #: groups the live records of the range by their latest value in `group_column_index` in a hash table
+        #: returns the [count, sum, min, max] of the latest values of `aggregate_column_index` in each group
+        """
+        groups: dict[int, list[int]] = dict()
+        column_indices: list[int] = [key_column_index, group_column_index, aggregate_column_index]
+        if vectorized:
+            for _, (keys, group_array, aggregate_array) in self.scan_columns_arrays(column_indices, begin, end):
+                if begin != None:
+                    in_range = (keys >= begin) & (keys <= end)
+                    group_array, aggregate_array = group_array[in_range], aggregate_array[in_range]
+                group_values, group_positions = numpy.unique(group_array, return_inverse=True)
+                counts = numpy.bincount(group_positions, minlength=len(group_values))
+                sums = group_sums_int64(aggregate_array, group_positions, len(group_values))
+                mins = numpy.full(len(group_values), numpy.iinfo(numpy.int64).max, dtype=numpy.int64)
+                numpy.minimum.at(mins, group_positions, aggregate_array)
+                maxs = numpy.full(len(group_values), numpy.iinfo(numpy.int64).min, dtype=numpy.int64)
+                numpy.maximum.at(maxs, group_positions, aggregate_array)
+                for partial in zip(group_values.tolist(), counts.tolist(), sums, mins.tolist(), maxs.tolist()):
+                    merge_group(groups, partial[0], list(partial[1:]))
+            return groups
+        for _, (keys, group_values, aggregate_values) in self.scan_columns(column_indices, begin, end):
+            for key, group_value, aggregate_value in zip(keys, group_values, aggregate_values):
+                if begin != None and not begin <= key <= end:
+                    continue
+                merge_group(groups, group_value, [1, aggregate_value, aggregate_value, aggregate_value])
+        return groups
+
+    def get_latest_record(self, base_rid: int, projection_mask: list[int]) -> list[int]:
+        """
+        `projection_mask`: array of 1 or 0 values, one per attribute column
+        #: returns the latest values of the projected columns, resolving the latest version of the record once
+        instead of once per column
+        """
+        if self.cumulative:
+            page, slot_num, _ = self.__get_latest_record_details(base_rid)
+            return page.get_record(slot_num, projection_mask)
+        return self.non_cumulative_get_latest_record(base_rid, projection_mask)
+
+    def get_versioned_record(self, base_rid: int, relative_version: int, projection_mask: list[int]) -> list[int]:
+        """
+        `relative_version`: number of updates to go back from the latest version
+        #: follows the indirection of cumulative tail records from the latest version of the record, stopping at
+        the copy of its base version the first update made, whose indirection points back at the base record
+        """
+        page, slot_num, _ = self.__get_latest_record_details(base_rid)
+        for _ in range(relative_version):
+            previous_rid: int = page.get_column_of_record(INDIRECTION_COLUMN, slot_num)
+            if previous_rid == base_rid:
+                break
+            page, slot_num = self.__get_tail_page_of_record(previous_rid)
+        return page.get_record(slot_num, projection_mask)
+
+    def non_cumulative_get_latest_record(self, base_rid: int, projection_mask: list[int]) -> list[int]:
+        """
+        #: walks the version chain once, taking each column from the first record whose schema encoding
+        marks it as updated, the same record non_cumulative_get_latest_column_value stops at
+        """
+        column_values: dict[int, int] = dict()
+        remaining_columns: list[int] = [column_index for column_index, projected in enumerate(projection_mask) if projected]
+        page, slot_num = self.__get_base_page_of_record(base_rid)
+        while remaining_columns:
+            schema_encoding_value = page.get_column_of_record(SCHEMA_ENCODING_COLUMN, slot_num)
+            updated_columns: list[int] = [
+                column_index
+                for column_index in remaining_columns
+                if (schema_encoding_value >> (self.num_attr_cols - column_index - 1)) % 2 == 1
+            ]
+            if updated_columns:
+                self.__read_columns(page, slot_num, updated_columns, column_values)
+                remaining_columns = [column_index for column_index in remaining_columns if column_index not in column_values]
+                if not remaining_columns:
+                    break
+            next_page_rid = page.get_column_of_record(INDIRECTION_COLUMN, slot_num)
+            if next_page_rid == INVALID_RID:
+                break
+            page = self.page_directory.get_page(self.rid_generator.base_rid_to_starting_rid(next_page_rid))
+            slot_num = self.rid_generator.get_slot_num(next_page_rid)
+            if next_page_rid == base_rid:
+                break
+        self.__read_columns(page, slot_num, remaining_columns, column_values)
+        return [column_values[column_index] for column_index, projected in enumerate(projection_mask) if projected]
+
+    def __read_columns(self, page: LogicalPage, slot_num: int, column_indices: list[int], column_values: dict[int, int]) -> None:
+        if not column_indices:
+            return
+        projection_mask: list[int] = [0] * (max(column_indices) + 1)
+        for column_index in column_indices:
+            projection_mask[column_index] = 1
+        for column_index, column_value in zip(column_indices, page.get_record(slot_num, projection_mask)):
+            column_values[column_index] = column_value
+
     def record_has_most_recent_col_value(self, page: LogicalPage, slot_num: int, column_index: int):
         schema_encoding_value = page.get_column_of_record(SCHEMA_ENCODING_COLUMN, slot_num)
         column_index_in_schema_encoding = self.num_attr_cols - column_index - 1
@@ -239,3 +523,39 @@ class PageRange:
         base_page_slot_num = self.rid_generator.get_slot_num(base_rid)
         assert base_page_slot_num != INVALID_SLOT_NUM
         return base_page, base_page_slot_num
+
+
+def sum_int64(values: "numpy.ndarray") -> int:
+    """
+    `values`: int64 numpy array of fewer than 2**31 values
+    #: returns the exact sum of `values`, summing their upper and lower 32 bits apart as neither sum can overflow
+    int64, where summing the values themselves wraps around
+    """
+    return (int((values >> 32).sum()) << 32) + int((values & 0xFFFFFFFF).sum())
+
+
+def group_sums_int64(values: "numpy.ndarray", positions: "numpy.ndarray", num_groups: int) -> list[int]:
+    """
+    `positions`: the group of each of `values`, between 0 and `num_groups`
+    #: same as sum_int64, returns the exact sum of the values of each group
+    """
+    upper_sums = numpy.zeros(num_groups, dtype=numpy.int64)
+    numpy.add.at(upper_sums, positions, values >> 32)
+    lower_sums = numpy.zeros(num_groups, dtype=numpy.int64)
+    numpy.add.at(lower_sums, positions, values & 0xFFFFFFFF)
+    return [(upper_sum << 32) + lower_sum for upper_sum, lower_sum in zip(upper_sums.tolist(), lower_sums.tolist())]
+
+
+def merge_group(groups: dict[int, list[int]], group_value: int, partial: list[int]) -> None:
+    """
+    `partial`: the [count, sum, min, max] of some of the records of the group
+    #: folds `partial` into the aggregates kept for `group_value` in `groups`
+    """
+    aggregates: list[int] | None = groups.get(group_value)
+    if aggregates == None:
+        groups[group_value] = partial
+        return
+    aggregates[0] += partial[0]
+    aggregates[1] += partial[1]
+    aggregates[2] = min(aggregates[2], partial[2])
+    aggregates[3] = max(aggregates[3], partial[3])
@@ -0,0 +1,165 @@
+from .bufferpool import Bufferpool
+from .config import MAX_BUFFERPOOL_SIZE
+from .disk import DiskInterface, MmapDiskInterface, SegmentDiskInterface
+from .page_directory import PageDirectory
+from .page_range import PageRange
+from .phys_page import PhysicalPage
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+import io
+import pickle
+
+
+class ParallelScanExecutor:
+    """
+    #: Fans calls of a PageRange method, such as a range search or a sum, out across worker processes, a run
+    of consecutive page ranges per worker, and returns the results in page range order
+    #: Workers do not share the bufferpool, they get a snapshot of the table: the metadata of its page ranges
+    and pages, taken after every dirty page was flushed, and a copy of the disk interface they read the pages
+    from directly
+    #: A snapshot is only taken again once a page was written to or the page directory changed, and each worker
+    keeps the one it loaded last along with the pages it read, so it is only sent to workers holding an older one
+    """
+
+    def __init__(self, num_workers: int) -> None:
+        self.num_workers: int = num_workers
+        self.executor = ProcessPoolExecutor(num_workers)
+        # the snapshot taken last and the version of the table it was taken at
+        self.snapshot: bytes | None = None
+        self.snapshot_version: tuple[int, int] | None = None
+
+    @staticmethod
+    def can_scan(bufferpool: Bufferpool) -> bool:
+        """
+        #: returns whether the pages of `bufferpool` can be read by other processes, which needs a database
+        directory to flush them to
+        """
+        # pages of an MmapDiskInterface are changed in place in their mapping, the workers would read writes made
+        # after the snapshot was taken
+        if isinstance(bufferpool.disk, MmapDiskInterface):
+            return False
+        return isinstance(bufferpool.disk, (DiskInterface, SegmentDiskInterface)) and bufferpool.disk.path != ""
+
+    def map(
+        self, page_ranges: list[PageRange], page_directory: PageDirectory, bufferpool: Bufferpool, method_name: str, args: tuple
+    ) -> list:
+        """
+        #: calls PageRange.`method_name` with `args` on each of `page_ranges` in the workers
+        #: returns the results in the order of `page_ranges`
+        """
+        version: tuple[int, int] = self.refresh_snapshot(page_ranges, page_directory, bufferpool)
+        num_page_ranges_per_task: int = -(-len(page_ranges) // self.num_workers)
+        tasks: list[tuple[int, int]] = [
+            (start, start + num_page_ranges_per_task) for start in range(0, len(page_ranges), num_page_ranges_per_task)
+        ]
+        results: list[list | None] = [
+            future.result()
+            for future in [self.executor.submit(_run_on_page_ranges, version, None, *task, method_name, args) for task in tasks]
+        ]
+        # tasks that ran in a worker holding an older snapshot are sent again along with this one
+        retries = {
+            i: self.executor.submit(_run_on_page_ranges, version, self.snapshot, *tasks[i], method_name, args)
+            for i, task_results in enumerate(results)
+            if task_results == None
+        }
+        for i, future in retries.items():
+            results[i] = future.result()
+        return [result for task_results in results for result in task_results]
+
+    def refresh_snapshot(self, page_ranges: list[PageRange], page_directory: PageDirectory, bufferpool: Bufferpool) -> tuple[int, int]:
+        """
+        #: takes a new snapshot if a page was written to or the page directory changed since the last one
+        #: returns the version of the table the snapshot was taken at
+        """
+        with bufferpool.lock:
+            version: tuple[int, int] = (bufferpool.num_writes, page_directory.version)
+            if version != self.snapshot_version:
+                self.snapshot = _take_snapshot(page_ranges, page_directory, bufferpool)
+                self.snapshot_version = version
+            return version
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """
+    #: pickles the bufferpool and page directory shared by the pages as placeholders, the workers substitute
+    their own
+    """
+
+    def __init__(self, file, bufferpool: Bufferpool, page_directory: PageDirectory) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.bufferpool = bufferpool
+        self.page_directory = page_directory
+
+    def persistent_id(self, obj: Any) -> str | None:
+        if obj is self.bufferpool:
+            return "bufferpool"
+        if obj is self.page_directory:
+            return "page_directory"
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, bufferpool: Bufferpool, page_directory: PageDirectory) -> None:
+        super().__init__(file)
+        self.bufferpool = bufferpool
+        self.page_directory = page_directory
+
+    def persistent_load(self, pid: str) -> Any:
+        return self.bufferpool if pid == "bufferpool" else self.page_directory
+
+
+class _SnapshotBufferpool(Bufferpool):
+    """
+    #: read only bufferpool of a worker, over a copy of the disk interface of the table
+    """
+
+    def __init__(self, disk: DiskInterface | SegmentDiskInterface) -> None:
+        super().__init__(MAX_BUFFERPOOL_SIZE, "")
+        self.disk = disk
+
+    def get_page(self, page_id: str) -> PhysicalPage:
+        # a page the snapshot knows of but that was not written to before it was taken reads as an empty page,
+        # the records still being inserted into it have no valid indirection yet and are skipped
+        physical_page: PhysicalPage | None = super().get_page(page_id)
+        return physical_page if physical_page != None else PhysicalPage()
+
+
+def _take_snapshot(page_ranges: list[PageRange], page_directory: PageDirectory, bufferpool: Bufferpool) -> bytes:
+    """
+    #: the bufferpool stays locked while the snapshot is taken, so no page is written to in the meantime and the
+    flushed pages hold everything the metadata refers to
+    """
+    file = io.BytesIO()
+    with bufferpool.lock:
+        bufferpool.flush_all_pages()
+        pickle.dump(bufferpool.disk, file, pickle.HIGHEST_PROTOCOL)
+        # the directory is copied first, the pickler would fail if a page were added to it while it is pickled
+        _SnapshotPickler(file, bufferpool, page_directory).dump((dict(page_directory.page_directory), page_ranges))
+    return file.getvalue()
+
+
+# the version and page ranges of the snapshot a worker loaded last
+_loaded_snapshot: tuple[tuple[int, int], list[PageRange]] | None = None
+
+
+def _run_on_page_ranges(
+    version: tuple[int, int], snapshot: bytes | None, start: int, stop: int, method_name: str, args: tuple
+) -> list | None:
+    """
+    `snapshot`: the snapshot at `version`, None when the worker is expected to hold it already
+    #: runs in a worker, calls PageRange.`method_name` on the page ranges of the snapshot from `start` to `stop`
+    #: returns None when the worker holds no snapshot at `version` and was not sent one
+    """
+    global _loaded_snapshot
+    if _loaded_snapshot == None or _loaded_snapshot[0] != version:
+        if snapshot == None:
+            return None
+        file = io.BytesIO(snapshot)
+        disk: DiskInterface | SegmentDiskInterface = pickle.load(file)
+        page_directory: PageDirectory = PageDirectory()
+        page_directory.page_directory, page_ranges = _SnapshotUnpickler(file, _SnapshotBufferpool(disk), page_directory).load()
+        _loaded_snapshot = (version, page_ranges)
+    return [getattr(page_range, method_name)(*args) for page_range in _loaded_snapshot[1][start:stop]]
@@ -2,23 +2,41 @@ from .config import (
     PHYSICAL_PAGE_SIZE,
     ATTRIBUTE_SIZE
 )
-import time
+from array import array
+try:
+    import numpy
+except ImportError:
+    # numpy only speeds up scans, without it they run over lists
+    numpy = None
 
 
 class PhysicalPage:
     max_number_of_records: int = PHYSICAL_PAGE_SIZE // ATTRIBUTE_SIZE
 
-    def __init__(self, data: bytearray | None = None):
+    def __init__(self, data: bytearray | memoryview | None = None):
         if data is None:
             self.data = bytearray(PHYSICAL_PAGE_SIZE)
         else:
             assert len(data) == PHYSICAL_PAGE_SIZE
             self.data = data
+        # typed, zero-copy view of the slots (native byte order 64-bit signed integers)
+        self.column_values: memoryview = memoryview(self.data).cast("q")
         self.pinned: int = 0
         self.dirty: bool = False
-        self.timestamp: float = time.time()
 
-    def get_data(self) -> bytearray:
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['column_values']
+        if not isinstance(self.data, bytearray):
+            # pages wrapping a memory mapped file are copied out of the mapping
+            state['data'] = bytearray(self.data)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.column_values = memoryview(self.data).cast("q")
+
+    def get_data(self) -> bytearray | memoryview:
         return self.data
 
     def is_dirty(self) -> bool:
@@ -27,9 +45,6 @@ class PhysicalPage:
     def set_dirty(self) -> None:
         self.dirty = True
 
-    def get_timestamp(self) -> float:
-        return self.timestamp
-
     def can_evict(self) -> bool:
         return self.pinned == 0
 
@@ -41,18 +56,44 @@ class PhysicalPage:
 
     def get_column_value(self, slot_num: int) -> int:
         assert self.__is_slot_num_valid(slot_num)
-        column_bytes = self.data[slot_num * ATTRIBUTE_SIZE : slot_num * ATTRIBUTE_SIZE + ATTRIBUTE_SIZE]
-        column_value = int.from_bytes(column_bytes, byteorder="big", signed=True)
-        self.timestamp = time.time()
-        return column_value
+        return self.column_values[slot_num]
+
+    def get_column_values(self, start_slot_num: int = 0, stop_slot_num: int = max_number_of_records) -> list[int]:
+        """
+        #: returns the values of slots [`start_slot_num`, `stop_slot_num`) in a single pass
+        """
+        assert 0 <= start_slot_num <= stop_slot_num <= PhysicalPage.max_number_of_records
+        return self.column_values[start_slot_num:stop_slot_num].tolist()
+
+    def get_column_array(self, start_slot_num: int = 0, stop_slot_num: int = max_number_of_records) -> "numpy.ndarray":
+        """
+        #: returns a copy of the values of slots [`start_slot_num`, `stop_slot_num`) as an int64 numpy array
+        """
+        assert 0 <= start_slot_num <= stop_slot_num <= PhysicalPage.max_number_of_records
+        return numpy.frombuffer(
+            self.data, dtype=numpy.int64, count=stop_slot_num - start_slot_num, offset=start_slot_num * ATTRIBUTE_SIZE
+        ).copy()
 
     def insert_value(self, value: int, slot_num: int) -> bool:
         if not self.__is_slot_num_valid(slot_num):
             return False
-        value_bytes = value.to_bytes(ATTRIBUTE_SIZE, byteorder="big", signed=True)
-        self.data[slot_num * ATTRIBUTE_SIZE : slot_num * ATTRIBUTE_SIZE + ATTRIBUTE_SIZE] = value_bytes
+        try:
+            self.column_values[slot_num] = value
+        except ValueError:
+            raise OverflowError(f"{value} does not fit in {ATTRIBUTE_SIZE} bytes")
+        self.dirty = True
+        return True
+
+    def set_column_values(self, values: list[int], start_slot_num: int = 0) -> bool:
+        """
+        #: writes `values` into consecutive slots beginning at `start_slot_num`
+        #: raises OverflowError (leaving the page untouched) if any value does not fit in a slot
+        """
+        stop_slot_num = start_slot_num + len(values)
+        if not (0 <= start_slot_num <= stop_slot_num <= PhysicalPage.max_number_of_records):
+            return False
+        self.column_values[start_slot_num:stop_slot_num] = array("q", values)
         self.dirty = True
-        self.timestamp = time.time()
         return True
 
     def __is_slot_num_valid(self, slot_num: int) -> bool:
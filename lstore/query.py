@@ -38,6 +38,19 @@ class Query:
             return False
         return result
 
+    def insert_many(self, records):
+        """
+        # Insert many records at once, each one a list of columns
+        # Return True upon succesful insertion
+        # Returns False if insert fails for whatever reason, in which case no record is inserted
+        """
+        recordList = [list(columns) for columns in records]
+        try:
+            result = self.table.insert_records(recordList)
+        except AssertionError:
+            return False
+        return result
+
     def select(self, search_key, search_key_index, projected_columns_index):
         """
         Read matching record with specified search key
@@ -85,17 +98,50 @@ class Query:
             ridList: List[int] = self.table.brute_force_search(
                 search_key, search_key_index
             )
-        if relative_version != 0:
-            for i, rid in enumerate(ridList):
-                ridList[i] = self.table.get_versioned_rid(rid, abs(relative_version))
-        attribute_values = self.table.get_latest_column_values(
-            ridList, projected_columns_index
+        attribute_values = self.table.get_versioned_column_values(
+            ridList, projected_columns_index, abs(relative_version)
         )
         for rid, columns in zip(ridList, attribute_values):
             record = Record(rid, search_key, columns)
             recordList.append(record)
         return recordList
 
+    def select_range(self, begin, end, column_index, projected_columns_index):
+        """
+        Read all records whose value in a column lies in a range
+        :param begin: the smallest value to match
+        :param end: the largest value to match
+        :param column_index: the column index you want to search based on
+        :param projected_columns_index: what columns to return. array of 1 or 0 values.
+        Returns a list of Record objects upon success, keyed by their value in the searched column
+        Returns an empty list if no record is in the range
+        """
+        if column_index == self.table.primary_key_col:
+            ridList: List[int] = list(self.table.index.locate_range(begin, end))
+        elif self.table.secondary_indices[column_index] != None:
+            # B-tree indices walk their leaves over the range, dictionary indices scan their distinct keys
+            if self.table.multiprocessing:
+                _, ridList = self.table.search_secondary_range_multiprocessing(begin, end, column_index)
+            else:
+                ridList: List[int] = self.table.search_secondary_range_serially(begin, end, column_index)
+        else:
+            ridList: List[int] = self.table.brute_force_range_search(begin, end, column_index)
+        # the searched column is read along with the projected ones, to key the records and to drop any
+        # index entry that no longer matches the latest value
+        search_columns_index: List[int] = list(projected_columns_index)
+        search_columns_index[column_index] = 1
+        key_position: int = sum(search_columns_index[:column_index])
+        attribute_values = self.table.get_latest_column_values(ridList, search_columns_index)
+        recordList: List[Record] = []
+        for rid, columns in zip(ridList, attribute_values):
+            key = columns[key_position]
+            if not begin <= key <= end:
+                continue
+            if not projected_columns_index[column_index]:
+                del columns[key_position]
+            recordList.append(Record(rid, key, columns))
+        return recordList
+
     def update(self, primary_key, *columns):
         """
         # Update a record with specified key and columns
@@ -132,25 +178,37 @@ class Query:
         # Returns the summation of the given range upon success
         # Returns False if no record exists in the given range
         """
-        aggregateSum: int = 0
-        anyRecords: bool = False
         column_index_list: list = []
         for index in range(0, self.table.num_columns):
             if index == aggregate_column_index:
                 column_index_list.append(1)
             else:
                 column_index_list.append(0)
-        # print
-        for key in range(start_range, end_range + 1):
-            try:
-                record = self.select_version(key, self.table.primary_key_col, column_index_list, relative_version)
-                aggregateSum += record[0].columns[0]
-                anyRecords = True
-            except:
-                continue
-        if anyRecords == False:
+        if relative_version == 0:
+            aggregateSum, numRecords = self.table.sum_range(start_range, end_range, aggregate_column_index)
+            return aggregateSum if numRecords else False
+        ridList: List[int] = list(self.table.index.locate_range(start_range, end_range))
+        if not ridList:
+            return False
+        try:
+            attribute_values = self.table.get_versioned_column_values(ridList, column_index_list, abs(relative_version))
+        except AssertionError:
+            return False
+        return sum(columns[0] for columns in attribute_values)
+
+    def group_by(self, group_col, agg_col, agg_fns, key_range=None):
+        """
+        :param group_col: int           # Index of the column to group the records by
+        :param agg_col: int             # Index of the column to aggregate in each group
+        :param agg_fns: list            # Names of the aggregates to compute: count, sum, min, max or avg
+        :param key_range: tuple         # Inclusive (start, end) of the primary keys to aggregate, every record when None
+        # Returns a dict mapping each value of the group column to its aggregates, in the order of agg_fns
+        # Returns False if an aggregate is unknown
+        """
+        try:
+            return self.table.group_by(group_col, agg_col, list(agg_fns), key_range)
+        except AssertionError:
             return False
-        return aggregateSum
 
     def increment(self, key, column):
         """
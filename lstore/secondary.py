@@ -3,6 +3,7 @@ import pickle
 from typing import Dict, List, Set
 from enum import Enum
 from .seeding import SeedSet
+from .btree import BPlusTree
 from .enums import DSAStructure
 
 
@@ -27,16 +28,18 @@ class SecondaryIndex:
             self.seeds: SeedSet = SeedSet([])
         else:
             self.seeds: bool = False
-        self.dictionary: Dict[int, List[int]] = {}
+        self.initialize_structure()
         self.load_query(replace=True)
 
     def initialize_structure(self):
+        # the B-tree structures keep the same values as their dictionary counterparts in a BPlusTree, which
+        # shares the dictionary interface, so both are served by the dict_array, dict_set and dict_dict methods below
         if self.structure == DSAStructure.B_TREE_ARRAY:
-            pass
+            self.dictionary: BPlusTree = BPlusTree()
         elif self.structure == DSAStructure.B_TREE_SET:
-            pass
+            self.dictionary: BPlusTree = BPlusTree()
         elif self.structure == DSAStructure.B_TREE_DICT:
-            pass
+            self.dictionary: BPlusTree = BPlusTree()
         elif self.structure == DSAStructure.DICTIONARY_ARRAY:
             self.dictionary: Dict[int, List[int]] = {}
         elif self.structure == DSAStructure.DICTIONARY_SET:
@@ -55,9 +58,8 @@ class SecondaryIndex:
                 self.dictionary = pickle.load(f)
                 self.seeds = pickle.load(f)
         elif replace or (not self.dictionary and not self.seeds):
-            self.dictionary, self.seeds = {}, False if self.seeds == False else SeedSet(
-                []
-            )
+            self.initialize_structure()
+            self.seeds = False if self.seeds == False else SeedSet([])
         else:
             raise Exception(
                 "Indices already exist but a file for them doesn't, and parameter did not specify overwriting existing member varaibles"
@@ -81,20 +83,52 @@ class SecondaryIndex:
         `key`: the key to be added to the index
         `rid`: the rid of the record that is being added to the index
         """
-        if self.structure == DSAStructure.DICTIONARY_ARRAY:
+        if self.structure in (DSAStructure.DICTIONARY_ARRAY, DSAStructure.B_TREE_ARRAY):
             self.add_record_dict_array(key, rid)
-        elif self.structure == DSAStructure.DICTIONARY_SET:
+        elif self.structure in (DSAStructure.DICTIONARY_SET, DSAStructure.B_TREE_SET):
             self.add_record_dict_set(key, rid)
+        elif self.structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            self.add_record_dict_dict(key, rid)
+
+    def add_records(self, keys: List[int], rids: List[int]):
+        """
+        `keys`: the keys to be added to the index
+        `rids`: the rids of the records being added, one per key
+        """
+        if self.structure in (DSAStructure.DICTIONARY_ARRAY, DSAStructure.B_TREE_ARRAY):
+            add_record = self.add_record_dict_array
+        elif self.structure in (DSAStructure.DICTIONARY_SET, DSAStructure.B_TREE_SET):
+            add_record = self.add_record_dict_set
+        elif self.structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            add_record = self.add_record_dict_dict
+        else:
+            return
+        for key, rid in zip(keys, rids):
+            add_record(key, rid)
 
     def search_record(self, key) -> List[int] | Set[int] | Dict[int, int]:
         """
         `key`: the key to be searched in the index
         #: returns the rid of the record that is being searched for in the index
         """
-        if self.structure == DSAStructure.DICTIONARY_ARRAY:
+        if self.structure in (DSAStructure.DICTIONARY_ARRAY, DSAStructure.B_TREE_ARRAY):
             return self.search_record_dict_array(key)
-        elif self.structure == DSAStructure.DICTIONARY_SET:
+        elif self.structure in (DSAStructure.DICTIONARY_SET, DSAStructure.B_TREE_SET):
             return self.search_record_dict_set(key)
+        elif self.structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            return self.search_record_dict_dict(key)
+
+    def search_range(self, begin: int, end: int) -> List[int]:
+        """
+        `begin`, `end`: inclusive bounds of the keys to be searched in the index
+        #: returns the rids of the records whose key lies in the range, in key order
+        #: the B-tree structures walk their leaves, the dictionary structures have to scan every key
+        """
+        if isinstance(self.dictionary, BPlusTree):
+            matches = self.dictionary.items(begin, end)
+        else:
+            matches = sorted((key, rids) for key, rids in self.dictionary.items() if begin <= key <= end)
+        return [rid for _, rids in matches for rid in rids]
 
     def delete_record(self, key: int, rid: int):
         """
@@ -102,10 +136,12 @@ class SecondaryIndex:
         `rid`: the rid of the record that is being deleted from the index
         #: note, potential edge case where the same key with the same rid is deleted twice
         """
-        if self.structure == DSAStructure.DICTIONARY_ARRAY:
+        if self.structure in (DSAStructure.DICTIONARY_ARRAY, DSAStructure.B_TREE_ARRAY):
             self.delete_record_dict_array(key, rid)
-        elif self.structure == DSAStructure.DICTIONARY_SET:
+        elif self.structure in (DSAStructure.DICTIONARY_SET, DSAStructure.B_TREE_SET):
             self.delete_record_dict_set(key, rid)
+        elif self.structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            self.delete_record_dict_dict(key, rid)
 
     """ DSAStructure.DICTIONARY_ARRAY
     Basic structure of having a dictionary for each secondary index, with the key being the attribute value
@@ -177,4 +213,42 @@ class SecondaryIndex:
             if rid in vals:
                 vals.remove(rid)
             if self.seeds:
-                self.seeds.remove(rid)
\ No newline at end of file
+                self.seeds.remove(rid)
+
+    """ DSAStructure.DICTIONARY_DICT
+    Basic structure of having a dictionary for each secondary index, with the key being the attribute value
+    and the element being a dictionary of the RIDs associated with it, each mapped to the number of times it
+    was added, which keeps the RIDs in the order they were first added
+    """
+
+    def add_record_dict_dict(self, key: int, rid: int):
+        """
+        `key`: the key to be added to the index
+        `rid`: the rid of the record that is being added to the index
+        #: a rid added twice has to be deleted twice
+        """
+        vals: Dict[int, int] = self.dictionary.setdefault(key, {})
+        vals[rid] = vals.get(rid, 0) + 1
+        if self.seeds:
+            self.seeds.add(rid)
+
+    def search_record_dict_dict(self, key) -> Dict[int, int]:
+        """
+        `key`: the key to be searched in the index
+        #: returns the rids of the records with `key`, iterating the dictionary yields each of them once
+        """
+        return self.dictionary.get(key, {})
+
+    def delete_record_dict_dict(self, key: int, rid: int):
+        """
+        `key`: the key to be deleted from the index
+        `rid`: the rid of the record that is being deleted from the index
+        """
+        if key in self.dictionary:
+            vals: Dict[int, int] = self.dictionary[key]
+            if rid in vals:
+                vals[rid] -= 1
+                if vals[rid] == 0:
+                    del vals[rid]
+            if self.seeds:
+                self.seeds.remove(rid)
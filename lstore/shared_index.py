@@ -0,0 +1,284 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterable, List, Tuple
+import threading
+from .config import SHARED_INDEX_LOG_SIZE
+from .enums import Operation
+
+# int64 fields of the control block: generation of the newest snapshot, generation of the snapshot the table holds
+CONTROL_SIZE = 2
+# int64 fields at the start of a snapshot block: number of keys, number of rids, updates applied, room for
+# updates in the log, updates logged
+SNAPSHOT_HEADER_SIZE = 5
+# int64 fields of an update in the log: the operation, the key and the rid
+LOG_ENTRY_SIZE = 3
+
+
+class SharedIndex:
+    """
+    #: Snapshot of a secondary index kept in shared memory, published by the AsyncSecondaryIndex that owns the
+    index so the threads of the table can search it without sending it requests
+    #: A snapshot is a block of int64 values: the header, the distinct keys in sorted order, the offsets of the
+    rids of each key, one more than there are keys, the rids of all keys back to back, and a log of the updates
+    the worker applied after it published the snapshot
+    #: The keys and rids of a snapshot are never written to once published, the worker only appends to its log,
+    writing the updates before the number logged. The table replays the updates it has not seen yet onto the
+    rids of the keys they touch, which it keeps apart from the snapshot
+    #: When the log is full, or the index changed in a way it cannot log, the worker writes the whole index to a
+    new block and bumps the generation held by a small control block, the table follows the generation to the
+    newest block and unlinks the one it held before. The log has room for as many updates as the snapshot has
+    rids, so writing the whole index again is paid for by the updates logged before it
+    #: The worker only publishes a snapshot once the table took the previous one, so there are at most two
+    blocks at a time and every block is unlinked by the process that attached to it, which keeps the resource
+    tracker they share from seeing a block registered again after it was unlinked
+    """
+
+    def __init__(self, name: str | None = None) -> None:
+        """
+        `name`: name of the control block of an existing shared index, the worker passes it, the table creates
+        a new one when None
+        """
+        if name == None:
+            # created before the workers start, so they share the resource tracker of the table
+            # a new block is zero filled, the generation before anything is published
+            self.control: SharedMemory | None = SharedMemory(create=True, size=8 * CONTROL_SIZE)
+        else:
+            self.control: SharedMemory | None = None
+        self.name: str = name if name != None else self.control.name
+        self.control_view: memoryview | None = None
+        self.generation: int = 0
+        self.block: SharedMemory | None = None
+        self.block_view: memoryview | None = None
+        self.keys: memoryview | None = None
+        self.offsets: memoryview | None = None
+        self.rids: memoryview | None = None
+        self.log: memoryview | None = None
+        self.num_updates: int = 0
+        # updates of the log replayed so far, and the rids of the keys they touched, in place of those of the snapshot
+        self.num_logged: int = 0
+        self.logged_rids: Dict[int, List[int]] = {}
+        self.logged_keys: List[int] = []
+        # the block the worker published last, which it appends updates to
+        self.published_block: SharedMemory | None = None
+        self.published_view: memoryview | None = None
+        # the threads of the table share the snapshot it holds, which a search moving to a newer one releases
+        self.lock = threading.Lock()
+
+    def can_publish(self) -> bool:
+        """
+        #: returns whether the table took the last snapshot published
+        """
+        control_view: memoryview = self.get_control_view()
+        return control_view[0] == control_view[1]
+
+    def publish(self, items: Iterable[Tuple[int, Iterable[int]]], num_updates: int) -> None:
+        """
+        `items`: the keys of the index in sorted order, each with its rids
+        `num_updates`: number of insertions and deletions applied to the index so far
+        #: called by the worker that owns the index once can_publish, replaces the snapshot the table sees with
+        one of `items`
+        """
+        control_view: memoryview = self.get_control_view()
+        assert control_view[0] == control_view[1]
+        keys, offsets, rids = array("q"), array("q", [0]), array("q")
+        for key, key_rids in items:
+            keys.append(key)
+            rids.extend(key_rids)
+            offsets.append(len(rids))
+        log_size: int = max(SHARED_INDEX_LOG_SIZE, len(rids))
+        generation: int = control_view[0] + 1
+        block = SharedMemory(
+            name=f"{self.name}_{generation}",
+            create=True,
+            size=8 * (SNAPSHOT_HEADER_SIZE + len(keys) + len(offsets) + len(rids) + LOG_ENTRY_SIZE * log_size),
+        )
+        block_view: memoryview = block.buf.cast("q")
+        block_view[:SNAPSHOT_HEADER_SIZE] = array("q", [len(keys), len(rids), num_updates, log_size, 0])
+        start: int = SNAPSHOT_HEADER_SIZE
+        for values in (keys, offsets, rids):
+            block_view[start : start + len(values)] = values
+            start += len(values)
+        self.release_published_block()
+        self.published_block, self.published_view = block, block_view
+        control_view[0] = generation
+
+    def append(self, updates: List[Tuple[Operation, int, int, int]]) -> bool:
+        """
+        `updates`: insertions and deletions the worker applied to the index, as the requests it was sent
+        #: called by the worker, logs `updates` after those of the snapshot it published last
+        #: returns False when there is no snapshot or its log has no room for them, the worker then has to
+        publish the whole index
+        """
+        if self.published_view == None:
+            return False
+        num_keys, num_rids, _, log_size, num_logged = self.published_view[:SNAPSHOT_HEADER_SIZE].tolist()
+        if num_logged + len(updates) > log_size:
+            return False
+        entries = array("q")
+        for operation, key, rid, _ in updates:
+            if operation not in (Operation.INSERT_RECORD, Operation.DELETE_RECORD):
+                return False
+            entries.extend((operation.value, key, rid))
+        start: int = SNAPSHOT_HEADER_SIZE + 2 * num_keys + 1 + num_rids + LOG_ENTRY_SIZE * num_logged
+        self.published_view[start : start + len(entries)] = entries
+        # the table only reads as many updates as are logged, so they are counted once written
+        self.published_view[SNAPSHOT_HEADER_SIZE - 1] = num_logged + len(updates)
+        return True
+
+    def search_record(self, key: int, num_updates: int) -> List[int] | None:
+        """
+        `num_updates`: number of insertions and deletions the table sent to the worker
+        #: returns the rids of the records with `key`, or None when the worker has not published a snapshot
+        with all of the updates yet
+        """
+        with self.lock:
+            if not self.refresh(num_updates):
+                return None
+            rids: List[int] | None = self.logged_rids.get(key)
+            return list(rids) if rids != None else self.get_snapshot_rids(key)
+
+    def search_range(self, begin: int, end: int, num_updates: int) -> List[int] | None:
+        """
+        #: same as search_record, for the records with a key between `begin` and `end`, in key order
+        """
+        with self.lock:
+            if not self.refresh(num_updates):
+                return None
+            first: int = bisect_left(self.keys, begin)
+            last: int = bisect_right(self.keys, end, first)
+            if bisect_left(self.logged_keys, begin) == bisect_right(self.logged_keys, end):
+                return self.rids[self.offsets[first] : self.offsets[last]].tolist()
+            return [rid for _, rids in self.get_range_items(begin, end) for rid in rids]
+
+    def search_range_items(self, begin: int, end: int, num_updates: int) -> List[Tuple[int, List[int]]] | None:
+        """
+        #: same as search_range, with the rids of each key listed along with it
+        """
+        with self.lock:
+            if not self.refresh(num_updates):
+                return None
+            return self.get_range_items(begin, end)
+
+    def get_snapshot_rids(self, key: int) -> List[int]:
+        index: int = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return []
+        return self.rids[self.offsets[index] : self.offsets[index + 1]].tolist()
+
+    def get_range_items(self, begin: int, end: int) -> List[Tuple[int, List[int]]]:
+        """
+        #: returns the keys between `begin` and `end` in sorted order, each with its rids, taking the rids of
+        the keys touched by the log over those of the snapshot
+        """
+        first: int = bisect_left(self.keys, begin)
+        last: int = bisect_right(self.keys, end, first)
+        logged_first: int = bisect_left(self.logged_keys, begin)
+        logged_last: int = bisect_right(self.logged_keys, end, logged_first)
+        keys: List[int] = sorted(set(self.keys[first:last].tolist()).union(self.logged_keys[logged_first:logged_last]))
+        return [
+            (key, list(self.logged_rids[key]) if key in self.logged_rids else self.get_snapshot_rids(key)) for key in keys
+        ]
+
+    def refresh(self, num_updates: int) -> bool:
+        """
+        #: takes the newest snapshot if the worker published one since the last search, and replays the updates
+        logged since, called holding the lock
+        #: returns whether the snapshot held has at least `num_updates` updates applied
+        """
+        control_view: memoryview = self.get_control_view()
+        generation: int = control_view[0]
+        if generation != self.generation:
+            block = SharedMemory(name=f"{self.name}_{generation}")
+            self.release_snapshot()
+            self.block, self.generation = block, generation
+            self.block_view = block.buf.cast("q")
+            num_keys, num_rids, self.num_updates, log_size, _ = self.block_view[:SNAPSHOT_HEADER_SIZE].tolist()
+            start: int = SNAPSHOT_HEADER_SIZE
+            self.keys = self.block_view[start : start + num_keys]
+            self.offsets = self.block_view[start + num_keys : start + 2 * num_keys + 1]
+            self.rids = self.block_view[start + 2 * num_keys + 1 : start + 2 * num_keys + 1 + num_rids]
+            start += 2 * num_keys + 1 + num_rids
+            self.log = self.block_view[start : start + LOG_ENTRY_SIZE * log_size]
+            # lets the worker publish the next one
+            control_view[1] = generation
+        if self.generation == 0:
+            return False
+        num_logged: int = self.block_view[SNAPSHOT_HEADER_SIZE - 1]
+        if num_logged != self.num_logged:
+            self.replay_log(num_logged)
+        return self.num_updates + self.num_logged >= num_updates
+
+    def replay_log(self, num_logged: int) -> None:
+        """
+        #: applies the updates logged after the ones replayed so far, up to `num_logged`, to the rids of their keys
+        """
+        entries: List[int] = self.log[LOG_ENTRY_SIZE * self.num_logged : LOG_ENTRY_SIZE * num_logged].tolist()
+        for entry in range(0, len(entries), LOG_ENTRY_SIZE):
+            operation, key, rid = entries[entry : entry + LOG_ENTRY_SIZE]
+            rids: List[int] | None = self.logged_rids.get(key)
+            if rids == None:
+                rids = self.logged_rids[key] = self.get_snapshot_rids(key)
+                insort(self.logged_keys, key)
+            if operation == Operation.INSERT_RECORD.value:
+                if rid not in rids:
+                    rids.append(rid)
+            elif rid in rids:
+                rids.remove(rid)
+        self.num_logged = num_logged
+
+    def get_control_view(self) -> memoryview:
+        if self.control_view == None:
+            if self.control == None:
+                self.control = SharedMemory(name=self.name)
+            self.control_view = self.control.buf.cast("q")
+        return self.control_view
+
+    def release_snapshot(self) -> None:
+        """
+        #: closes and unlinks the block of the snapshot the table holds
+        """
+        for view in (self.keys, self.offsets, self.rids, self.log, self.block_view):
+            if view != None:
+                view.release()
+        self.keys = self.offsets = self.rids = self.log = self.block_view = None
+        self.num_logged = 0
+        self.logged_rids, self.logged_keys = {}, []
+        if self.block != None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+    def release_published_block(self) -> None:
+        """
+        #: closes the block the worker published last, which the table unlinks
+        """
+        if self.published_view != None:
+            self.published_view.release()
+            self.published_view = None
+        if self.published_block != None:
+            self.published_block.close()
+            self.published_block = None
+
+    def close(self) -> None:
+        """
+        #: called by the worker when it stops, detaches it from the control block
+        """
+        self.release_published_block()
+        if self.control_view != None:
+            self.control_view.release()
+            self.control_view = None
+        if self.control != None:
+            self.control.close()
+            self.control = None
+
+    def unlink(self) -> None:
+        """
+        #: called by the table once the worker stopped, removes the control block and every snapshot left
+        """
+        with self.lock:
+            # the snapshot published last is still to be taken when the worker published it after the last search
+            self.refresh(0)
+            self.release_snapshot()
+            self.control.unlink()
+            self.close()
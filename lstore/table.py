@@ -1,26 +1,47 @@
 from .config import (
     INVALID_RID,
+    LOGICAL_DELETE,
     MAX_BASE_PAGES_IN_PAGE_RANGE,
     PHYSICAL_PAGE_SIZE,
     ATTRIBUTE_SIZE,
     BASE_RID,
+    USE_NUMPY,
+    VECTORIZED_SUM_MIN_RECORDS,
+    PARALLEL_SCAN_WORKERS,
+    PARALLEL_SCAN_MIN_PAGE_RANGES,
+    SECONDARY_REQUEST_BATCH_SIZE,
+    SECONDARY_REQUEST_BATCH_AGE,
+    SHARED_SECONDARY_INDEX,
+    SECONDARY_INDEX_SHARDS,
 )
 from .index import Index
 from .rid import RID_Generator
-from .page import get_copy_of_base_page
-from .page_range import PageRange
+from .page import BasePage, get_copy_of_base_page
+from .page_range import PageRange, merge_group
 from .page_directory import PageDirectory
 from .secondary import SecondaryIndex
 from .enums import DSAStructure, Operation
-from typing import List, Tuple, Dict
+from typing import Dict, Iterator, List, Tuple
+from concurrent.futures import Future
+from operator import itemgetter
+import heapq
 import queue
 import threading
 from .bufferpool import Bufferpool
 import multiprocessing as mp
 from multiprocessing.synchronize import Event
-from .mp_secondary import AsyncSecondaryIndex
+from .mp_secondary import AsyncSecondaryIndex, STOP_WORKER, INDEX_UPDATES
+from .shared_index import SharedIndex
+from .compression import DEFAULT_CODEC
+from .phys_page import PhysicalPage, numpy
+from .parallel_scan import ParallelScanExecutor
+import os
 import time
 
+# aggregates group_by computes, the first four in the order page ranges keep them for each group
+GROUP_BY_AGGREGATES: Tuple[str, ...] = ("count", "sum", "min", "max", "avg")
+
+
 class Record:
     def __init__(self, rid, key, columns):
         self.rid = rid
@@ -39,13 +60,17 @@ class Table:
         bufferpool: Bufferpool,
         cumulative=True,
         mp=False,
-        secondary_structure: DSAStructure = DSAStructure.DICTIONARY_SET
+        secondary_structure: DSAStructure = DSAStructure.DICTIONARY_SET,
+        codec: str = DEFAULT_CODEC,
+        secondary_shards: int = SECONDARY_INDEX_SHARDS,
     ):
         """
         `name`: string         #Table name
         `num_columns`: int     #Number of Columns: all columns are integer
         `key`: int             #Index of table key in columns
         `mp`: bool             #Whether to use multiprocessing
+        `codec`: str           #Codec pages of the table are compressed with on disk, see lstore.compression
+        `secondary_shards`: int #Worker processes the secondary index of each column is partitioned across with `mp`
         #: note, this will initialize the table with a single page range and all attributes
         with a secondary indices initially
         """
@@ -58,6 +83,9 @@ class Table:
         self.rid_generator: RID_Generator = RID_Generator()
         self.multiprocessing = mp
         self.cumulative = cumulative
+        self.codec: str = codec
+        self.secondary_shards: int = secondary_shards
+        self.bufferpool.disk.set_codec(self.name, codec)
         self.construct_secondary_indices(secondary_structure)
         self.page_ranges: list[PageRange] = [
             PageRange(
@@ -71,6 +99,7 @@ class Table:
         self.merge_thread = threading.Thread(target=self.__merge)
         self.merge_thread.daemon = True
         self.merge_thread.start()
+        self.scan_executor: ParallelScanExecutor | None = None
 
     def construct_secondary_indices(self, secondary_structure: DSAStructure = DSAStructure.DICTIONARY_SET):
         if self.multiprocessing == False:
@@ -85,42 +114,107 @@ class Table:
                 for i in range(self.num_columns)
             ]
         else:
-            self.request_queues = [mp.Queue() if i != self.primary_key_col else None for i in range(self.num_columns)]
-            self.response_queues: List[mp.Queue] = [mp.Queue() if i != self.primary_key_col else None for i in range(self.num_columns)]
-            self.stop_events = [mp.Event() if i != self.primary_key_col else None for i in range(self.num_columns)]
-            self.pending_requests: Dict[int: Tuple[Operation, int, int, int]] = {}
-            self.completed_requests: Dict[int: Tuple[Operation, int, int, int]] = {}
+            # the index of column i is hash partitioned across the workers of shards i * secondary_shards up to
+            # (i + 1) * secondary_shards, the lists below hold one entry per shard
+            num_shards: int = self.num_columns * self.secondary_shards
+            indexed: List[bool] = [shard // self.secondary_shards != self.primary_key_col for shard in range(num_shards)]
+            self.request_queues = [mp.Queue() if indexed[shard] else None for shard in range(num_shards)]
+            # every worker answers on the same queue, which the response dispatcher thread reads
+            self.response_queue: mp.Queue = mp.Queue()
+            self.stop_events = [mp.Event() if indexed[shard] else None for shard in range(num_shards)]
+            # requests sent to the workers and not answered yet, with the future their response resolves
+            self.pending_requests: Dict[int, Tuple[Tuple[Operation, int, int, int], Future]] = {}
             self.request_id_counter = 0
-            self.secondary_indices: list[AsyncSecondaryIndex | None] = [
+            # requests buffered for each worker until they are sent as one batch, and when the oldest was buffered
+            self.request_batches: List[List[Tuple[Operation, int, int, int]]] = [[] for _ in range(num_shards)]
+            self.request_batch_times: List[float] = [0.0] * num_shards
+            # taken around the request ids and batches, so threads searching at once do not lose each other's requests
+            self.request_lock = threading.RLock()
+            # snapshots the workers publish, searched without a round trip to them, and the number of updates sent
+            # to each worker, which a snapshot has to have applied to be searched
+            self.shared_indices: List[SharedIndex | None] = [
+                SharedIndex() if indexed[shard] and SHARED_SECONDARY_INDEX else None for shard in range(num_shards)
+            ]
+            self.sent_updates: List[int] = [0] * num_shards
+            self.shard_workers: List[AsyncSecondaryIndex | None] = [
                 AsyncSecondaryIndex(
                     self.name,
-                    f"attribute_{i}",
-                    self.request_queues[i],
-                    self.response_queues[i],
-                    self.stop_events[i],
-                    structure=secondary_structure
+                    # a column kept by a single worker saves its index under the same name as before it was sharded
+                    f"attribute_{shard}" if self.secondary_shards == 1
+                    else f"attribute_{shard // self.secondary_shards}_shard_{shard % self.secondary_shards}",
+                    self.request_queues[shard],
+                    self.response_queue,
+                    self.stop_events[shard],
+                    structure=secondary_structure,
+                    shared_index_name=self.shared_indices[shard].name if self.shared_indices[shard] else None,
                 )
-                if i != self.primary_key_col
+                if indexed[shard]
                 else None
+                for shard in range(num_shards)
+            ]
+            self.secondary_indices: list[List[AsyncSecondaryIndex] | None] = [
+                [self.shard_workers[shard] for shard in self.shards_of(i)] if i != self.primary_key_col else None
                 for i in range(self.num_columns)
             ]
-            for worker in self.secondary_indices:
+            for worker in self.shard_workers:
                 if worker:
                     worker.start()
+            self.response_dispatcher = threading.Thread(target=self.dispatch_responses, daemon=True)
+            self.response_dispatcher.start()
+
+    def shard_of(self, i: int, key: int) -> int:
+        """
+        #: returns the shard of the index of column `i` that keeps `key`
+        """
+        return i * self.secondary_shards + hash(key) % self.secondary_shards
+
+    def shards_of(self, i: int) -> range:
+        """
+        #: returns the shards of the index of column `i`
+        """
+        return range(i * self.secondary_shards, (i + 1) * self.secondary_shards)
 
     def stop_secondary_index(self, i):
-        self.stop_events[i].set()
-        self.secondary_indices[i].join()
+        for shard in self.shards_of(i):
+            self.flush_secondary_requests(shard)
+            self.stop_events[shard].set()
+            # wakes the worker up if it is sleeping on its queue
+            self.request_queues[shard].put(STOP_WORKER)
+        for shard in self.shards_of(i):
+            self.shard_workers[shard].join()
+            self.shard_workers[shard] = None
+            if self.shared_indices[shard] != None:
+                self.shared_indices[shard].unlink()
+                self.shared_indices[shard] = None
+            self.stop_events[shard] = None
+            self.request_queues[shard] = None
         self.secondary_indices[i] = None
-        self.stop_events[i] = None
-        self.request_queues[i] = None
-        self.response_queues[i] = None
 
     def stop_all_secondary_indices(self):
         for i in range(self.num_columns):
             if i != self.primary_key_col and self.secondary_indices[i]:
                 self.stop_secondary_index(i)
             else: continue
+        if self.response_dispatcher != None:
+            self.response_queue.put(STOP_WORKER)
+            self.response_dispatcher.join()
+            self.response_dispatcher = None
+            self.response_queue = None
+            self.request_lock = None
+
+    def dispatch_responses(self) -> None:
+        """
+        #: runs on the response dispatcher thread, takes the responses of every worker off the response queue
+        and resolves the future of each request with its response
+        #: stops when stop_all_secondary_indices puts STOP_WORKER on the queue
+        """
+        while True:
+            response = self.response_queue.get()
+            if response is STOP_WORKER:
+                return
+            response_id, result = response
+            _, future = self.pending_requests.pop(response_id)
+            future.set_result(result)
 
     def prepare_unpickle(self):
         self.continue_merge = True
@@ -129,19 +223,20 @@ class Table:
         self.merge_thread = threading.Thread(target=self.__merge)
         self.merge_thread.daemon = True
         self.merge_thread.start()
+        self.scan_executor = None
 
     def prepare_to_be_pickled(self):
         for page_range in self.page_ranges:
-            page_range.full_tail_pages.append(page_range.tail_pages[-1])
-            self.merge_queue.put((page_range.full_tail_pages.copy(), page_range.updated_base_pages.copy(), page_range.prev_tid))
-            page_range.full_tail_pages.clear
-            page_range.updated_base_pages.clear
+            self.merge_queue.put((page_range, *page_range.take_merge_work(include_latest_tail_page=True)))
         self.continue_merge = False
         while not self.finished_merge:
             pass
         self.merge_queue = None
         self.stop_merging = None
         self.merge_thread = None
+        if self.scan_executor != None:
+            self.scan_executor.shutdown()
+            self.scan_executor = None
         if self.multiprocessing:
             self.save_indices()
             self.stop_all_secondary_indices()
@@ -151,18 +246,12 @@ class Table:
                     secondary.save_index()
 
     def save_indices(self) -> None:
-        request_ids = []
-        for request_queue in self.request_queues:
-            if request_queue:
-                request_id = self.get_next_request_id()
-                request = (Operation.SAVE_INDEX, 0, 0, request_id)
-                self.pending_requests[request_id] = request
-                request_queue.put([request])
-                request_ids.append(request_id)
-
-        responses = self.wait_for_async_responses()
-        statuses = [response[1] if response and response[0] and response[0][3] in request_ids else None for response in responses]
-        return statuses
+        futures = [
+            self.submit_secondary_request(shard, (Operation.SAVE_INDEX, 0, 0, self.get_next_request_id()))
+            for shard, request_queue in enumerate(self.request_queues)
+            if request_queue
+        ]
+        return [future.result() for future in futures]
 
 
     def delete_record(self, primary_key: int) -> None:
@@ -190,8 +279,7 @@ class Table:
             try:
                 request_id = self.get_next_request_id()
                 request: Tuple[Operation, int, int, int] = (Operation.DELETE_RECORD, attribute, rid, request_id)
-                self.pending_requests[request_id] = request
-                self.request_queues[i].put([request])
+                self.queue_secondary_request(self.shard_of(i, attribute), request)
             except Exception as e:
                 print("error", e)
 
@@ -225,22 +313,190 @@ class Table:
             return True
         return False
 
+    def insert_records(self, records: list[list]) -> bool:
+        """
+        `records`: rows of column values
+        #: bulk version of insert_record, rows are written into whole base pages a column at a time and the
+        primary and secondary indices are updated once at the end of the batch
+        #: aborts before inserting anything if a primary key is already in the index or repeated in the batch
+        """
+        keys: list[int] = [record[self.primary_key_col] for record in records]
+        assert len(set(keys)) == len(keys)
+        assert all(len(record) == self.num_columns for record in records)
+        assert not any(self.index.key_exists(key) for key in keys)
+        rids: list[int] = self.load_records(records)
+        self.index.add_keys_rids(keys, rids)
+        self.add_to_secondary_indices_in_bulk(
+            {i: [record[i] for record in records] for i in range(self.num_columns) if i != self.primary_key_col}, rids
+        )
+        return True
+
+    def load_records(self, records: list[list]) -> list[int]:
+        """
+        `records`: rows of column values
+        #: writes rows into whole base pages a column at a time without touching the primary or secondary
+        indices, the rows cannot be found until index_loaded_records is called with their rids
+        #: returns the rids of the rows
+        """
+        rids: list[int] = []
+        while len(rids) < len(records):
+            last_page_range: PageRange = self.page_ranges[-1]
+            if last_page_range.is_full():
+                last_page_range = PageRange(
+                    self.num_columns,
+                    self.page_directory,
+                    self.rid_generator,
+                    self.name,
+                    self.bufferpool,
+                    self.cumulative,
+                )
+                self.page_ranges.append(last_page_range)
+            rids.extend(last_page_range.insert_records(records[len(rids) :]))
+        return rids
+
+    def index_loaded_records(self, batches: list[list[tuple[int, int]]]) -> None:
+        """
+        `batches`: for each batch of rows given to load_records, the (first rid, number of rids) runs of
+        consecutive rids it returned
+        #: reads the key and attribute columns of the rows back from their base pages, a page at a time, and
+        adds them to the primary and secondary indices a batch at a time
+        #: raises ValueError on a key that is indexed already or comes twice, the batch holding it is taken back
+        out of the primary index and its rows and those of the later batches are deleted
+        """
+        for batch_number, rid_runs in enumerate(batches):
+            added_keys: list[int] = []
+            for base_page, start_slot_num, rids in self.__get_loaded_pages(rid_runs):
+                keys: list[int] = base_page.get_column_values(self.primary_key_col, start_slot_num, start_slot_num + len(rids))
+                if len(set(keys)) != len(keys) or not self.index.key_to_rid.keys().isdisjoint(keys):
+                    duplicate_key: int = next(key for i, key in enumerate(keys) if self.index.key_exists(key) or key in keys[:i])
+                    for key in added_keys:
+                        self.index.delete_key(key)
+                    for later_rid_runs in batches[batch_number:]:
+                        for later_base_page, later_start_slot_num, later_rids in self.__get_loaded_pages(later_rid_runs):
+                            later_base_page.update_indir_of_records([LOGICAL_DELETE] * len(later_rids), later_start_slot_num)
+                    raise ValueError(f"duplicate key {duplicate_key}")
+                self.index.add_keys_rids(keys, rids)
+                added_keys.extend(keys)
+            # the secondary indices only see a batch once all of its keys made it into the primary index
+            for base_page, start_slot_num, rids in self.__get_loaded_pages(rid_runs):
+                self.add_to_secondary_indices_in_bulk(
+                    {
+                        i: base_page.get_column_values(i, start_slot_num, start_slot_num + len(rids))
+                        for i in range(self.num_columns)
+                        if i != self.primary_key_col and self.secondary_indices[i] != None
+                    },
+                    rids,
+                )
+
+    def __get_loaded_pages(self, rid_runs: list[tuple[int, int]]) -> Iterator[Tuple[BasePage, int, List[int]]]:
+        """
+        #: yields the base page, first slot and rids of each part of `rid_runs` that lies in a single base page
+        """
+        for first_rid, num_rids in rid_runs:
+            rid: int = first_rid
+            while rid < first_rid + num_rids:
+                base_page: BasePage = self.page_directory.get_page(self.rid_generator.base_rid_to_starting_rid(rid))
+                start_slot_num: int = self.rid_generator.get_slot_num(rid)
+                stop_slot_num: int = min(start_slot_num + first_rid + num_rids - rid, PhysicalPage.max_number_of_records)
+                rids: list[int] = list(range(rid, rid + stop_slot_num - start_slot_num))
+                yield base_page, start_slot_num, rids
+                rid += len(rids)
+
+    def add_to_secondary_indices_in_bulk(self, attributes: dict[int, list[int]], rids: list[int]) -> None:
+        """
+        `attributes`: the values of the records in each attribute column, by column index
+        #: adds the records to the secondary index of every column with a single call, or a single request
+        batch when the indices run in other processes
+        """
+        if self.multiprocessing:
+            self.update_secondary_indices_multiprocessing_in_bulk(attributes, rids)
+            return
+        for i, column_values in attributes.items():
+            if i == self.primary_key_col or self.secondary_indices[i] == None:
+                continue
+            attributes_and_rids = [(attribute, rid) for attribute, rid in zip(column_values, rids) if attribute != None]
+            self.secondary_indices[i].add_records([attribute for attribute, _ in attributes_and_rids], [rid for _, rid in attributes_and_rids])
+
     def brute_force_search(self, search_key: int, search_key_index: int) -> List[int]:
         """
         #: brute force search for all records with given key
         #: uses the keys within the primary key indexing structure
         """
-        recordRids: List[int] = self.index.key_to_rid.values()
-        matching_rids = []
-        for rid in recordRids:
-            page_range: PageRange = self.__find_page_range_with_rid(rid)
-            attribute_value: int = page_range.get_latest_column_value(
-                rid, search_key_index
-            )
-            if attribute_value == search_key:
-                matching_rids.append(rid)
+        return self.brute_force_range_search(search_key, search_key, search_key_index)
+
+    def brute_force_range_search(self, begin: int, end: int, search_key_index: int) -> List[int]:
+        """
+        #: brute force search for all records with a key between `begin` and `end` inclusive, in a single
+        pass over the records
+        #: scans the column a base page at a time, in physical order, skipping the pages whose zone maps rule out
+        any match
+        """
+        matching_rids: List[int] = []
+        for rids in self.map_page_ranges("search_range", search_key_index, begin, end, self.vectorized()):
+            matching_rids.extend(rids)
         return matching_rids
 
+    def sum_range(self, begin: int, end: int, aggregate_column_index: int) -> Tuple[int, int]:
+        """
+        #: sums the latest values of `aggregate_column_index` over the records with a primary key between `begin`
+        and `end` inclusive
+        #: returns the sum and the number of records summed
+        #: scans the key and aggregate columns a base page at a time with numpy when the range is wide enough for
+        a scan to beat reading each record, otherwise reads the records found by the primary index
+        """
+        rids: List[int] = list(self.index.locate_range(begin, end))
+        if not self.vectorized() or len(rids) < VECTORIZED_SUM_MIN_RECORDS:
+            projection: List[int] = [1 if i == aggregate_column_index else 0 for i in range(self.num_columns)]
+            return sum(columns[0] for columns in self.get_latest_column_values(rids, projection)), len(rids)
+        return sum(self.map_page_ranges("sum_range", self.primary_key_col, aggregate_column_index, begin, end)), len(rids)
+
+    def group_by(
+        self, group_column_index: int, aggregate_column_index: int, aggregate_functions: List[str], key_range: Tuple[int, int] | None = None
+    ) -> Dict[int, List[int | float]]:
+        """
+        `aggregate_functions`: names of the aggregates to compute, out of count, sum, min, max and avg
+        `key_range`: inclusive bounds of the primary keys of the records to aggregate, every record when None
+        #: hash aggregation in a single scan over the base pages, with the latest versions of updated records
+        read from the tail, each page range builds the aggregates of its groups and they are merged here
+        #: returns the aggregates of each group, in the order of `aggregate_functions`
+        """
+        assert 0 <= group_column_index < self.num_columns and 0 <= aggregate_column_index < self.num_columns
+        assert all(aggregate_function in GROUP_BY_AGGREGATES for aggregate_function in aggregate_functions)
+        begin, end = key_range if key_range != None else (None, None)
+        groups: Dict[int, List[int]] = dict()
+        for page_range_groups in self.map_page_ranges(
+            "group_by", self.primary_key_col, group_column_index, aggregate_column_index, begin, end, self.vectorized()
+        ):
+            for group_value, partial in page_range_groups.items():
+                merge_group(groups, group_value, partial)
+        return {
+            group_value: [
+                aggregates[0] if aggregate_function == "count"
+                else aggregates[1] / aggregates[0] if aggregate_function == "avg"
+                else aggregates[GROUP_BY_AGGREGATES.index(aggregate_function)]
+                for aggregate_function in aggregate_functions
+            ]
+            for group_value, aggregates in groups.items()
+        }
+
+    def vectorized(self) -> bool:
+        return USE_NUMPY and numpy != None
+
+    def map_page_ranges(self, method_name: str, *args) -> list:
+        """
+        #: calls PageRange.`method_name` with `args` on every page range of the table and returns the results in
+        page range order
+        #: tables with enough page ranges whose pages are kept on disk have the calls fanned out across worker
+        processes, see lstore.parallel_scan
+        """
+        page_ranges: List[PageRange] = list(self.page_ranges)
+        num_workers: int = PARALLEL_SCAN_WORKERS or os.cpu_count() or 1
+        if num_workers > 1 and len(page_ranges) >= PARALLEL_SCAN_MIN_PAGE_RANGES and ParallelScanExecutor.can_scan(self.bufferpool):
+            if self.scan_executor == None:
+                self.scan_executor = ParallelScanExecutor(num_workers)
+            return self.scan_executor.map(page_ranges, self.page_directory, self.bufferpool, method_name, args)
+        return [getattr(page_range, method_name)(*args) for page_range in page_ranges]
+
     def update_secondary_indices_multiprocessing(self, columns: list[int], rid: int) -> None:
         """
         #: updates secondary indices in parallel and asynchoronously
@@ -255,14 +511,80 @@ class Table:
                 try:
                     request_id = self.get_next_request_id()
                     request: Tuple[Operation, int, int, int] = (Operation.INSERT_RECORD, attribute, rid, request_id)
-                    self.pending_requests[request_id] = request
-                    self.request_queues[i].put([request])
+                    self.queue_secondary_request(self.shard_of(i, attribute), request)
                 except Exception as e:
                     print("Error in update_secondary_indices_multiprocessing")
 
+    def update_secondary_indices_multiprocessing_in_bulk(self, attributes: dict[int, list[int]], rids: list[int]) -> None:
+        """
+        #: sends the insertions of a whole batch to each secondary index worker as a single request batch, along
+        with any requests already buffered for it
+        """
+        for i, column_values in attributes.items():
+            if i == self.primary_key_col or self.secondary_indices[i] == None:
+                continue
+            with self.request_lock:
+                for attribute, rid in zip(column_values, rids):
+                    if attribute != None:
+                        request_id = self.get_next_request_id()
+                        request: Tuple[Operation, int, int, int] = (Operation.INSERT_RECORD, attribute, rid, request_id)
+                        self.track_request(request)
+                        self.request_batches[self.shard_of(i, attribute)].append(request)
+                for shard in self.shards_of(i):
+                    self.flush_secondary_requests(shard)
+
+    def queue_secondary_request(self, shard: int, request: Tuple[Operation, int, int, int]) -> None:
+        """
+        #: buffers an insertion or deletion for the secondary index worker of `shard`, the buffered requests
+        are sent as a single batch once SECONDARY_REQUEST_BATCH_SIZE of them are waiting or the oldest of them
+        has waited SECONDARY_REQUEST_BATCH_AGE
+        """
+        with self.request_lock:
+            self.track_request(request)
+            request_batch = self.request_batches[shard]
+            if not request_batch:
+                self.request_batch_times[shard] = time.monotonic()
+            request_batch.append(request)
+            if len(request_batch) >= SECONDARY_REQUEST_BATCH_SIZE or time.monotonic() - self.request_batch_times[shard] >= SECONDARY_REQUEST_BATCH_AGE:
+                self.flush_secondary_requests(shard)
+
+    def submit_secondary_request(self, shard: int, request: Tuple[Operation, int, int, int]) -> Future:
+        """
+        #: sends `request` to the secondary index worker of `shard` right away, in the same batch as the
+        requests buffered ahead of it
+        #: returns the future of the request, which the response dispatcher resolves with the response and which
+        asyncio callers can await through asyncio.wrap_future
+        """
+        with self.request_lock:
+            future: Future = self.track_request(request)
+            self.request_batches[shard].append(request)
+            self.flush_secondary_requests(shard)
+        return future
+
+    def track_request(self, request: Tuple[Operation, int, int, int]) -> Future:
+        """
+        #: registers `request` as pending before it is sent, so its response always finds its future
+        """
+        future: Future = Future()
+        self.pending_requests[request[3]] = (request, future)
+        return future
+
+    def flush_secondary_requests(self, shard: int | None = None) -> None:
+        """
+        #: sends the requests buffered for the worker of `shard`, or for every worker when None, as one batch
+        #: called before any request that has to see their effect, such as a search, and before waiting for responses
+        """
+        with self.request_lock:
+            for worker_shard in range(len(self.request_batches)) if shard == None else [shard]:
+                if self.request_batches[worker_shard] and self.request_queues[worker_shard] != None:
+                    request_batch, self.request_batches[worker_shard] = self.request_batches[worker_shard], []
+                    self.request_queues[worker_shard].put(request_batch)
+                    self.sent_updates[worker_shard] += sum(1 for request in request_batch if request[0] in INDEX_UPDATES)
+
     def get_next_request_id(self):
-        self.request_id_counter += 1
-        return self.request_id_counter
+        with self.request_lock:
+            self.request_id_counter += 1
+            return self.request_id_counter
 
     def update_secondary_indices_serially(self, columns: list[int], rid: int) -> None:
         for i, attribute in enumerate(columns):
@@ -287,11 +609,13 @@ class Table:
         """
         rid: int = self.index.get_rid(primary_key)
         page_range_with_record: PageRange = self.__find_page_range_with_rid(rid)
-        self.index.delete_key(primary_key)
         newPrimaryKey: int = primary_key
         if columns[self.primary_key_col] != None:
             newPrimaryKey = columns[self.primary_key_col]
-        self.index.add_key_rid(newPrimaryKey, rid)
+        # the index only changes when the primary key does
+        if newPrimaryKey != primary_key:
+            self.index.delete_key(primary_key)
+            self.index.add_key_rid(newPrimaryKey, rid)
         tid, diff_list = page_range_with_record.update_record(rid, columns)
         result = tid != INVALID_RID
         if self.multiprocessing == False:
@@ -300,13 +624,13 @@ class Table:
                     self.secondary_indices[i].delete_record(old_attribute, rid)
                     self.secondary_indices[i].add_record(new_attribute, rid)
         else:
-            self.delete_secondary_record_async(rid, columns)
-            self.update_secondary_indices_multiprocessing(columns, rid)
-        if result and page_range_with_record.full_tail_pages.__len__() == 3:
-            self.merge_queue.put((page_range_with_record.full_tail_pages.copy(), page_range_with_record.updated_base_pages.copy(), page_range_with_record.prev_tid))
-            page_range_with_record.full_tail_pages.clear
-            page_range_with_record.updated_base_pages.clear
-        page_range_with_record.prev_tid = tid
+            # like the serial indices, only the changed columns move from their old value to the new one
+            self.delete_secondary_record_async(rid, diff_list)
+            self.update_secondary_indices_multiprocessing(
+                [new_attribute if old_attribute != None else None for old_attribute, new_attribute in zip(diff_list, columns)], rid
+            )
+        if result and page_range_with_record.full_tail_pages.__len__() >= 3:
+            self.merge_queue.put((page_range_with_record, *page_range_with_record.take_merge_work()))
         return result
 
     def search_secondary_serially(self, search_key: int, search_key_index: int) -> List[int]:
@@ -317,6 +641,14 @@ class Table:
         """
         return self.secondary_indices[search_key_index].search_record(search_key)
 
+    def search_secondary_range_serially(self, begin: int, end: int, search_key_index: int) -> List[int]:
+        """
+        #: `begin` and `end` are the inclusive bounds of the secondary attribute
+        #: `search_key_index` is the index of the secondary attribute
+        #: returns the rids of the records with a key in the range, in key order
+        """
+        return self.secondary_indices[search_key_index].search_range(begin, end)
+
     def search_secondary_multiprocessing(self, search_key: int, search_key_index: int) -> Tuple[Tuple[Operation, int, int, int], List[int] | bool]:
         """
         #: `search_key` is the value of the secondary attribute
@@ -325,43 +657,63 @@ class Table:
         """
         request_id = self.get_next_request_id()
         request: Tuple[Operation, int, int, int] = (Operation.SEARCH_RECORD, search_key, search_key_index, request_id)
-        self.pending_requests[request_id] = request
-        self.request_queues[search_key_index].put([request])
-        return request, self.preempt_wait_for_async_response(search_key_index, request_id)
+        shard: int = self.shard_of(search_key_index, search_key)
+        rids: List[int] | None = self.search_shared_index(shard, "search_record", search_key)
+        if rids != None:
+            return request, rids
+        return request, self.submit_secondary_request(shard, request).result()
 
-    def preempt_wait_for_async_response(self, search_key_index: int,  request_id: int) -> List[int] | bool | Exception:
+    def search_secondary_range_multiprocessing(self, begin: int, end: int, search_key_index: int) -> Tuple[Tuple[Operation, int, int, int], List[int] | bool]:
         """
-        #: checks if the request has completed
+        #: `begin` and `end` are the inclusive bounds of the secondary attribute
+        #: `search_key_index` is the index of the secondary attribute
+        #: synchronous search for all records with a key in the range, in key order
+        #: the range spans every shard of the column, their keys are merged back into key order
         """
-        if request_id in self.completed_requests:
-            response = self.completed_requests[request_id]
-            del self.completed_requests[request_id]
-            return response
-        while True:
-            queue = self.response_queues[search_key_index]
-            if not queue.empty():
-                response_id, response = queue.get()
-                if response_id == request_id:
-                    # no need to return request, it is memory of caller
-                    del self.pending_requests[response_id]
-                    return response
-                else:
-                    self.completed_requests[response_id] = response
-                    del self.pending_requests[response_id]
+        request_id = self.get_next_request_id()
+        request: Tuple[Operation, int, int, int] = (Operation.SEARCH_RANGE, begin, end, request_id)
+        if self.secondary_shards == 1:
+            shard: int = search_key_index
+            rids: List[int] | None = self.search_shared_index(shard, "search_range", begin, end)
+            if rids != None:
+                return request, rids
+            return request, self.submit_secondary_request(shard, request).result()
+        shard_items: List[List[Tuple[int, List[int]]] | Future] = []
+        for shard in self.shards_of(search_key_index):
+            items: List[Tuple[int, List[int]]] | None = self.search_shared_index(shard, "search_range_items", begin, end)
+            if items == None:
+                # the searches of the shards that have to be sent to their workers run at once
+                items = self.submit_secondary_request(shard, (Operation.SEARCH_RANGE_ITEMS, begin, end, self.get_next_request_id()))
+            shard_items.append(items)
+        shard_items = [items.result() if isinstance(items, Future) else items for items in shard_items]
+        for items in shard_items:
+            if isinstance(items, Exception):
+                return request, items
+        return request, [rid for _, key_rids in heapq.merge(*shard_items, key=itemgetter(0)) for rid in key_rids]
+
+    def search_shared_index(self, shard: int, method_name: str, *args) -> List[int] | None:
+        """
+        #: calls SharedIndex.`method_name` with `args` on the snapshot the worker of `shard` published, after
+        sending the requests buffered for it
+        #: returns None when the shard has no shared index or the snapshot misses updates sent to the worker, the
+        search then goes to the worker, which answers once it applied them
+        """
+        shared_index: SharedIndex | None = self.shared_indices[shard]
+        if shared_index == None:
+            return None
+        with self.request_lock:
+            self.flush_secondary_requests(shard)
+            num_updates: int = self.sent_updates[shard]
+        return getattr(shared_index, method_name)(*args, num_updates)
 
     def wait_for_async_responses(self) -> List[Tuple[Tuple[Operation, int, int, int], List[int] | bool | Exception]]:
-        responses = []
-        while self.pending_requests:
-            for attribute_index, queue in enumerate(self.response_queues):
-                if queue == None:
-                    continue
-                while not queue.empty():
-                    # removes from queue the request and chekcs their status
-                    # note the checking for status must be modified to retry when failed
-                    response_id, response = queue.get()
-                    original_request = self.pending_requests.pop(response_id)
-                    responses.append((original_request, response))
-        return responses
+        """
+        #: sends every buffered request and blocks until all requests pending so far are answered
+        #: returns each of them with its response
+        """
+        self.flush_secondary_requests()
+        pending = list(self.pending_requests.values())
+        return [(request, future.result()) for request, future in pending]
 
     def get_latest_column_values(
         self, ridList: int | List[int], projected_columns_index: list
@@ -380,12 +732,7 @@ class Table:
         records: List[List[int]] = []
         for rid in ridList:
             page_range: PageRange = self.__find_page_range_with_rid(rid)
-            col_vals: List[int] = []
-            for col_ind in range(self.num_columns):
-                if projected_columns_index[col_ind] == 1:
-                    col_val: int = page_range.get_latest_column_value(rid, col_ind)
-                    col_vals.append(col_val)
-            records.append(col_vals)
+            records.append(page_range.get_latest_record(rid, projected_columns_index))
         return records
 
     def __find_page_range_with_rid(self, rid: int):
@@ -397,52 +744,65 @@ class Table:
         page_range: PageRange = self.__find_page_range_with_rid(rid)
         return page_range.get_latest_column_value(rid, -1)
 
-    def get_versioned_rid(self, rid: int, relative_version: int):
-        page_range: PageRange = self.__find_page_range_with_rid(rid)
-        for _ in range(0, relative_version):
-            rid = page_range.get_latest_column_value(rid, -1)
-        return rid
+    def get_versioned_column_values(self, ridList: List[int], projected_columns_index: list, relative_version: int) -> List[List[int]]:
+        """
+        #: same as get_latest_column_values, for the versions `relative_version` updates before the latest, or
+        the oldest version of records updated fewer times
+        """
+        if relative_version == 0:
+            return self.get_latest_column_values(ridList, projected_columns_index)
+        assert len(projected_columns_index) == self.num_columns
+        # tail records of non-cumulative tables only hold the updated columns, older versions are not kept whole
+        assert self.cumulative
+        return [
+            self.__find_page_range_with_rid(rid).get_versioned_record(rid, relative_version, projected_columns_index)
+            for rid in ridList
+        ]
 
     def __merge(self):
+        page_range: PageRange
         tail_page_set: list
         updated_base_page_list: list
         latest_tid: int
-        updated_rid = dict()
-        original_base_pages = dict()
-        copied_base_pages = dict()
-        record_per_page = self.num_records_in_page_range // MAX_BASE_PAGES_IN_PAGE_RANGE
+        num_updates: int
         while self.continue_merge or not self.merge_queue.empty():
-            updated_rid.clear
-            original_base_pages.clear
-            copied_base_pages.clear
-            tail_page_set, updated_base_page_list, latest_tid = self.merge_queue.get(True)
-            for base_page in updated_base_page_list:
-                copied_base_page = get_copy_of_base_page(base_page)
-                assert copied_base_page != base_page
-                original_base_pages[int(copied_base_page.get_starting_rid() / record_per_page)] = base_page
-                copied_base_pages[int(copied_base_page.get_starting_rid() / record_per_page)] = copied_base_page
-            last_tid = latest_tid
-            tail_page_set.reverse()
-            for tail_page in tail_page_set:
-                starting_tid = tail_page.get_starting_rid()
-                for tid in range(last_tid, starting_tid, 1):
-                    # For a given tid, find which base rid it updated using the base_rid column/page
-                    base_rid = tail_page.get_column_of_record(BASE_RID, self.rid_generator.get_slot_num(tid))
-                    # Since we check tid from recent to least recent, if a record was updated already, it has latest values
-                    if base_rid not in updated_rid:
-                        record: list = []
-                        for index in range(self.num_columns):
-                            record.append(0)
-                            record[index] = tail_page.get_column_of_record(index, self.rid_generator.get_slot_num(base_rid))
-                        copied_base_pages[int(base_rid / record_per_page)].update_record(record, self.rid_generator.get_slot_num(base_rid))
-                        updated_rid[base_rid] = copied_base_pages[int(base_rid / record_per_page)]
-                last_tid = starting_tid + 1
-            # Could add a lock for the page we are updating, loop on updated rids update mapping to value
-            for base_page_index in copied_base_pages:
-                copied_base_pages[base_page_index].tps = latest_tid
-                # self.page_directory.update_page(updated_rid)
-                # old_base_page = self.page_directory.get_page(copied_base_pages[base_page_index].get_starting_rid())
-                self.page_directory.insert_page(copied_base_pages[base_page_index].get_starting_rid(), copied_base_pages[base_page_index])
-                # new_base_page = self.page_directory.get_page(copied_base_pages[base_page_index].get_starting_rid())
-                # assert(old_base_page != new_base_page)
-        self.finished_merge = True
\ No newline at end of file
+            page_range, tail_page_set, updated_base_page_list, latest_tid, num_updates = self.merge_queue.get(True)
+            # tail records of non-cumulative tables only hold the updated columns, there is nothing to fold
+            if self.cumulative:
+                self.__merge_page_range(page_range, tail_page_set, updated_base_page_list, latest_tid, num_updates)
+        self.finished_merge = True
+
+    def __merge_page_range(self, page_range: PageRange, tail_page_set: list, updated_base_page_list: list, latest_tid: int, num_updates: int):
+        """
+        #: copies the base pages the records of `tail_page_set` update, writes the latest version of each
+        updated record into the copies, refreshes the zone maps of the copies and puts them in place
+        #: a full tail page can hold updates to base pages a previous merge already took, so every base page a
+        tail record refers to is merged, not only `updated_base_page_list`, or finish_merge would trust zone maps
+        that miss those updates
+        #: inserts into the range wait for the merge, so none lands in a page after it was copied
+        """
+        with page_range.insert_lock:
+            copied_base_pages: dict[int, BasePage] = dict()
+            merged_rids: set[int] = set()
+            # tail pages and the records in them are visited newest first, so the first tail record found for a
+            # base record is its latest version
+            for tail_page in reversed(tail_page_set):
+                num_records: int = tail_page.get_num_records()
+                *column_values, base_rids = tail_page.get_columns_values(list(range(self.num_columns)) + [BASE_RID], 0, num_records)
+                for tail_slot_num in range(num_records - 1, -1, -1):
+                    base_rid: int = base_rids[tail_slot_num]
+                    if base_rid in merged_rids:
+                        continue
+                    merged_rids.add(base_rid)
+                    starting_rid: int = self.rid_generator.base_rid_to_starting_rid(base_rid)
+                    copied_base_page = copied_base_pages.get(starting_rid)
+                    if copied_base_page == None:
+                        # the directory holds the page as of the previous merge
+                        copied_base_page = get_copy_of_base_page(self.page_directory.get_page(starting_rid))
+                        copied_base_pages[starting_rid] = copied_base_page
+                    record: list = [values[tail_slot_num] for values in column_values]
+                    copied_base_page.update_record(record, self.rid_generator.get_slot_num(base_rid))
+            for copied_base_page in copied_base_pages.values():
+                copied_base_page.tps = latest_tid
+                copied_base_page.refresh_zone_maps()
+            page_range.finish_merge(list(copied_base_pages.values()), tail_page_set, num_updates)
\ No newline at end of file
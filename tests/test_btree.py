@@ -0,0 +1,59 @@
+import pickle
+import random
+import unittest
+from lstore.btree import BPlusTree
+
+
+class TestBPlusTree(unittest.TestCase):
+    def test_insert_and_get(self) -> None:
+        tree = BPlusTree(order=4)
+        keys = list(range(500))
+        random.Random(0).shuffle(keys)
+        for key in keys:
+            tree[key] = key * 2
+        self.assertEqual(len(tree), 500)
+        for key in range(500):
+            self.assertEqual(tree[key], key * 2)
+        self.assertNotIn(500, tree)
+        self.assertEqual(tree.get(-1, "missing"), "missing")
+        with self.assertRaises(KeyError):
+            tree[1000]
+
+    def test_replace_value(self) -> None:
+        tree = BPlusTree(order=4)
+        tree[1] = "a"
+        tree[1] = "b"
+        self.assertEqual(len(tree), 1)
+        self.assertEqual(tree[1], "b")
+
+    def test_setdefault(self) -> None:
+        tree = BPlusTree(order=4)
+        values = tree.setdefault(3, [1])
+        values.append(2)
+        self.assertEqual(tree.setdefault(3, [7]), [1, 2])
+
+    def test_items_in_range(self) -> None:
+        tree = BPlusTree(order=4)
+        for key in range(0, 200, 2):
+            tree[key] = str(key)
+        self.assertEqual(list(tree.items(11, 19)), [(12, "12"), (14, "14"), (16, "16"), (18, "18")])
+        self.assertEqual([key for key, _ in tree.items(190)], [190, 192, 194, 196, 198])
+        self.assertEqual([key for key, _ in tree.items(end=4)], [0, 2, 4])
+        self.assertEqual(list(tree.items(201, 300)), [])
+        self.assertEqual(list(tree), list(range(0, 200, 2)))
+
+    def test_pickle(self) -> None:
+        tree = BPlusTree(order=4)
+        for key in range(10000, 0, -1):
+            tree[key] = {key}
+        loaded_tree: BPlusTree = pickle.loads(pickle.dumps(tree))
+        self.assertEqual(list(loaded_tree.items()), list(tree.items()))
+        loaded_tree[0] = {0}
+        loaded_tree[5000] = {1}
+        self.assertEqual(list(loaded_tree.items(4999, 5001)), [(4999, {4999}), (5000, {1}), (5001, {5001})])
+        self.assertEqual(len(loaded_tree), 10001)
+        self.assertEqual(len(pickle.loads(pickle.dumps(BPlusTree()))), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
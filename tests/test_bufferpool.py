@@ -1,4 +1,5 @@
 import unittest
+import time
 from unittest import mock
 from lstore import (
     PhysicalPage,
@@ -39,6 +40,19 @@ class TestBufferpool(unittest.TestCase):
         self.assertEqual(physical_page.is_dirty(), True)
         self.assertEqual(physical_page.can_evict(), True)
 
+    def test_insert_row(self) -> None:
+        bufferpool: Bufferpool = Bufferpool(self.max_bufferpool_pages, self.path)
+        disk_interface: mock.MagicMock = mock.Mock()
+        bufferpool.disk: DiskInterface = disk_interface
+        disk_interface.page_exists.return_value = False
+
+        self.assertTrue(bufferpool.insert_row(["page_id_1", "page_id_2", "page_id_3"], self.slot_num, [111, None, 333]))
+        # the page of the skipped value is not created
+        self.assertEqual(sorted(bufferpool.physical_pages), ["page_id_1", "page_id_3"])
+        self.assertEqual(bufferpool.get_page("page_id_1").get_column_value(self.slot_num), 111)
+        self.assertEqual(bufferpool.get_page("page_id_3").get_column_value(self.slot_num), 333)
+        self.assertTrue(bufferpool.get_page("page_id_3").is_dirty())
+
     # def test_insert_page_when_inserting_duplicate_page_in_memory(self) -> None:
     #     bufferpool: Bufferpool = Bufferpool(self.max_bufferpool_pages, self.path)
     #     disk_interface: mock.MagicMock = mock.Mock()
@@ -193,7 +207,10 @@ class TestBufferpool(unittest.TestCase):
         self.assertTrue(bufferpool.insert_page(self.page_id, self.slot_num, 832))
         physical_page: PhysicalPage = bufferpool.get_page(self.page_id)
         bufferpool.evict_all_pages()
-        disk_interface.write_page.assert_called_with(self.page_id, physical_page)
+        disk_interface.write_pages.assert_called_once_with([(self.page_id, physical_page)], None)
+        disk_interface.write_page.assert_not_called()
+        disk_interface.sync.assert_called_once()
+        self.assertEqual(len(bufferpool.physical_pages), 0)
 
     def test_evict_page(self) -> None:
         bufferpool: Bufferpool = Bufferpool(self.max_bufferpool_pages, self.path)
@@ -214,6 +231,105 @@ class TestBufferpool(unittest.TestCase):
         self.assertEqual(len(physical_pages), 1)
         self.__verify_physical_page_equality(physical_pages["page_id_2"], physical_page2)
 
+    def test_evict_page_least_recently_used(self) -> None:
+        bufferpool: Bufferpool = Bufferpool(self.max_bufferpool_pages, self.path)
+        disk_interface: mock.MagicMock = mock.Mock()
+        bufferpool.disk: DiskInterface = disk_interface
+        disk_interface.page_exists.return_value = False
+
+        self.assertTrue(bufferpool.insert_page("page_id_1", self.slot_num, 111))
+        self.assertTrue(bufferpool.insert_page("page_id_2", self.slot_num, 222))
+        physical_page2: PhysicalPage = bufferpool.get_page("page_id_2")
+        # touching page 1 makes page 2 the least recently used page
+        bufferpool.get_page("page_id_1")
+
+        self.assertTrue(bufferpool.insert_page("page_id_3", self.slot_num, 333))
+        disk_interface.write_page.assert_called_once_with("page_id_2", physical_page2)
+        self.assertEqual(list(bufferpool.physical_pages.keys()), ["page_id_1", "page_id_3"])
+
+    def test_evict_page_skips_pinned_pages(self) -> None:
+        bufferpool: Bufferpool = Bufferpool(self.max_bufferpool_pages, self.path)
+        disk_interface: mock.MagicMock = mock.Mock()
+        bufferpool.disk: DiskInterface = disk_interface
+        disk_interface.page_exists.return_value = False
+
+        self.assertTrue(bufferpool.insert_page("page_id_1", self.slot_num, 111))
+        self.assertTrue(bufferpool.insert_page("page_id_2", self.slot_num, 222))
+        bufferpool.get_page("page_id_1").pin_page()
+
+        bufferpool._evict_page()
+        self.assertEqual(list(bufferpool.physical_pages.keys()), ["page_id_1"])
+
+        bufferpool._evict_page()
+        self.assertEqual(list(bufferpool.physical_pages.keys()), ["page_id_1"])
+
+    def test_flush_all_pages(self) -> None:
+        bufferpool: Bufferpool = Bufferpool(4, self.path)
+        disk_interface: mock.MagicMock = mock.Mock()
+        bufferpool.disk: DiskInterface = disk_interface
+        disk_interface.page_exists.return_value = False
+
+        self.assertTrue(bufferpool.insert_page("page_id_1", self.slot_num, 111))
+        self.assertTrue(bufferpool.insert_page("page_id_2", self.slot_num, 222))
+        self.assertTrue(bufferpool.insert_page("page_id_3", self.slot_num, 333))
+        bufferpool._evict_page()
+        disk_interface.write_page.reset_mock()
+        bufferpool.get_page("page_id_2").pin_page()
+
+        bufferpool.flush_all_pages(2)
+        physical_page3: PhysicalPage = bufferpool.get_page("page_id_3")
+        disk_interface.write_pages.assert_called_once_with([("page_id_3", physical_page3)], 2)
+        disk_interface.sync.assert_called_once()
+        self.assertFalse(physical_page3.is_dirty())
+        self.assertTrue(bufferpool.get_page("page_id_2").is_dirty())
+        self.assertEqual(list(bufferpool.physical_pages.keys()), ["page_id_2", "page_id_3"])
+
+    def test_write_back_keeps_clean_frames(self) -> None:
+        bufferpool: Bufferpool = Bufferpool(4, self.path, num_clean_frames=2)
+        disk_interface: mock.MagicMock = mock.Mock()
+        bufferpool.disk: DiskInterface = disk_interface
+        disk_interface.page_exists.return_value = False
+
+        for page_num in range(1, 5):
+            self.assertTrue(bufferpool.insert_page(f"page_id_{page_num}", self.slot_num, page_num))
+        self.__wait_for_write_back(bufferpool, 2)
+        written_page_ids = [call.args[0] for call in disk_interface.write_page.call_args_list]
+        self.assertEqual(written_page_ids, ["page_id_1", "page_id_2"])
+        self.assertFalse(bufferpool.physical_pages["page_id_1"].is_dirty())
+        self.assertTrue(bufferpool.physical_pages["page_id_4"].is_dirty())
+
+        # the least recently used page was already written back, evicting it costs no write
+        bufferpool.stop_write_back()
+        disk_interface.write_page.reset_mock()
+        self.assertTrue(bufferpool.insert_page("page_id_5", self.slot_num, 5))
+        self.assertNotIn("page_id_1", bufferpool.physical_pages)
+        disk_interface.write_page.assert_not_called()
+
+    def test_write_back_page_dirtied_again_is_written_on_eviction(self) -> None:
+        bufferpool: Bufferpool = Bufferpool(2, self.path, num_clean_frames=2)
+        disk_interface: mock.MagicMock = mock.Mock()
+        bufferpool.disk: DiskInterface = disk_interface
+        disk_interface.page_exists.return_value = False
+
+        self.assertTrue(bufferpool.insert_page("page_id_1", self.slot_num, 111))
+        self.__wait_for_write_back(bufferpool, 0)
+        bufferpool.stop_write_back()
+        written_page: PhysicalPage = disk_interface.write_page.call_args.args[1]
+        self.assertEqual(written_page.get_column_value(self.slot_num), 111)
+
+        self.assertTrue(bufferpool.insert_page("page_id_1", self.slot_num, 112))
+        physical_page: PhysicalPage = bufferpool.get_page("page_id_1")
+        # the write-back wrote a snapshot, changes made after it are not lost
+        self.assertEqual(written_page.get_column_value(self.slot_num), 111)
+        bufferpool.evict_all_pages()
+        disk_interface.write_pages.assert_called_once_with([("page_id_1", physical_page)], None)
+
+    def __wait_for_write_back(self, bufferpool: Bufferpool, max_dirty_pages: int) -> None:
+        deadline = time.monotonic() + 5
+        while len(bufferpool.dirty_page_ids) > max_dirty_pages or bufferpool.pages_being_written:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+
     def __verify_physical_page_equality(self, physical_page1: PhysicalPage, physical_page2: PhysicalPage) -> None:
         self.assertEqual(physical_page1.get_data(), physical_page2.get_data())
         self.assertEqual(physical_page1.is_dirty(), physical_page2.is_dirty())
@@ -0,0 +1,46 @@
+import unittest
+import os
+from lstore import PHYSICAL_PAGE_SIZE
+from lstore.compression import (
+    CODECS,
+    CODECS_BY_NAME,
+    DEFAULT_CODEC,
+    get_codec,
+    encode_page,
+    decode_page,
+)
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.data = bytearray(PHYSICAL_PAGE_SIZE)
+        for offset in range(0, PHYSICAL_PAGE_SIZE, 64):
+            self.data[offset] = offset % 251
+
+    def test_every_codec_round_trips(self) -> None:
+        for codec in CODECS:
+            encoded_data = encode_page(self.data, codec.name)
+            self.assertEqual(encoded_data[0], codec.tag, codec.name)
+            self.assertEqual(decode_page(encoded_data), self.data, codec.name)
+
+    def test_compressible_page_shrinks(self) -> None:
+        self.assertLess(len(encode_page(self.data, DEFAULT_CODEC)), PHYSICAL_PAGE_SIZE)
+
+    def test_incompressible_page_is_stored_raw(self) -> None:
+        data = bytearray(os.urandom(PHYSICAL_PAGE_SIZE))
+        for codec_name in ("zlib-9", "lzma", "bz2"):
+            encoded_data = encode_page(data, codec_name)
+            self.assertEqual(encoded_data[0], CODECS_BY_NAME["none"].tag)
+            self.assertEqual(len(encoded_data), PHYSICAL_PAGE_SIZE + 1)
+            self.assertEqual(decode_page(encoded_data), data)
+
+    def test_tags_are_unique(self) -> None:
+        self.assertEqual(len({codec.tag for codec in CODECS}), len(CODECS))
+
+    def test_unknown_codec(self) -> None:
+        with self.assertRaises(ValueError):
+            get_codec("zlib-10")
+
+
+if __name__ == "__main__":
+    unittest.main()
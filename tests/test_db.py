@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from lstore import (
+    Bufferpool,
+    DiskInterface,
+    Query,
+)
+from lstore import db as db_module
+from lstore.db import Database
+
+
+class TestDatabase(unittest.TestCase):
+    def create_database(self) -> Database:
+        database = Database()
+        database.bufferpool = Bufferpool(1000, "")
+        database.bufferpool.disk: DiskInterface = mock.Mock()
+        database.bufferpool.disk.page_exists.return_value = False
+        return database
+
+    def test_load_table_from_generator(self) -> None:
+        database = self.create_database()
+        rows = ((key, key % 7, key * 2) for key in range(1, 3001))
+        with mock.patch.object(db_module, "LOAD_BATCH_SIZE", 1000):
+            table = database.load_table("table1", rows)
+        query = Query(table)
+        self.assertEqual(table.num_columns, 3)
+        for key in (1, 512, 513, 2999, 3000):
+            self.assertEqual(query.select(key, 0, [1, 1, 1])[0].columns, [key, key % 7, key * 2])
+        self.assertEqual(sorted(record.columns[0] for record in query.select(3, 1, [1, 1, 1])), [key for key in range(1, 3001) if key % 7 == 3])
+        self.assertTrue(query.insert(3001, 3, 0))
+        self.assertTrue(query.update(5, None, 3, None))
+        self.assertEqual(len(query.select(3, 1, [1, 1, 1])), len([key for key in range(1, 3001) if key % 7 == 3]) + 2)
+
+    def test_load_table_from_csv(self) -> None:
+        database = self.create_database()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rows.csv")
+            with open(path, "w") as csv_file:
+                csv_file.write("key,a,b\n")
+                csv_file.writelines(f"{key},{key % 5},7\n" for key in range(1, 101))
+            table = database.load_table("table1", path, header=True)
+        query = Query(table)
+        self.assertEqual(query.select(42, 0, [1, 1, 1])[0].columns, [42, 2, 7])
+        self.assertEqual(query.sum(1, 100, 2), 700)
+
+    def test_close_closes_disk(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            database = Database()
+            database.open(directory)
+            table = database.create_table("table1", 3, 0)
+            # the secondary indices would be saved to the working directory
+            table.secondary_indices = [None, None, None]
+            Query(table).insert(1, 2, 3)
+            database.close()
+            # the segment files the pages were written to are closed
+            self.assertEqual(database.bufferpool.disk.file_descriptors, {})
+
+    def test_load_table_duplicate_key(self) -> None:
+        database = self.create_database()
+        database.create_table("table1", 3, 0)
+        Query(database.get_table("table1")).insert(5, 0, 0)
+        with mock.patch.object(db_module, "LOAD_BATCH_SIZE", 2):
+            with self.assertRaises(ValueError):
+                database.load_table("table1", [[1, 1, 1], [2, 2, 2], [3, 3, 3], [5, 5, 5]])
+        table = database.get_table("table1")
+        self.assertTrue(table.index.key_exists(1))
+        self.assertTrue(table.index.key_exists(2))
+        self.assertFalse(table.index.key_exists(3))
+        self.assertEqual(Query(table).select(5, 0, [1, 1, 1])[0].columns, [5, 0, 0])
+        # the rows of the batch rolled back are deleted, scans skip them
+        self.assertEqual(table.brute_force_search(3, 1), [])
+        self.assertEqual(table.brute_force_search(5, 1), [])
+
+    def test_load_table_key_repeated_in_input(self) -> None:
+        database = self.create_database()
+        rows = [[1, 1, 1], [2, 2, 2], [3, 3, 3], [4, 4, 4], [5, 5, 5], [3, 6, 6], [7, 7, 7]]
+        with mock.patch.object(db_module, "LOAD_BATCH_SIZE", 2):
+            with self.assertRaisesRegex(ValueError, "duplicate key 3"):
+                database.load_table("table1", rows)
+        table = database.get_table("table1")
+        query = Query(table)
+        self.assertEqual([key for key in range(1, 8) if table.index.key_exists(key)], [1, 2, 3, 4])
+        self.assertEqual(query.select(3, 0, [1, 1, 1])[0].columns, [3, 3, 3])
+        self.assertEqual(query.sum(1, 7, 1), 10)
+        self.assertEqual(table.brute_force_range_search(5, 7, 1), [])
+        self.assertEqual(query.select(2, 1, [1, 1, 1])[0].columns, [2, 2, 2])
+        self.assertEqual(query.select(5, 1, [1, 1, 1]), [])
+        # the keys rolled back can be inserted again
+        self.assertTrue(query.insert(5, 8, 8))
+        self.assertEqual(query.select(5, 0, [1, 1, 1])[0].columns, [5, 8, 8])
+
+
+if __name__ == "__main__":
+    unittest.main()
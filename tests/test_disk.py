@@ -5,9 +5,17 @@ from io import BytesIO
 from lstore import (
     PhysicalPage,
     DiskInterface,
+    SegmentDiskInterface,
+    MmapDiskInterface,
     PHYSICAL_PAGE_SIZE,
 )
+from lstore.compression import encode_page, decode_page, CODECS_BY_NAME
+from lstore.config import SEGMENT_SLOT_SIZE, SEGMENT_GROWTH_SLOTS
+import tempfile
+import pickle
+import shutil
 import zlib
+import os
 
 
 class TestDiskInterface(unittest.TestCase):
@@ -38,20 +46,208 @@ class TestDiskInterface(unittest.TestCase):
 
         mock_file.seek(0)
         mock_open.assert_called_with(f"{self.path_of_file}/file", "wb")
-        self.assertEqual(zlib.decompress(mock_file.read()), p.get_data())
+        self.assertEqual(decode_page(mock_file.read()), p.get_data())
 
     @patch("builtins.open")
     def test_get_page(self, mock_open) -> None:
         disk_interface = DiskInterface(self.path_of_file)
         data = bytearray(PHYSICAL_PAGE_SIZE)
         data[0:5] = b"12345"
-        mock_file = BytesIO(zlib.compress(data))
+        mock_file = BytesIO(encode_page(data))
         mock_open().__enter__ = MagicMock(return_value=mock_file)
         page: PhysicalPage = disk_interface.get_page("file")
 
         mock_file.seek(0)
         mock_open.assert_called_with(f"{self.path_of_file}/file", "rb")
-        self.assertEqual(zlib.decompress(mock_file.read()), page.get_data())
+        self.assertEqual(decode_page(mock_file.read()), page.get_data())
+
+    @patch("builtins.open")
+    def test_write_page_with_table_codec(self, mock_open) -> None:
+        disk_interface = DiskInterface(self.path_of_file)
+        disk_interface.set_codec("table", "bz2")
+        p = PhysicalPage()
+        p.insert_value(100, 1)
+        mock_file = BytesIO()
+        mock_open().__enter__ = MagicMock(return_value=mock_file)
+        disk_interface.write_page("table_1_0_0", p)
+
+        mock_file.seek(0)
+        encoded_data = mock_file.read()
+        self.assertEqual(encoded_data[0], CODECS_BY_NAME["bz2"].tag)
+        self.assertEqual(decode_page(encoded_data), p.get_data())
+
+    def test_write_pages(self) -> None:
+        path = tempfile.mkdtemp()
+        try:
+            disk_interface = DiskInterface(path)
+            pages = []
+            for page_num in range(4):
+                page = PhysicalPage()
+                page.insert_value(page_num, 1)
+                pages.append((f"table_1_{page_num}_0", page))
+            disk_interface.write_pages(pages, 2)
+            for page_id, page in pages:
+                self.assertEqual(disk_interface.get_page(page_id).get_data(), page.get_data())
+        finally:
+            shutil.rmtree(path)
+
+    def test_sync_flushes_written_files_and_directory(self) -> None:
+        path = tempfile.mkdtemp()
+        try:
+            disk_interface = DiskInterface(path)
+            page = PhysicalPage()
+            disk_interface.write_pages([("table_1_0_0", page), ("table_1_1_0", page)])
+            disk_interface.write_page("table_1_2_0", page)
+            disk_interface.delete_page("table_1_1_0")
+            with patch("os.fsync") as fsync, patch("os.open", wraps=os.open) as os_open:
+                disk_interface.sync()
+                synced = [call.args[0] for call in os_open.call_args_list]
+                self.assertEqual(synced, [f"{path}/table_1_0_0", f"{path}/table_1_2_0", path])
+                self.assertEqual(fsync.call_count, 3)
+                # nothing was written since
+                disk_interface.sync()
+                self.assertEqual(fsync.call_count, 3)
+        finally:
+            shutil.rmtree(path)
+
+    def test_set_unknown_codec(self) -> None:
+        disk_interface = DiskInterface(self.path_of_file)
+        with self.assertRaises(ValueError):
+            disk_interface.set_codec("table", "snappy")
+
+
+
+class TestSegmentDiskInterface(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.disk_interface = SegmentDiskInterface(self.path)
+
+    def tearDown(self):
+        self.disk_interface.close()
+        shutil.rmtree(self.path)
+
+    def make_page(self, value: int) -> PhysicalPage:
+        page = PhysicalPage()
+        page.insert_value(value, 1)
+        return page
+
+    def test_write_and_get_page(self) -> None:
+        self.assertFalse(self.disk_interface.page_exists("table_1_0_0"))
+        page = self.make_page(100)
+        self.disk_interface.write_page("table_1_0_0", page)
+        self.assertTrue(self.disk_interface.page_exists("table_1_0_0"))
+        self.assertEqual(self.disk_interface.get_page("table_1_0_0").get_data(), page.get_data())
+
+    def test_pages_of_a_table_share_one_preallocated_file(self) -> None:
+        self.disk_interface.write_page("table_1_0_0", self.make_page(1))
+        self.disk_interface.write_page("table_-1_0", self.make_page(2))
+        self.disk_interface.write_page("other_table_1_0_0", self.make_page(3))
+        self.disk_interface.write_page("other_table_-1_0", self.make_page(4))
+        self.assertEqual(sorted(os.listdir(self.path)), ["other_table.seg", "table.seg"])
+        self.assertEqual(os.path.getsize(f"{self.path}/table.seg"), SEGMENT_GROWTH_SLOTS * SEGMENT_SLOT_SIZE)
+        for page_id, value in (("table_1_0_0", 1), ("table_-1_0", 2), ("other_table_1_0_0", 3), ("other_table_-1_0", 4)):
+            self.assertEqual(self.disk_interface.get_page(page_id).get_column_value(1), value)
+
+    def test_rewrite_page_in_place(self) -> None:
+        self.disk_interface.write_page("table_1_0_0", self.make_page(1))
+        _, slot, _ = self.disk_interface.catalog["table_1_0_0"]
+        self.disk_interface.write_page("table_1_0_0", self.make_page(2))
+        self.assertEqual(self.disk_interface.catalog["table_1_0_0"][1], slot)
+        self.assertEqual(self.disk_interface.get_page("table_1_0_0").get_column_value(1), 2)
+
+    def test_deleted_slot_is_reused(self) -> None:
+        self.disk_interface.write_page("table_1_0_0", self.make_page(1))
+        self.disk_interface.write_page("table_1_1_0", self.make_page(2))
+        _, slot, _ = self.disk_interface.catalog["table_1_0_0"]
+        self.disk_interface.delete_page("table_1_0_0")
+        self.assertFalse(self.disk_interface.page_exists("table_1_0_0"))
+        self.disk_interface.write_page("table_1_2_0", self.make_page(3))
+        self.assertEqual(self.disk_interface.catalog["table_1_2_0"][1], slot)
+        self.assertEqual(self.disk_interface.get_page("table_1_1_0").get_column_value(1), 2)
+
+    def test_codec_change_keeps_existing_pages_readable(self) -> None:
+        self.disk_interface.set_codec("table", "lzma")
+        self.disk_interface.write_page("table_1_0_0", self.make_page(1))
+        self.disk_interface.set_codec("table", "none")
+        self.disk_interface.write_page("table_1_1_0", self.make_page(2))
+        self.assertEqual(self.disk_interface.catalog["table_1_1_0"][2], PHYSICAL_PAGE_SIZE + 1)
+        self.assertEqual(self.disk_interface.get_page("table_1_0_0").get_column_value(1), 1)
+        self.assertEqual(self.disk_interface.get_page("table_1_1_0").get_column_value(1), 2)
+
+    def test_write_pages_allocates_slots_in_page_id_order(self) -> None:
+        self.disk_interface.set_codec("table", "bz2")
+        page_ids = [f"table_1_{page_num}_0" for page_num in range(5, -1, -1)]
+        self.disk_interface.write_pages([(page_id, self.make_page(int(page_id[8]))) for page_id in page_ids], 3)
+        for slot, page_id in enumerate(sorted(page_ids)):
+            self.assertEqual(self.disk_interface.catalog[page_id][1], slot)
+            self.assertEqual(self.disk_interface.get_page(page_id).get_column_value(1), int(page_id[8]))
+
+    def test_catalog_survives_pickling(self) -> None:
+        self.disk_interface.write_page("table_1_0_0", self.make_page(7))
+        self.disk_interface.sync()
+        reopened_disk_interface: SegmentDiskInterface = pickle.loads(pickle.dumps(self.disk_interface))
+        try:
+            self.assertTrue(reopened_disk_interface.page_exists("table_1_0_0"))
+            self.assertEqual(reopened_disk_interface.get_page("table_1_0_0").get_column_value(1), 7)
+        finally:
+            reopened_disk_interface.close()
+
+
+
+class TestMmapDiskInterface(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.disk_interface = MmapDiskInterface(self.path)
+
+    def tearDown(self):
+        self.disk_interface.close()
+        shutil.rmtree(self.path)
+
+    def make_page(self, value: int) -> PhysicalPage:
+        page = PhysicalPage()
+        page.insert_value(value, 1)
+        return page
+
+    def test_write_and_get_page(self) -> None:
+        page = self.make_page(100)
+        self.disk_interface.write_page("table_1_0_0", page)
+        self.assertTrue(self.disk_interface.page_exists("table_1_0_0"))
+        self.assertEqual(bytes(self.disk_interface.get_page("table_1_0_0").get_data()), bytes(page.get_data()))
+
+    def test_pages_are_stored_uncompressed(self) -> None:
+        self.disk_interface.write_page("table_1_0_0", self.make_page(1))
+        self.disk_interface.write_page("table_1_1_0", self.make_page(2))
+        self.disk_interface.sync()
+        with open(f"{self.path}/table.pages", "rb") as file:
+            data = file.read()
+        self.assertEqual(len(data), SEGMENT_GROWTH_SLOTS * PHYSICAL_PAGE_SIZE)
+        self.assertEqual(data[PHYSICAL_PAGE_SIZE : 2 * PHYSICAL_PAGE_SIZE], bytes(self.make_page(2).get_data()))
+
+    def test_loaded_page_wraps_mapping(self) -> None:
+        self.disk_interface.write_page("table_1_0_0", self.make_page(1))
+        page: PhysicalPage = self.disk_interface.get_page("table_1_0_0")
+        page.insert_value(5, 1)
+        self.assertEqual(self.disk_interface.get_page("table_1_0_0").get_column_value(1), 5)
+        self.disk_interface.write_page("table_1_0_0", page)
+        self.assertEqual(self.disk_interface.get_page("table_1_0_0").get_column_value(1), 5)
+
+    def test_pages_in_later_chunks(self) -> None:
+        for page_num in range(SEGMENT_GROWTH_SLOTS + 1):
+            self.disk_interface.write_page(f"table_1_{page_num}_0", self.make_page(page_num))
+        self.assertEqual(len(self.disk_interface.mappings), 2)
+        self.assertEqual(self.disk_interface.get_page(f"table_1_{SEGMENT_GROWTH_SLOTS}_0").get_column_value(1), SEGMENT_GROWTH_SLOTS)
+
+    def test_catalog_survives_pickling(self) -> None:
+        page: PhysicalPage = self.make_page(7)
+        self.disk_interface.write_page("table_1_0_0", page)
+        self.disk_interface.sync()
+        reopened_disk_interface: MmapDiskInterface = pickle.loads(pickle.dumps(self.disk_interface))
+        try:
+            self.assertEqual(reopened_disk_interface.get_page("table_1_0_0").get_column_value(1), 7)
+            copied_page: PhysicalPage = pickle.loads(pickle.dumps(reopened_disk_interface.get_page("table_1_0_0")))
+            self.assertIsInstance(copied_page.get_data(), bytearray)
+        finally:
+            reopened_disk_interface.close()
 
 
 if __name__ == "__main__":
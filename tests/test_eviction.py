@@ -0,0 +1,140 @@
+import unittest
+from unittest import mock
+from lstore import (
+    PhysicalPage,
+    DiskInterface,
+    Bufferpool,
+    EvictionPolicy,
+    LRUPolicy,
+    ClockPolicy,
+    TwoQueuePolicy,
+    ARCPolicy,
+)
+
+
+class EvictionPolicyTests:
+    def init_policy(self) -> EvictionPolicy:
+        raise NotImplementedError
+
+    def create_bufferpool(self, max_bufferpool_pages: int) -> Bufferpool:
+        bufferpool: Bufferpool = Bufferpool(max_bufferpool_pages, "", self.init_policy())
+        disk_interface: mock.MagicMock = mock.Mock()
+        bufferpool.disk: DiskInterface = disk_interface
+        disk_interface.page_exists.return_value = False
+        return bufferpool
+
+    def test_bufferpool_never_exceeds_capacity(self) -> None:
+        bufferpool: Bufferpool = self.create_bufferpool(4)
+        for page_num in range(20):
+            self.assertTrue(bufferpool.insert_page(f"page_id_{page_num}", 0, page_num))
+            self.assertLessEqual(len(bufferpool.physical_pages), 4)
+        self.assertEqual(bufferpool.disk.write_page.call_count, 16)
+
+    def test_evict_skips_pinned_pages(self) -> None:
+        bufferpool: Bufferpool = self.create_bufferpool(2)
+        bufferpool.insert_page("page_id_1", 0, 1)
+        bufferpool.insert_page("page_id_2", 0, 2)
+        bufferpool.get_page("page_id_1").pin_page()
+        bufferpool.get_page("page_id_2").pin_page()
+
+        bufferpool._evict_page()
+        self.assertEqual(len(bufferpool.physical_pages), 2)
+
+        bufferpool.get_page("page_id_2").unpin_page()
+        bufferpool._evict_page()
+        self.assertEqual(list(bufferpool.physical_pages.keys()), ["page_id_1"])
+
+    def test_evict_from_empty_policy(self) -> None:
+        policy: EvictionPolicy = self.init_policy()
+        policy.set_capacity(2)
+        self.assertIsNone(policy.evict(dict()))
+
+    def test_hot_page_survives_scan(self) -> None:
+        bufferpool: Bufferpool = self.create_bufferpool(4)
+        bufferpool.insert_page("hot_page", 0, 0)
+        for page_num in range(12):
+            bufferpool.get_page("hot_page")
+            bufferpool.insert_page(f"scan_page_{page_num}", 0, page_num)
+        self.assertIn("hot_page", bufferpool.physical_pages)
+
+
+class TestLRUPolicy(EvictionPolicyTests, unittest.TestCase):
+    def init_policy(self) -> EvictionPolicy:
+        return LRUPolicy()
+
+    def test_evicts_least_recently_used(self) -> None:
+        policy: LRUPolicy = self.init_policy()
+        physical_pages = {page_id: PhysicalPage() for page_id in ("a", "b", "c")}
+        for page_id in physical_pages:
+            policy.page_added(page_id)
+        policy.page_accessed("a")
+        self.assertEqual(policy.evict(physical_pages), "b")
+        self.assertEqual(policy.evict(physical_pages), "c")
+        self.assertEqual(policy.evict(physical_pages), "a")
+
+
+class TestClockPolicy(EvictionPolicyTests, unittest.TestCase):
+    def init_policy(self) -> EvictionPolicy:
+        return ClockPolicy()
+
+    def test_referenced_page_gets_second_chance(self) -> None:
+        policy: ClockPolicy = self.init_policy()
+        physical_pages = {page_id: PhysicalPage() for page_id in ("a", "b", "c")}
+        for page_id in physical_pages:
+            policy.page_added(page_id)
+        policy.page_accessed("a")
+        self.assertEqual(policy.evict(physical_pages), "b")
+        policy.page_added("d")
+        self.assertEqual(policy.ring[1], "d")
+        self.assertEqual(policy.evict(physical_pages), "c")
+
+
+class TestTwoQueuePolicy(EvictionPolicyTests, unittest.TestCase):
+    def init_policy(self) -> EvictionPolicy:
+        return TwoQueuePolicy()
+
+    def test_hot_page_survives_scan(self) -> None:
+        # 2Q ignores repeated hits while a page is in its first-seen FIFO, a page only becomes hot once it
+        # is referenced again after being evicted from there
+        bufferpool: Bufferpool = self.create_bufferpool(4)
+        for page_num in range(5):
+            bufferpool.insert_page("hot_page" if page_num == 0 else f"warmup_page_{page_num}", 0, page_num)
+        self.assertNotIn("hot_page", bufferpool.physical_pages)
+        bufferpool.insert_page("hot_page", 0, 0)
+        for page_num in range(12):
+            bufferpool.get_page("hot_page")
+            bufferpool.insert_page(f"scan_page_{page_num}", 0, page_num)
+        self.assertIn("hot_page", bufferpool.physical_pages)
+
+    def test_page_seen_twice_is_promoted(self) -> None:
+        policy: TwoQueuePolicy = self.init_policy()
+        policy.set_capacity(4)
+        physical_pages = {page_id: PhysicalPage() for page_id in ("a", "b")}
+        policy.page_added("a")
+        policy.page_added("b")
+        self.assertEqual(policy.evict(physical_pages), "a")
+        self.assertIn("a", policy.a1_out)
+        policy.page_added("a")
+        self.assertIn("a", policy.am)
+        self.assertNotIn("a", policy.a1_out)
+
+
+class TestARCPolicy(EvictionPolicyTests, unittest.TestCase):
+    def init_policy(self) -> EvictionPolicy:
+        return ARCPolicy()
+
+    def test_ghost_hit_adapts_target(self) -> None:
+        policy: ARCPolicy = self.init_policy()
+        policy.set_capacity(2)
+        physical_pages = {page_id: PhysicalPage() for page_id in ("a", "b")}
+        policy.page_added("a")
+        policy.page_added("b")
+        self.assertEqual(policy.evict(physical_pages), "a")
+        self.assertIn("a", policy.b1)
+        policy.page_added("a")
+        self.assertGreater(policy.p, 0)
+        self.assertIn("a", policy.t2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -42,6 +42,34 @@ class TestIndex(unittest.TestCase):
         index.add_key_rid(key, 2)
         self.assertTrue(index.key_exists(key))
 
+    def test_locate_range(self) -> None:
+        index: Index = Index(self.table)
+        index.add_keys_rids([10, 20, 30], [1, 2, 3])
+        index.add_key_rid(5, 4)
+        index.add_key_rid(25, 5)
+        index.delete_key(20)
+        index.delete_key(5)
+        index.add_key_rid(20, 6)
+        self.assertEqual(list(index.locate_range(10, 30)), [1, 6, 5, 3])
+        self.assertEqual(list(index.locate_range(11, 24)), [6])
+        self.assertEqual(list(index.locate_range(31, 1000)), [])
+        index.add_key_rid(1, 7)
+        self.assertEqual(list(index.locate_range(0, 10)), [7, 1])
+
+    def test_deleted_keys_are_compacted(self) -> None:
+        index: Index = Index(self.table)
+        index.add_keys_rids(list(range(10)), list(range(100, 110)))
+        for key in range(5):
+            index.delete_key(key)
+        # deleted keys stay in the sorted keys until they outnumber the live ones
+        self.assertEqual(len(index.sorted_keys), 10)
+        self.assertEqual(list(index.locate_range(0, 9)), list(range(105, 110)))
+        index.add_key_rid(2, 7)
+        index.delete_key(5)
+        index.delete_key(6)
+        self.assertEqual(index.sorted_keys, [2, 7, 8, 9])
+        self.assertEqual(list(index.locate_range(0, 9)), [7, 107, 108, 109])
+
     def test_delete_existent_key(self) -> None:
         index: Index = Index(self.table)
         key: int = 1
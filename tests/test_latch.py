@@ -0,0 +1,69 @@
+import unittest
+import threading
+import time
+from lstore.latch import ReadWriteLatch
+
+
+class TestReadWriteLatch(unittest.TestCase):
+    def test_readers_share_the_latch(self) -> None:
+        latch = ReadWriteLatch()
+        both_reading = threading.Barrier(2, timeout=5)
+
+        def read() -> None:
+            with latch.shared:
+                both_reading.wait()
+
+        readers = [threading.Thread(target=read) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        self.assertFalse(both_reading.broken)
+        self.assertEqual(latch.num_readers, 0)
+
+    def test_writer_excludes_readers(self) -> None:
+        latch = ReadWriteLatch()
+        events = []
+        latch.acquire_exclusive()
+
+        def read() -> None:
+            with latch.shared:
+                events.append("read")
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)
+        events.append("write")
+        latch.release_exclusive()
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
+
+    def test_waiting_writer_blocks_new_readers(self) -> None:
+        latch = ReadWriteLatch()
+        events = []
+        latch.acquire_shared()
+
+        def write() -> None:
+            with latch.exclusive:
+                events.append("write")
+
+        def read() -> None:
+            with latch.shared:
+                events.append("read")
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while latch.num_waiting_writers == 0:
+            time.sleep(0.001)
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)
+        self.assertEqual(events, [])
+        latch.release_shared()
+        writer.join()
+        reader.join()
+        self.assertEqual(events, ["write", "read"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,7 @@ from lstore import (
     AsyncSecondaryIndex,
     Operation,
 )
+from lstore.mp_secondary import STOP_WORKER
 import copy
 import time
 import multiprocessing as mp
@@ -89,6 +90,52 @@ class TestSecondary(unittest.TestCase):
             raise
         table.stop_all_secondary_indices()
 
+    def test_select_range_multiprocessing_btree(self) -> None:
+        self.delete_all_saved_indices()
+        bufferpool = self.create_bufferpool()
+        table: Table = Table(
+            TABLE_NAME,
+            3,
+            0,
+            bufferpool,
+            mp=True,
+            secondary_structure=DSAStructure.B_TREE_SET,
+        )
+        records: list[list[int]] = [[key, key % 10, RECORD_VALUE] for key in range(1, 41)]
+        for record in records:
+            table.insert_record(record)
+        table.wait_for_async_responses()
+        request, response = table.search_secondary_range_multiprocessing(3, 4, 1)
+        table.stop_all_secondary_indices()
+        expected_rids = [table.index.get_rid(record[0]) for record in records if record[1] == 3]
+        expected_rids += [table.index.get_rid(record[0]) for record in records if record[1] == 4]
+        self.assertEqual(sorted(response[:4]), sorted(expected_rids[:4]))
+        self.assertEqual(sorted(response), sorted(expected_rids))
+
+    def test_select_multiprocessing_btree_dict(self) -> None:
+        self.delete_all_saved_indices()
+        bufferpool = self.create_bufferpool()
+        table: Table = Table(
+            TABLE_NAME,
+            3,
+            0,
+            bufferpool,
+            mp=True,
+            secondary_structure=DSAStructure.B_TREE_DICT,
+        )
+        records: list[list[int]] = [[key, key % 10, RECORD_VALUE] for key in range(1, 41)]
+        for record in records:
+            table.insert_record(record)
+        table.delete_record(3)
+        table.wait_for_async_responses()
+        _, response = table.search_secondary_multiprocessing(3, 1)
+        _, range_response = table.search_secondary_range_multiprocessing(3, 4, 1)
+        table.stop_all_secondary_indices()
+        expected_rids = [table.index.get_rid(record[0]) for record in records if record[1] == 3 and record[0] != 3]
+        self.assertEqual(list(response), expected_rids)
+        expected_rids += [table.index.get_rid(record[0]) for record in records if record[1] == 4]
+        self.assertEqual(sorted(range_response), sorted(expected_rids))
+
     def test_save_load_multiprocessing_single(self) -> None:
         self.delete_all_saved_indices()
         bufferpool = self.create_bufferpool()
@@ -220,6 +267,61 @@ class TestSecondary(unittest.TestCase):
     Helper function
     """
 
+    def test_worker_sleeps_until_requests_and_drains_before_stopping(self) -> None:
+        self.delete_all_saved_indices()
+        request_queue = mp.Queue()
+        response_queue = mp.Queue()
+        stop_event = mp.Event()
+        index = AsyncSecondaryIndex(TABLE_NAME, ATTRIBUTE_NAME, request_queue, response_queue, stop_event)
+        index.start()
+        time.sleep(1)
+        stat_file = f"/proc/{index.pid}/stat"
+        if os.path.exists(stat_file):
+            with open(stat_file) as stat:
+                user_ticks, system_ticks = (int(ticks) for ticks in stat.read().rsplit(")", 1)[1].split()[11:13])
+            # an idle worker sleeps on its queue instead of polling it
+            self.assertLess((user_ticks + system_ticks) / os.sysconf("SC_CLK_TCK"), 0.5)
+        batches = [[(Operation.INSERT_RECORD, RECORD_VALUE, rid, rid) for rid in range(start, start + 10)] for start in range(0, 50, 10)]
+        for batch in batches:
+            request_queue.put(batch)
+        request_queue.put([(Operation.SEARCH_RECORD, RECORD_VALUE, 0, 50)])
+        # the batches queued ahead of the sentinel are still performed
+        request_queue.put(STOP_WORKER)
+        index.join(10)
+        self.assertFalse(index.is_alive())
+        responses = [response_queue.get(timeout=10) for _ in range(51)]
+        self.assertEqual([request_id for request_id, _ in responses], list(range(51)))
+        self.assertEqual(set(responses[-1][1]), set(range(50)))
+
+    def test_sharded_index_routes_and_merges_multiprocessing(self) -> None:
+        for shared in (True, False):
+            self.delete_all_saved_indices()
+            with mock.patch("lstore.table.SHARED_SECONDARY_INDEX", shared):
+                table: Table = Table(TABLE_NAME, 3, 0, self.create_bufferpool(), mp=True, secondary_shards=3)
+            records: list[list[int]] = [[key, key % 7, RECORD_VALUE] for key in range(1, 61)]
+            for record in records:
+                table.insert_record(record)
+            table.delete_record(8)
+            table.update_record(15, [None, 6, None])
+            table.wait_for_async_responses()
+            latest = {record[0]: record[1] for record in records if record[0] != 8}
+            latest[15] = 6
+            # each key lives on one of the shards of the column
+            self.assertEqual(len(table.secondary_indices[1]), 3)
+            self.assertEqual(sorted(table.search_secondary_multiprocessing(1, 1)[1]), [table.index.get_rid(key) for key in latest if latest[key] == 1])
+            self.assertEqual(sorted(table.search_secondary_multiprocessing(RECORD_VALUE, 2)[1]), [table.index.get_rid(key) for key in latest])
+            # the range spans every shard and comes back in key order
+            _, rids = table.search_secondary_range_multiprocessing(2, 6, 1)
+            value_of_rid = {table.index.get_rid(key): value for key, value in latest.items()}
+            self.assertEqual(sorted(rids), sorted(rid for rid, value in value_of_rid.items() if 2 <= value <= 6))
+            self.assertEqual([value_of_rid[rid] for rid in rids], sorted(value_of_rid[rid] for rid in rids))
+            table.prepare_to_be_pickled()
+            self.assertEqual(
+                sorted(filename for filename in os.listdir(".") if filename.startswith(f"{TABLE_NAME}_attr_attribute_1")),
+                [f"{TABLE_NAME}_attr_attribute_1_shard_{shard}" for shard in range(3)],
+            )
+        self.delete_all_saved_indices()
+
     def delete_all_saved_indices(self) -> None:
         prefixed = [
             filename
@@ -17,31 +17,28 @@ from lstore import (
     NUM_METADATA_COLS,
 )
 from abc import ABC
+from copy import copy, deepcopy
+import threading
 
 
 class TestPhysPage(unittest.TestCase):
     def test_insert_value_for_valid_offsets(self) -> None:
         page: PhysicalPage = PhysicalPage()
-        orig_time_stamp = page.get_timestamp()
         for offset in range(PhysicalPage.max_number_of_records):
             success = page.insert_value(123, offset)
             self.assertTrue(success)
             self.assertTrue(page.is_dirty())
-            self.assertGreater(page.timestamp, orig_time_stamp)
 
     def test_insert_value_for_INVALID_SLOT_NUMs(self) -> None:
         page: PhysicalPage = PhysicalPage()
-        orig_time_stamp = page.get_timestamp()
 
         for INVALID_SLOT_NUM in [-1, PhysicalPage.max_number_of_records]:
             success = page.insert_value(123, INVALID_SLOT_NUM)
             self.assertFalse(success)
             self.assertFalse(page.is_dirty())
-            self.assertEqual(orig_time_stamp, page.timestamp)
 
     def test_insert_value_for_invalid_integers(self) -> None:
         page: PhysicalPage = PhysicalPage()
-        orig_time_stamp = page.get_timestamp()
 
         offset: int = ATTRIBUTE_SIZE
         values_to_insert: list[int] = [-1 * 2**63 - 1, 2**63]
@@ -50,11 +47,9 @@ class TestPhysPage(unittest.TestCase):
             with self.assertRaises(OverflowError):
                 page.insert_value(value_to_insert, offset)
             self.assertFalse(page.is_dirty())
-            self.assertEqual(orig_time_stamp, page.get_timestamp())
 
     def test_get_column_value_for_valid_integers(self) -> None:
         page: PhysicalPage = PhysicalPage()
-        orig_time_stamp = page.timestamp
 
         offset: int = ATTRIBUTE_SIZE
         values_to_insert: list[int] = [-1 * 2**63, -10, 0, 10, 2**63 - 1]
@@ -67,7 +62,34 @@ class TestPhysPage(unittest.TestCase):
                 second=value_to_insert,
                 msg=f"Expected: {value_to_insert} Received: {column_value}",
             )
-            self.assertGreater(page.get_timestamp(), orig_time_stamp)
+
+    def test_get_and_set_column_values(self) -> None:
+        page: PhysicalPage = PhysicalPage()
+        values: list[int] = [-1 * 2**63, -10, 0, 10, 2**63 - 1]
+
+        self.assertTrue(page.set_column_values(values, 3))
+        self.assertTrue(page.is_dirty())
+        self.assertEqual(page.get_column_values(3, 3 + len(values)), values)
+        for offset, value in enumerate(values):
+            self.assertEqual(page.get_column_value(3 + offset), value)
+        self.assertEqual(len(page.get_column_values()), PhysicalPage.max_number_of_records)
+
+    def test_set_column_values_out_of_bounds(self) -> None:
+        page: PhysicalPage = PhysicalPage()
+        self.assertFalse(page.set_column_values([1, 2], PhysicalPage.max_number_of_records - 1))
+        self.assertFalse(page.set_column_values([1], -1))
+        self.assertFalse(page.is_dirty())
+        with self.assertRaises(OverflowError):
+            page.set_column_values([0, 2**63], 0)
+        self.assertEqual(page.get_column_values(0, 2), [0, 0])
+
+    def test_copy_keeps_column_view(self) -> None:
+        page: PhysicalPage = PhysicalPage()
+        page.insert_value(42, 7)
+        copied_page: PhysicalPage = deepcopy(page)
+        copied_page.insert_value(43, 7)
+        self.assertEqual(page.get_column_value(7), 42)
+        self.assertEqual(copied_page.get_column_value(7), 43)
 
     def test_pin_unpin(self) -> None:
         page: PhysicalPage = PhysicalPage()
@@ -147,6 +169,37 @@ class LogicalPageTests(ABC):
             exp_col = self.values_to_insert[ind]
             self.assertEqual(given_col, exp_col)
 
+    def test_get_record(self) -> None:
+        page: LogicalPage = self.init_page()
+        page.insert_record([7, 8, 9])
+        _, slot_num = page.insert_record(self.values_to_insert)
+        self.assertEqual(page.get_record(slot_num, [1, 1, 1]), self.values_to_insert)
+        self.assertEqual(page.get_record(slot_num, [1, 0, 1]), [self.values_to_insert[0], self.values_to_insert[2]])
+        self.assertEqual(page.get_record(slot_num, [0, 1]), [self.values_to_insert[1]])
+
+    def test_concurrent_inserts_and_reads(self) -> None:
+        page: LogicalPage = self.init_page()
+        slot_nums: list[int] = []
+        records: list[list[int]] = []
+
+        def insert() -> None:
+            for _ in range(64):
+                _, slot_num = page.insert_record(self.values_to_insert)
+                slot_nums.append(slot_num)
+                records.append(page.get_record(slot_num, [1] * self.num_cols))
+
+        threads = [threading.Thread(target=insert) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(slot_nums), list(range(256)))
+        self.assertEqual(records, [self.values_to_insert] * 256)
+
+    def test_copy_gets_own_latch(self) -> None:
+        page: LogicalPage = self.init_page()
+        self.assertIsNot(copy(page).latch, page.latch)
+
     # def test_get_column_invalid_index(self):
     #     page: LogicalPage = self.init_page()
     #     _, offset = page.insert_record(self.values_to_insert)
@@ -215,6 +268,20 @@ class TestBasePage(LogicalPageTests, unittest.TestCase):
             copied_page_col = copied_page.bufferpool.get_page(copied_page.page_ids[ind]).get_column_value(slot_num)
             self.assertEqual(orig_page_col, copied_page_col)
 
+    def test_zone_maps(self) -> None:
+        page: BasePage = self.init_page()
+        self.assertTrue(page.zone_map_excludes(0, -100, 100))
+        page.insert_record([7, 1, 0])
+        page.insert_records([[3, 9, 0], [5, None, 0]])
+        self.assertEqual(page.zone_maps, [[3, 7]])
+        self.assertTrue(page.zone_map_excludes(0, 8, 20))
+        self.assertFalse(page.zone_map_excludes(0, 7, 20))
+        copied_page: BasePage = get_copy_of_base_page(page)
+        copied_page.update_record([4, 4, 0], 0)
+        copied_page.refresh_zone_maps()
+        self.assertEqual(copied_page.zone_maps, [[3, 5]])
+        self.assertEqual(page.zone_maps, [[3, 7]])
+
     def check_rid_is_valid(self, rid) -> None:
         self.assertGreaterEqual(rid, 1)
 
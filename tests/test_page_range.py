@@ -109,6 +109,29 @@ class TestCumulativePageRange(unittest.TestCase):
         page_range.update_record(base_rid, [None, 5, None])
         self.__verify_record_retrieval(page_range, base_rid, [1, 5, 3, 0b010, base_rid])
 
+    def test_get_latest_record(self) -> None:
+        page_range: PageRange = PageRange(self.num_cols, self.page_directory, self.rid_generator, self.table_name, self.bufferpool, True)
+        base_rid = page_range.insert_record([1, 2, 3])
+        self.assertEqual(page_range.get_latest_record(base_rid, [1, 1, 1]), [1, 2, 3])
+        page_range.update_record(base_rid, [None, 5, None])
+        page_range.update_record(base_rid, [7, None, None])
+        self.assertEqual(page_range.get_latest_record(base_rid, [1, 1, 1]), [7, 5, 3])
+        self.assertEqual(page_range.get_latest_record(base_rid, [0, 1, 1]), [5, 3])
+        self.assertEqual(page_range.get_latest_record(base_rid, [0, 0, 0]), [])
+
+    def test_scan_column(self) -> None:
+        page_range: PageRange = PageRange(self.num_cols, self.page_directory, self.rid_generator, self.table_name, self.bufferpool, True)
+        base_rids = page_range.insert_records([[key, key % 10, 0] for key in range(1000)])
+        page_range.update_record(base_rids[3], [None, 42, None])
+        page_range.invalidate_record(base_rids[4], [0, 0, 0])
+        scanned = [(rids, values) for rids, values in page_range.scan_column(1)]
+        self.assertEqual(len(scanned), 2)
+        self.assertEqual([rid for rids, _ in scanned for rid in rids], base_rids[:4] + base_rids[5:])
+        expected_values = [key % 10 for key in range(1000)]
+        expected_values[3] = 42
+        del expected_values[4]
+        self.assertEqual([value for _, values in scanned for value in values], expected_values)
+
     # def test_update_record_for_small_number_of_updates(self) -> None:
     #     page_range: PageRange = PageRange(
     #         self.num_cols, self.page_directory, self.rid_generator, self.table_name, self.bufferpool, True
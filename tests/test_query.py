@@ -5,6 +5,7 @@ from lstore import (
     DiskInterface,
     Table,
     Query,
+    DSAStructure,
 )
 
 
@@ -32,6 +33,107 @@ class TestQuery(unittest.TestCase):
         result: bool = query.insert(*record)
         assert not result
 
+    def test_insert_many_query(self) -> None:
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 5, 0, bufferpool)
+        query: Query = Query(table)
+        records: list[list[int]] = [[key, key % 7, key * 2, 4, 5] for key in range(1, 1201)]
+        self.assertTrue(query.insert_many(records[:-1]))
+        self.assertTrue(query.insert(*records[-1]))
+        for record in records:
+            self.assertEqual(query.select(record[0], query.table.primary_key_col, [1, 1, 1, 1, 1])[0].columns, record)
+        selected_keys = sorted(record.columns[0] for record in query.select(3, 1, [1, 1, 1, 1, 1]))
+        self.assertEqual(selected_keys, [record[0] for record in records if record[1] == 3])
+        self.assertTrue(query.update(600, None, None, 0, None, None))
+        self.assertEqual(query.select(600, query.table.primary_key_col, [1, 1, 1, 1, 1])[0].columns, [600, 5, 0, 4, 5])
+        self.assertEqual(query.sum(1, 1200, 4), 5 * 1200)
+
+    def test_insert_many_dup_query(self) -> None:
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 5, 0, bufferpool)
+        query: Query = Query(table)
+        query.insert(1, 2, 3, 4, 5)
+        self.assertFalse(query.insert_many([[2, 2, 3, 4, 5], [1, 2, 3, 4, 5]]))
+        self.assertFalse(query.insert_many([[3, 2, 3, 4, 5], [3, 2, 3, 4, 5]]))
+        self.assertFalse(query.table.index.key_exists(2))
+        self.assertFalse(query.table.index.key_exists(3))
+
+    def test_select_range_query(self) -> None:
+        for secondary_structure in (DSAStructure.B_TREE_SET, DSAStructure.DICTIONARY_SET, None):
+            bufferpool = self.create_bufferpool()
+            table: Table = Table("table1", 3, 0, bufferpool, secondary_structure=secondary_structure or DSAStructure.DICTIONARY_SET)
+            if secondary_structure == None:
+                table.secondary_indices[1] = None
+            query: Query = Query(table)
+            query.insert_many([[key, key % 100, key * 2] for key in range(1, 1001)])
+            query.update(7, None, 55, None)
+            records = query.select_range(50, 60, 1, [1, 0, 1])
+            expected_keys = sorted([key for key in range(1, 1001) if 50 <= key % 100 <= 60 and key != 7] + [7])
+            self.assertEqual(sorted(record.columns[0] for record in records), expected_keys)
+            self.assertTrue(all(record.columns == [record.columns[0], record.columns[0] * 2] for record in records))
+            self.assertTrue(all(50 <= record.key <= 60 for record in records))
+            self.assertEqual(query.select_range(101, 200, 1, [1, 1, 1]), [])
+            self.assertEqual([record.columns for record in query.select_range(3, 5, 0, [1, 1, 1])], [[3, 3, 6], [4, 4, 8], [5, 5, 10]])
+
+    def test_scans_with_and_without_numpy(self) -> None:
+        for use_numpy in (False, True):
+            with mock.patch("lstore.table.USE_NUMPY", use_numpy), mock.patch("lstore.table.VECTORIZED_SUM_MIN_RECORDS", 1):
+                bufferpool = self.create_bufferpool()
+                table: Table = Table("table1", 3, 0, bufferpool)
+                table.secondary_indices[1] = None
+                query: Query = Query(table)
+                query.insert_many([[key, key % 10, key] for key in range(1, 2001)])
+                query.update(3, None, 4, 1000)
+                query.update(14, None, None, 0)
+                query.delete(24)
+                self.assertEqual(table.vectorized(), use_numpy)
+                expected_keys = [key for key in range(1, 2001) if key % 10 == 4 and key != 24] + [3]
+                rid_to_key = {rid: key for key, rid in table.index.key_to_rid.items()}
+                self.assertEqual(sorted(rid_to_key[rid] for rid in table.brute_force_search(4, 1)), sorted(expected_keys))
+                self.assertEqual(query.sum(1, 30, 2), sum(range(1, 31)) - 3 + 1000 - 14 - 24)
+                self.assertEqual(query.sum(1, 2000, 1), sum(key % 10 for key in range(1, 2001)) - 3 + 4 - 4)
+                self.assertFalse(query.sum(3000, 4000, 1))
+
+    def test_sum_of_large_values_query(self) -> None:
+        for use_numpy in (False, True):
+            with mock.patch("lstore.table.USE_NUMPY", use_numpy):
+                bufferpool = self.create_bufferpool()
+                table: Table = Table("table1", 2, 0, bufferpool)
+                query: Query = Query(table)
+                query.insert_many([[key, 2**62] for key in range(1, 3001)])
+                query.update(3, None, -(2**63))
+                self.assertEqual(query.sum(1, 3000, 1), 2999 * 2**62 - 2**63)
+
+    def test_group_by_large_values_query(self) -> None:
+        for use_numpy in (False, True):
+            with mock.patch("lstore.table.USE_NUMPY", use_numpy):
+                bufferpool = self.create_bufferpool()
+                table: Table = Table("table1", 3, 0, bufferpool)
+                query: Query = Query(table)
+                query.insert_many([[key, 2**62, key % 2] for key in range(1, 3001)])
+                query.update(3, None, -(2**63), None)
+                groups = query.group_by(2, 1, ["count", "sum", "min", "max"])
+                self.assertEqual(groups, {0: [1500, 1500 * 2**62, 2**62, 2**62], 1: [1500, 1499 * 2**62 - 2**63, -(2**63), 2**62]})
+
+    def test_group_by_query(self) -> None:
+        for use_numpy in (False, True):
+            with mock.patch("lstore.table.USE_NUMPY", use_numpy):
+                bufferpool = self.create_bufferpool()
+                table: Table = Table("table1", 3, 0, bufferpool)
+                query: Query = Query(table)
+                query.insert_many([[key, key * 2, key % 3] for key in range(1, 1001)])
+                query.update(3, None, 1000, 1)
+                query.delete(6)
+                rows = [[key, key * 2, key % 3] for key in range(1, 1001) if key not in (3, 6)] + [[3, 1000, 1]]
+                groups = query.group_by(2, 1, ["count", "sum", "min", "max", "avg"])
+                self.assertEqual(set(groups), {0, 1, 2})
+                for group_value in range(3):
+                    values = [row[1] for row in rows if row[2] == group_value]
+                    self.assertEqual(groups[group_value], [len(values), sum(values), min(values), max(values), sum(values) / len(values)])
+                self.assertEqual(query.group_by(2, 1, ["count", "sum"], key_range=(1, 6)), {1: [3, 2 + 1000 + 8], 2: [2, 4 + 10]})
+                self.assertEqual(query.group_by(1, 2, ["count"], key_range=(2000, 3000)), {})
+                self.assertFalse(query.group_by(2, 1, ["median"]))
+
     def test_select_record_query(self) -> None:
         bufferpool = self.create_bufferpool()
         table: Table = Table("table1", 5, 0, bufferpool)
@@ -110,6 +212,23 @@ class TestQuery(unittest.TestCase):
         aggregateSum2 = query.sum(1, 3, 1)
         assert aggregateSum2 == 4
 
+    def test_aggregate_previous_versions_query(self) -> None:
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 3, 0, bufferpool)
+        query: Query = Query(table)
+        for key in range(10):
+            query.insert(key, key, 0)
+        # key 0 is updated once, key 1 twice
+        query.update(0, None, 100, None)
+        query.update(1, None, 200, None)
+        query.update(1, None, 300, None)
+        self.assertEqual(query.sum_version(0, 9, 1, 0), 100 + 300 + sum(range(2, 10)))
+        self.assertEqual(query.sum_version(0, 9, 1, -1), 0 + 200 + sum(range(2, 10)))
+        # records updated fewer times than asked for read as their oldest version
+        self.assertEqual(query.sum_version(0, 9, 1, -2), sum(range(10)))
+        self.assertEqual(query.sum_version(0, 9, 1, -5), sum(range(10)))
+        self.assertEqual(query.select_version(1, 0, [1, 1, 1], -1)[0].columns, [1, 200, 0])
+
     def test_aggregate_record_none_in_range_query(self) -> None:
         bufferpool = self.create_bufferpool()
         table: Table = Table("table1", 5, 0, bufferpool)
@@ -189,6 +308,16 @@ class TestQuery(unittest.TestCase):
         assert recordList[0].columns == record
         table.stop_all_secondary_indices()
 
+    def test_insert_many_query_multiprocessing(self) -> None:
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 5, 0, bufferpool, mp=True)
+        query: Query = Query(table)
+        records: list[list[int]] = [[key, key % 3, 3, 4, 5] for key in range(1, 31)]
+        self.assertTrue(query.insert_many(records))
+        recordList = query.select(2, 1, [1, 1, 1, 1, 1])
+        self.assertEqual(sorted(record.columns[0] for record in recordList), [record[0] for record in records if record[1] == 2])
+        table.stop_all_secondary_indices()
+
     def test_select_secondary_records_multiprocessing(self) -> None:
         bufferpool = self.create_bufferpool()
         table: Table = Table("table1", 5, 0, bufferpool, mp=True)
@@ -316,6 +316,47 @@ class TestSecondary(unittest.TestCase):
         self.assertEqual(expected_rids_1.sort(), list(values_after_update_1).sort())
         self.assertEqual(expected_rids_2.sort(), list(values_after_update_2).sort())
 
+    def test_search_range_btree(self) -> None:
+        for structure in (DSAStructure.B_TREE_ARRAY, DSAStructure.B_TREE_SET):
+            self.check_if_saved_exists()
+            bufferpool = self.create_bufferpool()
+            table: Table = Table(TABLE_NAME, 5, 0, bufferpool, secondary_structure=structure)
+            records: list[list[int]] = [[key, 2, 3, 4, key % 50] for key in range(1, 301)]
+            for record in records:
+                table.insert_record(record)
+            expected_rids = [table.index.get_rid(key) for key in sorted(range(1, 301), key=lambda key: key % 50) if 10 <= key % 50 <= 12]
+            self.assertEqual(sorted(table.secondary_indices[4].search_record(11)), [table.index.get_rid(key) for key in range(11, 301, 50)])
+            self.assertEqual(sorted(table.search_secondary_range_serially(10, 12, 4)), sorted(expected_rids))
+            # saving and loading the B-tree keeps its order
+            table.secondary_indices[4].save_index()
+            secondary = SecondaryIndex(table.name, ATTRIBUTE_NAME, structure=structure)
+            os.remove(f"{TABLE_NAME}_attr_{ATTRIBUTE_NAME}")
+            real_rids = secondary.search_range(10, 12)
+            self.assertEqual(sorted(real_rids[:6]), sorted(expected_rids[:6]))
+            self.assertEqual(sorted(real_rids), sorted(expected_rids))
+
+    def test_dict_structures(self) -> None:
+        for structure in (DSAStructure.DICTIONARY_DICT, DSAStructure.B_TREE_DICT):
+            self.check_if_saved_exists()
+            bufferpool = self.create_bufferpool()
+            table: Table = Table(TABLE_NAME, 5, 0, bufferpool, secondary_structure=structure)
+            records: list[list[int]] = [[key, 2, 3, 4, key % 5 + 5] for key in range(1, 21)]
+            for record in records:
+                table.insert_record(record)
+            expected_rids = [table.index.get_rid(key) for key in range(1, 21) if key % 5 + 5 == 6]
+            self.assertEqual(list(table.secondary_indices[4].search_record(6)), expected_rids)
+            self.assertEqual(
+                sorted(table.search_secondary_range_serially(6, 7, 4)),
+                sorted(table.index.get_rid(key) for key in range(1, 21) if key % 5 + 5 in (6, 7)),
+            )
+            # a rid added twice stays until it is deleted twice
+            table.secondary_indices[4].add_record(6, expected_rids[0])
+            table.secondary_indices[4].delete_record(6, expected_rids[0])
+            self.assertEqual(list(table.secondary_indices[4].search_record(6)), expected_rids)
+            table.delete_record(1)
+            self.assertEqual(list(table.secondary_indices[4].search_record(6)), expected_rids[1:])
+            self.assertEqual(list(table.secondary_indices[4].search_record(100)), [])
+
     """
     Helper function
     """
@@ -0,0 +1,82 @@
+import time
+import unittest
+from unittest import mock
+from lstore import Bufferpool, DiskInterface, Table
+from lstore.enums import Operation
+from lstore.shared_index import SharedIndex
+
+
+class TestSharedIndex(unittest.TestCase):
+    def test_search_published_snapshot(self) -> None:
+        table_side = SharedIndex()
+        worker_side = SharedIndex(table_side.name)
+        self.assertIsNone(table_side.search_record(1, 0))
+        worker_side.publish([(1, [10, 11]), (3, [30]), (4, []), (7, [70])], 2)
+        self.assertEqual(table_side.search_record(1, 2), [10, 11])
+        self.assertEqual(table_side.search_record(2, 2), [])
+        self.assertEqual(table_side.search_record(4, 2), [])
+        self.assertEqual(table_side.search_range(2, 7, 2), [30, 70])
+        self.assertEqual(table_side.search_range(8, 9, 2), [])
+        # the snapshot misses an update the table sent
+        self.assertIsNone(table_side.search_record(1, 3))
+        # the next snapshot waits until the table took this one, which it did when it searched
+        self.assertTrue(worker_side.can_publish())
+        worker_side.publish([(1, [11])], 3)
+        self.assertFalse(worker_side.can_publish())
+        self.assertEqual(table_side.search_record(1, 3), [11])
+        worker_side.close()
+        table_side.unlink()
+
+    def test_search_logged_updates(self) -> None:
+        table_side = SharedIndex()
+        worker_side = SharedIndex(table_side.name)
+        # nothing to log to before the first snapshot
+        self.assertFalse(worker_side.append([(Operation.INSERT_RECORD, 1, 10, 1)]))
+        worker_side.publish([(1, [10, 11]), (3, [30]), (7, [70])], 3)
+        self.assertEqual(table_side.search_record(1, 3), [10, 11])
+        # logged without waiting for the table, which replays them onto the snapshot it holds
+        self.assertTrue(worker_side.append([(Operation.DELETE_RECORD, 1, 10, 2), (Operation.INSERT_RECORD, 5, 50, 3)]))
+        self.assertTrue(worker_side.append([(Operation.INSERT_RECORD, 1, 12, 4)]))
+        self.assertEqual(table_side.search_record(1, 6), [11, 12])
+        self.assertEqual(table_side.search_record(5, 6), [50])
+        self.assertEqual(table_side.search_range(2, 7, 6), [30, 50, 70])
+        self.assertEqual(table_side.search_range(8, 9, 6), [])
+        self.assertEqual(table_side.search_range_items(0, 5, 6), [(1, [11, 12]), (3, [30]), (5, [50])])
+        self.assertIsNone(table_side.search_record(1, 7))
+        # updates the log cannot take need the whole index published again
+        self.assertFalse(worker_side.append([(Operation.LOAD_INDEX, 0, 0, 5)]))
+        with mock.patch("lstore.shared_index.SHARED_INDEX_LOG_SIZE", 2):
+            worker_side.publish([(1, [11])], 7)
+        self.assertEqual(table_side.search_record(1, 7), [11])
+        self.assertEqual(table_side.search_record(5, 7), [])
+        self.assertTrue(worker_side.append([(Operation.INSERT_RECORD, 2, 20, 6)]))
+        self.assertFalse(worker_side.append([(Operation.INSERT_RECORD, 2, 21, 7), (Operation.INSERT_RECORD, 2, 22, 8)]))
+        self.assertEqual(table_side.search_range(0, 9, 8), [11, 20])
+        worker_side.close()
+        table_side.unlink()
+
+    def test_table_searches_snapshot_without_requests(self) -> None:
+        bufferpool = Bufferpool(1000, "")
+        bufferpool.disk: DiskInterface = mock.Mock()
+        bufferpool.disk.page_exists.return_value = False
+        table: Table = Table("table1", 3, 0, bufferpool, mp=True)
+        for key in range(1, 21):
+            table.insert_record([key, key % 4, key])
+        table.delete_record(5)
+        table.wait_for_async_responses()
+        # searches take a snapshot missing updates to the worker until it published one with all of them
+        deadline = time.monotonic() + 10
+        while table.shared_indices[1].search_record(1, table.sent_updates[1]) == None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with mock.patch.object(table, "submit_secondary_request", side_effect=AssertionError("sent to the worker")):
+            _, rids = table.search_secondary_multiprocessing(1, 1)
+            _, range_rids = table.search_secondary_range_multiprocessing(2, 3, 1)
+        table.stop_all_secondary_indices()
+        self.assertEqual(rids, [table.index.get_rid(key) for key in (1, 9, 13, 17)])
+        # in key order
+        expected_range_rids = [table.index.get_rid(key) for value in (2, 3) for key in range(1, 21) if key % 4 == value]
+        self.assertEqual(range_rids, expected_range_rids)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import os
+import tempfile
 import unittest
 from unittest import mock
-from lstore import PageRange, Table, DSAStructure, Bufferpool, DiskInterface, PageRange
+import time
+from concurrent.futures import ThreadPoolExecutor
+from lstore import PageRange, Table, DSAStructure, Bufferpool, DiskInterface, PageRange, PhysicalPage, StorageBackend
+from lstore.parallel_scan import ParallelScanExecutor
 
 
 class TestTable(unittest.TestCase):
@@ -18,6 +23,11 @@ class TestTable(unittest.TestCase):
         bufferpool.disk.page_exists.return_value = False
         return bufferpool
 
+    def delete_all_saved_indices(self) -> None:
+        for filename in os.listdir("."):
+            if filename.startswith("table1_attr_"):
+                os.remove(filename)
+
     def test_insert_record(self) -> None:
         bufferpool = self.create_bufferpool()
         table: Table = Table("table1", 2, self.primary_key_col, bufferpool)
@@ -163,6 +173,45 @@ class TestTable(unittest.TestCase):
         self.assertEqual(list(expected_rids), brute_search_indices)
         table.stop_all_secondary_indices()
 
+    def test_secondary_requests_are_batched_multiprocessing(self) -> None:
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 3, self.primary_key_col, bufferpool, mp=True)
+        with mock.patch("lstore.table.SECONDARY_REQUEST_BATCH_AGE", 60), mock.patch("lstore.table.SECONDARY_REQUEST_BATCH_SIZE", 4):
+            for key in range(1, 4):
+                table.insert_record([key, 7, key])
+            # buffered until the batch fills up
+            self.assertEqual([len(request_batch) for request_batch in table.request_batches], [0, 3, 3])
+            table.insert_record([4, 7, 4])
+            self.assertEqual([len(request_batch) for request_batch in table.request_batches], [0, 0, 0])
+            table.insert_record([5, 7, 5])
+            table.update_record(5, [None, 8, None])
+            self.assertEqual([len(request_batch) for request_batch in table.request_batches], [0, 3, 1])
+            # a search sends the requests buffered ahead of it, so it sees their effect
+            _, rids = table.search_secondary_multiprocessing(7, 1)
+            self.assertEqual(sorted(rids), [table.index.get_rid(key) for key in range(1, 5)])
+            self.assertEqual(table.request_batches[1], [])
+            table.wait_for_async_responses()
+            self.assertEqual(table.request_batches[2], [])
+            self.assertEqual(table.pending_requests, {})
+        table.stop_all_secondary_indices()
+
+    def test_concurrent_searches_get_their_own_responses_multiprocessing(self) -> None:
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 3, self.primary_key_col, bufferpool, mp=True)
+        for key in range(1, 41):
+            table.insert_record([key, key % 4, key % 5])
+        table.wait_for_async_responses()
+        searches = [(value, column_index) for value in range(4) for column_index in (1, 2)] * 5
+        # the responses of both workers arrive on one queue, each search is resolved through its own future
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda search: table.search_secondary_multiprocessing(*search)[1], searches))
+        for (value, column_index), rids in zip(searches, results):
+            expected_rids = [table.index.get_rid(key) for key in range(1, 41) if key % (3 + column_index) == value]
+            self.assertEqual(sorted(rids), sorted(expected_rids))
+        self.assertEqual(table.pending_requests, {})
+        table.stop_all_secondary_indices()
+        self.assertIsNone(table.response_dispatcher)
+
     def test_brute_force_search_set_multiprocessing(self) -> None:
         bufferpool = self.create_bufferpool()
         table: Table = Table("table1", 5, self.primary_key_col, bufferpool, secondary_structure=DSAStructure.DICTIONARY_SET, mp=True)
@@ -226,6 +275,125 @@ class TestTable(unittest.TestCase):
     #     self.assertEqual(table.get_latest_column_values(rid, [1, 0]), [[record[0]]])
     #     self.assertEqual(table.get_latest_column_values(rid, [1, 1]), [record])
 
+    @mock.patch.object(PhysicalPage, "max_number_of_records", 512)
+    def test_merge_refreshes_zone_maps(self) -> None:
+        # prepare_to_be_pickled saves the secondary indices to the working directory
+        self.addCleanup(self.delete_all_saved_indices)
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 3, self.primary_key_col, bufferpool)
+        table.secondary_indices[1] = None
+        table.insert_records([[key, key, 0] for key in range(1, 2049)])
+        page_range: PageRange = table.page_ranges[0]
+        second_base_page = page_range.base_pages[1]
+        # enough updates to fill three tail pages and start a merge, all of them into the second base page. The
+        # first update of a record also copies its base version to the tail, so the merge covers updates 0 to 1023
+        for i in range(1600):
+            table.update_record(513 + i % 512, [None, 10000 + i, None])
+        deadline = time.time() + 30
+        while page_range.base_pages[1] is second_base_page and time.time() < deadline:
+            time.sleep(0.01)
+        merged_base_page = page_range.base_pages[1]
+        self.assertIs(table.page_directory.get_page(merged_base_page.get_starting_rid()), merged_base_page)
+        self.assertEqual(merged_base_page.zone_maps[0], [513, 1024])
+        self.assertEqual(merged_base_page.zone_maps[1], [10000 + 512, 10000 + 1023])
+        # the updates in the tail page still being filled are not merged, so no page may be skipped on column 1
+        self.assertEqual(page_range.unmerged_update_columns, {1})
+        self.assertEqual(len(table.brute_force_range_search(11599, 11599, 1)), 1)
+        table.prepare_to_be_pickled()
+        self.assertEqual(page_range.unmerged_update_columns, set())
+        self.assertEqual(page_range.base_pages[1].zone_maps[1], [10000 + 1600 - 512, 10000 + 1599])
+        # pages the zone maps rule out are not read at all
+        with mock.patch.object(bufferpool, "get_page", wraps=bufferpool.get_page) as get_page:
+            self.assertEqual(len(table.brute_force_range_search(11500, 11599, 1)), 100)
+            self.assertEqual(len(table.brute_force_range_search(1, 512, 1)), 512)
+        read_page_ids = {call.args[0] for call in get_page.call_args_list}
+        read_base_pages = {page_id.split("_")[1] for page_id in read_page_ids if not page_id.split("_")[1].startswith("-")}
+        self.assertEqual(read_base_pages, {str(page_range.base_pages[0].get_starting_rid()), str(page_range.base_pages[1].get_starting_rid())})
+
+    @mock.patch.object(PhysicalPage, "max_number_of_records", 512)
+    def test_merge_folds_updates_to_base_pages_an_earlier_merge_took(self) -> None:
+        bufferpool = self.create_bufferpool()
+        table: Table = Table("table1", 2, self.primary_key_col, bufferpool)
+        table.secondary_indices[1] = None
+        table.insert_records([[key, key % 10] for key in range(1, 1025)])
+        page_range: PageRange = table.page_ranges[0]
+        table.update_record(3, [None, 1000])
+        # the first base page goes to a merge before the tail page holding its update is full
+        table._Table__merge_page_range(page_range, *page_range.take_merge_work())
+        for key in range(513, 1024):
+            table.update_record(key, [None, 7])
+        # the full tail page comes with the second base page only
+        tail_pages, base_pages, latest_tid, num_updates = page_range.take_merge_work(include_latest_tail_page=True)
+        self.assertEqual(base_pages, [page_range.base_pages[1]])
+        table._Table__merge_page_range(page_range, tail_pages, base_pages, latest_tid, num_updates)
+        self.assertEqual(page_range.unmerged_update_columns, set())
+        self.assertEqual(page_range.base_pages[0].zone_maps[1], [0, 1000])
+        self.assertEqual(table.brute_force_search(1000, 1), [table.index.get_rid(3)])
+
+    @mock.patch.object(PhysicalPage, "max_number_of_records", 512)
+    def test_merge_deletes_the_pages_it_replaced(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            bufferpool = Bufferpool(1000, directory, storage_backend=StorageBackend.SEGMENT)
+            table: Table = Table("table1", 2, self.primary_key_col, bufferpool)
+            table.secondary_indices[1] = None
+            table.insert_records([[key, key % 10] for key in range(1, 513)])
+            page_range: PageRange = table.page_ranges[0]
+            base_page = page_range.base_pages[0]
+            replaced_page_ids: list[str] = base_page.page_ids[:2]
+            bufferpool.flush_all_pages()
+            table.update_record(3, [None, 1000])
+            table._Table__merge_page_range(page_range, *page_range.take_merge_work(include_latest_tail_page=True))
+            for page_id in replaced_page_ids:
+                self.assertNotIn(page_id, bufferpool.physical_pages)
+                self.assertFalse(bufferpool.disk.page_exists(page_id))
+            # a reader still holding the replaced page reads the merged columns
+            self.assertEqual(base_page.page_ids[:2], page_range.base_pages[0].page_ids[:2])
+            self.assertEqual(table.get_latest_column_values(table.index.get_rid(3), [1, 1]), [[3, 1000]])
+            bufferpool.disk.close()
+
+    @mock.patch.object(PhysicalPage, "max_number_of_records", 512)
+    def test_scans_fan_out_across_page_ranges(self) -> None:
+        # prepare_to_be_pickled saves the secondary indices to the working directory
+        self.addCleanup(self.delete_all_saved_indices)
+        with tempfile.TemporaryDirectory() as directory:
+            bufferpool = Bufferpool(1000, directory, storage_backend=StorageBackend.SEGMENT)
+            table: Table = Table("table1", 3, self.primary_key_col, bufferpool)
+            table.secondary_indices[1] = None
+            num_records: int = 3 * Table.num_records_in_page_range
+            table.insert_records([[key, key % 100, key] for key in range(1, num_records + 1)])
+            for key in range(1, num_records + 1, 1000):
+                table.update_record(key, [None, 1000 + key, None])
+            table.delete_record(10)
+            table.delete_record(2001)
+            rid_to_key: dict[int, int] = {table.index.get_rid(key): key for key in range(1, num_records + 1) if table.index.key_exists(key)}
+            expected_rids: list[int] = table.brute_force_range_search(10, 10, 1)
+            expected_sum: tuple[int, int] = table.sum_range(1, num_records, 1)
+            with mock.patch("lstore.table.PARALLEL_SCAN_WORKERS", 2), mock.patch("lstore.table.PARALLEL_SCAN_MIN_PAGE_RANGES", 2):
+                self.assertEqual(table.brute_force_range_search(10, 10, 1), expected_rids)
+                self.assertEqual(sorted(rid_to_key[rid] for rid in expected_rids), list(range(110, num_records + 1, 100)))
+                updated_keys: list[int] = [rid_to_key[rid] for rid in table.brute_force_range_search(1000, 1000 + num_records, 1)]
+                self.assertEqual(updated_keys, [key for key in range(1, num_records + 1, 1000) if key != 2001])
+                self.assertEqual(table.sum_range(1, num_records, 1), expected_sum)
+                self.assertIsNotNone(table.scan_executor)
+                # the snapshot is only taken again once the table changed
+                snapshot: bytes = table.scan_executor.snapshot
+                self.assertEqual(table.brute_force_range_search(10, 10, 1), expected_rids)
+                self.assertIs(table.scan_executor.snapshot, snapshot)
+                table.update_record(110, [None, 5000, None])
+                self.assertEqual(table.brute_force_range_search(10, 10, 1), expected_rids[1:])
+                self.assertIsNot(table.scan_executor.snapshot, snapshot)
+            table.prepare_to_be_pickled()
+            self.assertIsNone(table.scan_executor)
+            bufferpool.disk.close()
+
+    def test_scans_only_fan_out_over_files_read_by_other_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            for storage_backend, can_scan in ((StorageBackend.FILE_PER_PAGE, True), (StorageBackend.SEGMENT, True), (StorageBackend.MMAP, False)):
+                bufferpool = Bufferpool(10, directory, storage_backend=storage_backend)
+                self.assertEqual(ParallelScanExecutor.can_scan(bufferpool), can_scan)
+                bufferpool.disk.close()
+            self.assertFalse(ParallelScanExecutor.can_scan(Bufferpool(10, "")))
+
     # def test_get_latest_column_values_nonexisting_record(self) -> None:
     #     bufferpool = self.create_bufferpool()
     #     table: Table = Table("table1", 2, self.primary_key_col, bufferpool)